@@ -0,0 +1,291 @@
+# Importing Required Packages
+# torch and SAM are imported by the functions that need them, like in imgsvg
+import os
+import glob
+import queue
+import hashlib
+import logging
+import threading
+import collections
+from concurrent.futures import ProcessPoolExecutor
+import cv2
+import imgsvg
+import instrument
+from embeddingcache import EmbeddingCache, set_image_features, checkpoint_hash
+
+logger = logging.getLogger(__name__)
+
+# Image extensions picked up from directories
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".tif", ".tiff", ".webp")
+
+# Peak memory (MB) one image adds to an image-encoder forward on CPU, per SAM model type
+# (measured for vit_b; the global-attention maps of vit_l/vit_h have 16 heads instead of 12)
+ENCODER_MB_PER_IMAGE = {"vit_b": 2600, "vit_l": 3600, "vit_h": 4000}
+
+# Function to expand files, directories and glob patterns into (image path, output name) pairs
+def iter_image_paths(inputs):
+    """
+    Return the images of ``inputs`` in a stable order, each with the name its
+    SVG gets: the image stem, prefixed with the sub-directories below the
+    input directory it was found in (``facades/a/1.jpg`` -> ``a_1``).
+
+    Names that several images would share (``1.jpg`` and ``1.png``, the same
+    file name in two input directories or glob matches, ``a/1.jpg`` and
+    ``a_1.jpg``) get a short hash of the image path appended, so no two images
+    write the same SVG. A file listed twice is kept once.
+
+    Raises:
+        ValueError: If the names still clash after the hashes are added.
+    """
+    images = []
+    for entry in inputs:
+        if os.path.isdir(entry):
+            for root, dirs, files in os.walk(entry):
+                dirs.sort()
+                for filename in sorted(files):
+                    if filename.lower().endswith(IMAGE_EXTENSIONS):
+                        relative = os.path.relpath(os.path.join(root, filename), entry)
+                        images.append((os.path.join(root, filename), _output_name(relative)))
+        elif glob.has_magic(entry):
+            images.extend((path, _output_name(os.path.basename(path))) for path in sorted(glob.glob(entry))
+                          if os.path.isfile(path))
+        else:
+            images.append((entry, _output_name(os.path.basename(entry))))
+
+    # Drop repeated files, then disambiguate the names that are still shared
+    unique = {}
+    for path, name in images:
+        unique.setdefault(os.path.realpath(path), (path, name))
+    images = list(unique.values())
+    counts = collections.Counter(name for _, name in images)
+    images = [(path, f"{name}_{_path_hash(path)}" if counts[name] > 1 else name) for path, name in images]
+    clashes = sorted(name for name, count in collections.Counter(name for _, name in images).items() if count > 1)
+    if clashes:
+        raise ValueError(f"Several images map to the same SVG name: {clashes}")
+    return images
+
+# Helper for a short, stable hash of an image path
+def _path_hash(path):
+    return hashlib.sha1(os.path.realpath(path).encode("utf-8")).hexdigest()[:8]
+
+# Helper to turn a relative image path into an SVG name without separators
+def _output_name(relative_path):
+    return os.path.splitext(relative_path)[0].replace(os.sep, "_").replace("/", "_")
+
+# Function to choose how many images go through the image encoder at once
+def encoder_batch_size(model_type, device, batch_size = 4, memory_limit_mb = None):
+    """
+    Cap ``batch_size`` so one encoder forward stays under ``memory_limit_mb``
+    on CPU (default: half the physical memory; see ENCODER_MB_PER_IMAGE).
+    On CUDA the requested size is used.
+    """
+    if str(device).startswith("cuda"):
+        return max(1, batch_size)
+    if memory_limit_mb is None:
+        try:
+            memory_limit_mb = os.sysconf("SC_PHYS_PAGES") * os.sysconf("SC_PAGE_SIZE") / 2 ** 21
+        except (AttributeError, ValueError, OSError):
+            return max(1, batch_size)
+    per_image = ENCODER_MB_PER_IMAGE.get(model_type, ENCODER_MB_PER_IMAGE["vit_h"])
+    return max(1, min(batch_size, int(memory_limit_mb // per_image)))
+
+# Function to run the SAM image encoder on several images in one forward
+def encode_batch(predictor, images):
+    """
+    Encode RGB ``images`` together, preprocessing each one the way
+    ``SamPredictor.set_image`` does, and return their features (B, C, H, W).
+    """
+    import torch
+    model = predictor.model
+    batch = []
+    for image in images:
+        input_image = predictor.transform.apply_image(image)
+        input_image = torch.as_tensor(input_image, device = predictor.device).permute(2, 0, 1).contiguous()
+        batch.append(model.preprocess(input_image[None]))
+    with torch.no_grad(), instrument.span("encode"):
+        return model.image_encoder(torch.cat(batch))
+
+# Helper to let a mask generator use features computed by encode_batch instead of running the encoder
+def _use_precomputed_features(mask_generator):
+    predictor = mask_generator.predictor
+    encode = predictor.set_image
+    pending = {}
+
+    # Crops of the whole image (crop layer 0) are views of the same pixels; other crops are encoded as usual
+    def set_image(image, image_format = "RGB"):
+        source = pending.get("image")
+        if source is not None and image.shape == source.shape and \
+                image.__array_interface__["data"][0] == source.__array_interface__["data"][0]:
+            set_image_features(predictor, image, pending["features"])
+        else:
+            encode(image, image_format)
+
+    predictor.set_image = set_image
+    return pending
+
+# Function to write the SVG of one image, and its region index, from its RLE masks (runs in the SVG worker processes)
+def write_svg(rles, output_filepath, size, precision = 1, tolerance = 2.0):
+    import pycocotools.mask as maskUtils
+    from regionindex import RegionIndex, sidecar_path
+    masks = [maskUtils.decode(rle).astype(bool) for rle in rles]
+    written = imgsvg.masks_to_svg(masks, output_filepath, precision = precision, tolerance = tolerance,
+                                  image_size = size)
+    # Region ids are the positions of the paths in the SVG
+    RegionIndex([rles[i] for i in written], size = size).save(sidecar_path(output_filepath))
+    return output_filepath
+
+# Function to segment every image of a directory, glob or file list into deterministic SVG files
+def segment_images(inputs, output_dir = "Extracted_MaskImage_SVG", model_type = imgsvg.model_type,
+                   checkpoint_path = imgsvg.checkpoint_path, device = None, profile = None, batch_size = 4,
+                   memory_limit_mb = None, svg_workers = 2, prefetch = 8, skip_existing = False, precision = 1,
+                   cache_dir = None):
+    """
+    Segment many images with one SAM model, writing ``mask_<name>.svg`` per image
+    and its region index ``mask_<name>.regions.npz`` (see regionindex).
+
+    Three stages overlap: a prefetch thread reads and decodes the images, this
+    thread runs the image encoder on batches of ``batch_size`` images (fewer on
+    CPU if ``memory_limit_mb`` requires it) and a decoder thread runs the
+    prompt decoder of each image, handing the masks as RLE to ``svg_workers``
+    processes that vectorize and save them. Output names come from the image
+    paths (see iter_image_paths), so a rerun overwrites the same files, or with
+    ``skip_existing`` leaves them alone.
+
+    Args:
+        inputs (list[str]): Image files, directories or glob patterns.
+        output_dir (str): Directory for the SVG files.
+        model_type (str): Key of ``sam_model_registry``.
+        checkpoint_path (str or None): SAM checkpoint to load.
+        device (str or None): Torch device (default: imgsvg.DEVICE).
+        profile (str, dict or None): Generation profile (see samprofile).
+        batch_size (int): Images per image-encoder forward.
+        memory_limit_mb (int or None): Memory budget of one encoder forward on CPU (default: half the RAM).
+        svg_workers (int): Processes writing the SVG files; 0 writes them on the decoder thread.
+        prefetch (int): Decoded images held ahead of the encoder.
+        skip_existing (bool): Skip images whose SVG already exists.
+        precision (int): Decimals per non-integer SVG coordinate.
+        cache_dir (str or None): Embedding cache directory; cached images skip the encoder batches.
+
+    Returns:
+        results (list[dict]): Per image, in input order: "image", "svg", "masks" and "status".
+    """
+    import samprofile
+    images = iter_image_paths(inputs)
+    os.makedirs(output_dir, exist_ok = True)
+    jobs = []
+    results = []
+    for image_path, name in images:
+        output_filepath = os.path.join(output_dir, f"mask_{name}.svg")
+        result = {"image": image_path, "svg": output_filepath, "masks": 0, "status": "pending"}
+        results.append(result)
+        if skip_existing and os.path.exists(output_filepath):
+            result["status"] = "skipped"
+        else:
+            jobs.append(result)
+    if not jobs:
+        logger.info(f"Nothing to segment, {len(results)} SVGs already exist.")
+        return results
+
+    sam = imgsvg.load_sam_model(model_type, checkpoint_path, device)
+    mask_generator = samprofile.build_mask_generator(sam, profile, output_mode = "coco_rle")
+    pending = _use_precomputed_features(mask_generator)
+    batch_size = encoder_batch_size(model_type, sam.device, batch_size, memory_limit_mb)
+    logger.info(f"Segmenting {len(jobs)} images with {model_type} on {sam.device}, {batch_size} per encoder batch")
+    cache = EmbeddingCache(cache_dir) if cache_dir else None
+    digest = checkpoint_hash(checkpoint_path, cache_dir) if cache else None
+
+    stop = object()
+    decoded = queue.Queue(maxsize = max(prefetch, batch_size))
+    encoded = queue.Queue(maxsize = 2 * batch_size)
+    pool = ProcessPoolExecutor(max_workers = svg_workers) if svg_workers > 0 else None
+    writes = []
+
+    # Prefetch thread: read and decode the images ahead of the encoder
+    def read_images():
+        for result in jobs:
+            with instrument.span("image_read"):
+                image_bgr = cv2.imread(result["image"])
+            decoded.put((result, None if image_bgr is None else cv2.cvtColor(image_bgr, cv2.COLOR_BGR2RGB)))
+        decoded.put(stop)
+
+    # Decoder thread: prompt decoding and filtering of one image at a time, then hand the masks to the writers
+    def decode_masks():
+        while True:
+            item = encoded.get()
+            if item is stop:
+                return
+            result, image, features = item
+            try:
+                pending.update(image = image, features = features)
+                records = mask_generator.generate(image)
+                records.sort(key = lambda record: record["area"], reverse = True)
+                rles = [record["segmentation"] for record in records]
+                result["masks"] = len(rles)
+                if pool is not None:
+                    writes.append((result, pool.submit(write_svg, rles, result["svg"], image.shape[:2], precision)))
+                else:
+                    write_svg(rles, result["svg"], image.shape[:2], precision)
+                    result["status"] = "ok"
+            except Exception as e:
+                result["status"] = f"error: {e}"
+                logger.warning(f"Failed to segment {result['image']}: {e}")
+            finally:
+                pending.clear()
+
+    reader = threading.Thread(target = read_images, name = "image-prefetch", daemon = True)
+    decoder = threading.Thread(target = decode_masks, name = "mask-decoder", daemon = True)
+    reader.start()
+    decoder.start()
+    try:
+        finished = False
+        while not finished:
+            batch = []
+            while len(batch) < batch_size:
+                item = decoded.get()
+                if item is stop:
+                    finished = True
+                    break
+                result, image = item
+                if image is None:
+                    result["status"] = "error: unreadable image"
+                    logger.warning(f"Skipping {result['image']}, not a readable image.")
+                    continue
+                key = cache.key(image, model_type, digest) if cache else None
+                features = cache.get(key) if cache else None
+                if features is not None:
+                    encoded.put((result, image, features))
+                    continue
+                batch.append((result, image, key))
+            if not batch:
+                continue
+            try:
+                features = encode_batch(mask_generator.predictor, [image for _, image, _ in batch])
+            except Exception as e:
+                for result, _, _ in batch:
+                    result["status"] = f"error: {e}"
+                logger.warning(f"Image encoder failed on a batch of {len(batch)} images: {e}")
+                continue
+            for i, (result, image, key) in enumerate(batch):
+                if cache:
+                    cache.put(key, features[i:i + 1].cpu().numpy())
+                encoded.put((result, image, features[i:i + 1]))
+            del features
+        encoded.put(stop)
+        decoder.join()
+        for result, future in writes:
+            try:
+                future.result()
+                result["status"] = "ok"
+            except Exception as e:
+                result["status"] = f"error: {e}"
+                logger.warning(f"Failed to write {result['svg']}: {e}")
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    for result in results:
+        if result["status"] == "ok":
+            logger.info(f"{result['image']} -> {result['svg']} ({result['masks']} masks)")
+    failed = sum(result["status"].startswith("error") for result in results)
+    logger.info(f"Segmented {len(jobs) - failed} images, {len(results) - len(jobs)} skipped, {failed} failed.")
+    return results
@@ -0,0 +1,58 @@
+# Importing Required Packages
+import sys
+import time
+from xml.dom import minidom
+import numpy as np
+from svgpathtools import parse_path
+from pathsampler import sample_path
+
+# The per-point loop the converters used before pathsampler
+def loop_sample(path_data, samples_per_segment = 25):
+    path_obj = parse_path(path_data)
+    pts = []
+    for seg in path_obj:
+        for t in np.linspace(0, 1, samples_per_segment):
+            point = seg.point(t)
+            pts.append([point.real, point.imag])
+    return np.array(pts, dtype = np.float64)
+
+# Helper to time a sampling function over all path strings
+def time_sampler(func, path_strings, repeats):
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for d in path_strings:
+            func(d)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+# Run the benchmark over every path of an SVG file
+def run_benchmark(svg_path, repeats = 3):
+    doc = minidom.parse(svg_path)
+    path_strings = [p.getAttribute("d") for p in doc.getElementsByTagName("path") if p.getAttribute("d")]
+    doc.unlink()
+    n_segments = sum(len(parse_path(d)) for d in path_strings)
+    print(f"{svg_path}: {len(path_strings)} paths, {n_segments} segments")
+
+    # Both samplers must produce exactly the same integer polygon
+    for d in path_strings:
+        old = loop_sample(d).astype(np.int32)
+        new = sample_path(d).astype(np.int32)
+        if old.shape != new.shape:
+            print(f"Warning: sampled point counts differ ({len(new)} vs {len(old)})")
+        elif not np.array_equal(old, new):
+            print(f"Warning: sampled points differ ({int(np.count_nonzero((old != new).any(axis = 1)))} points)")
+
+    loop_time = time_sampler(loop_sample, path_strings, repeats)
+    fixed_time = time_sampler(sample_path, path_strings, repeats)
+    adaptive_time = time_sampler(lambda d: sample_path(d, tolerance = 0.25), path_strings, repeats)
+    adaptive_points = sum(len(sample_path(d, tolerance = 0.25)) for d in path_strings)
+
+    print(f"seg.point loop        : {loop_time * 1000:8.2f} ms")
+    print(f"sample_path (25/seg)  : {fixed_time * 1000:8.2f} ms  ({loop_time / fixed_time:.1f}x)")
+    print(f"sample_path (tol 0.25): {adaptive_time * 1000:8.2f} ms  ({loop_time / adaptive_time:.1f}x, "
+          f"{adaptive_points} points vs {n_segments * 25})")
+
+if __name__ == "__main__":
+    svg_file = sys.argv[1] if len(sys.argv) > 1 else "image_1720596516947-01.svg"
+    run_benchmark(svg_file)
@@ -0,0 +1,312 @@
+# Importing Required Packages
+import os
+import io
+import sys
+import json
+import time
+import base64
+import argparse
+import datetime
+import platform
+import tempfile
+import tracemalloc
+import subprocess
+import contextlib
+import numpy as np
+import cv2
+from PIL import Image
+from svgstream import SvgStreamReader
+from cocoshard import dumps_compact
+from svgtoroboflow import svg_to_image_and_json, svg_to_record
+from excelpathtorbfsam import process_paths_to_json
+import instrument
+
+# Stages reported for the SVG converter, in pipeline order
+STAGES = ("parse", "decode", "sample", "simplify", "rasterize", "rle", "serialize", "serialize_compact", "image_save")
+
+# Default category groups of the synthetic facades
+DEFAULT_CATEGORIES = ("wall", "roof", "window", "door", "pillar", "border", "projection", "base")
+
+# Helper to draw a random closed path around a centre, mixing lines with cubic, quadratic and arc segments
+def random_path_data(rng, width, height, n_segments, curve_mix):
+    cx, cy = rng.uniform(0.1, 0.9) * width, rng.uniform(0.1, 0.9) * height
+    radius = rng.uniform(0.02, 0.2) * min(width, height)
+    angles = np.sort(rng.uniform(0, 2 * np.pi, n_segments))
+    radii = radius * rng.uniform(0.6, 1.0, n_segments)
+    pts = np.stack([cx + radii * np.cos(angles), cy + radii * np.sin(angles)], axis = 1)
+
+    parts = [f"M{pts[0, 0]:.2f},{pts[0, 1]:.2f}"]
+    for i in range(1, n_segments + 1):
+        x, y = pts[i % n_segments]
+        if rng.random() >= curve_mix:
+            parts.append(f"L{x:.2f},{y:.2f}")
+            continue
+        kind = rng.integers(3)
+        px, py = pts[i - 1]
+        jitter = rng.normal(0, radius * 0.2, 4)
+        if kind == 0:
+            parts.append(f"C{px + jitter[0]:.2f},{py + jitter[1]:.2f} {x + jitter[2]:.2f},{y + jitter[3]:.2f} "
+                         f"{x:.2f},{y:.2f}")
+        elif kind == 1:
+            parts.append(f"Q{(px + x) / 2 + jitter[0]:.2f},{(py + y) / 2 + jitter[1]:.2f} {x:.2f},{y:.2f}")
+        else:
+            r = max(np.hypot(x - px, y - py), 1.0)
+            parts.append(f"A{r:.2f},{r:.2f} 0 0 1 {x:.2f},{y:.2f}")
+    parts.append("Z")
+    return " ".join(parts)
+
+# Helper to make a JPEG that compresses like a photo rather than a flat colour
+def random_raster(rng, width, height, quality = 85):
+    small = rng.integers(0, 256, (max(height // 16, 1), max(width // 16, 1), 3), dtype = np.uint8)
+    image = cv2.resize(small, (width, height), interpolation = cv2.INTER_CUBIC)
+    noise = rng.integers(0, 24, (height, width, 3), dtype = np.uint8)
+    buffer = io.BytesIO()
+    Image.fromarray(cv2.add(image, noise)).save(buffer, "JPEG", quality = quality)
+    return buffer.getvalue()
+
+# Function to write a synthetic SVG laid out like the Illustrator exports of the dataset
+def make_facade_svg(svg_path, categories = DEFAULT_CATEGORIES, paths_per_category = 10, segments_per_path = 12,
+                    curve_mix = 0.3, raster_size = (1080, 810), seed = 0):
+    """
+    Write an SVG with a ``Layer_1`` group holding a base64 JPEG and one group
+    per category holding ``paths_per_category`` random closed paths.
+
+    Args:
+        svg_path (str): Where to write the SVG.
+        categories (iterable[str]): Ids of the category groups.
+        paths_per_category (int): Paths in every category group.
+        segments_per_path (int): Segments of every path.
+        curve_mix (float): Fraction of segments that are curves (cubic, quadratic or arc) instead of lines.
+        raster_size (tuple): (width, height) of the embedded image and the viewBox.
+        seed (int): Seed of the random generator.
+    """
+    rng = np.random.default_rng(seed)
+    width, height = raster_size
+    payload = base64.encodebytes(random_raster(rng, width, height)).decode("ascii")
+
+    lines = [
+        '<?xml version="1.0" encoding="utf-8"?>',
+        '<!-- Generator: bench_pipeline synthetic facade -->',
+        '<svg version="1.1" xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink" x="0px" y="0px"',
+        f'\t viewBox="0 0 {width} {height}" style="enable-background:new 0 0 {width} {height};" xml:space="preserve">',
+        '<style type="text/css">',
+        '\t.st0{fill:#FF6700;}',
+        '</style>',
+        '<g id="Layer_1">',
+        f'\t<image style="overflow:visible;" width="{width}" height="{height}" xlink:href="data:image/jpeg;base64,{payload}">',
+        '\t</image>',
+        '</g>',
+    ]
+    for category in categories:
+        lines.append(f'<g id="{category}" style="display:none">')
+        for _ in range(paths_per_category):
+            lines.append(f'\t<path class="st0" d="{random_path_data(rng, width, height, segments_per_path, curve_mix)}"/>')
+        lines.append('</g>')
+    lines.append('</svg>')
+
+    with open(svg_path, "w", encoding = "utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+    return svg_path
+
+# Function to write a folder of synthetic SVGs
+def generate_corpus(output_dir, n_files = 20, seed = 0, **kwargs):
+    os.makedirs(output_dir, exist_ok = True)
+    return [make_facade_svg(os.path.join(output_dir, f"synthetic_{i:04d}.svg"), seed = seed + i, **kwargs)
+            for i in range(n_files)]
+
+# Function to time every stage of the SVG conversion separately
+def profile_stages(svg_paths):
+    """
+    Convert the files with the real ``svgtoroboflow.svg_to_record`` while
+    instrumentation is on and return the total seconds per stage, read from
+    its spans, plus the number of paths converted.
+
+    "sample" includes parsing the path data, "decode" is the base64/JPEG
+    decoding and "parse" is the rest of the conversion outside the spans:
+    the streaming XML pass and the resize to 1024x1024. "serialize" and
+    "serialize_compact" time the indented JSON of the per-image files and the
+    compact JSON of the dataset shards.
+    """
+    was_enabled = instrument.is_enabled()
+    previous = instrument.drain() if was_enabled else None
+    instrument.enable()
+    n_paths = 0
+    try:
+        with tempfile.TemporaryDirectory() as output_dir:
+            for svg_path in svg_paths:
+                with instrument.span("convert"):
+                    _, record = svg_to_record(svg_path, output_dir)
+                with instrument.span("serialize"):
+                    json.dumps(record, indent = 4)
+                with instrument.span("serialize_compact"):
+                    dumps_compact(record)
+                n_paths += len(record["annotations"])
+        seconds = {}
+        for entry in instrument.drain()["stages"]:
+            seconds[entry["stage"]] = seconds.get(entry["stage"], 0.0) + entry["sum"]
+    finally:
+        instrument.enable(was_enabled)
+        instrument.merge(previous)
+
+    totals = {stage: seconds.get(stage, 0.0) for stage in STAGES}
+    totals["parse"] = max(seconds.get("convert", 0.0) - seconds.get("path", 0.0) - seconds.get("decode", 0.0)
+                          - seconds.get("image_save", 0.0), 0.0)
+    return totals, n_paths
+
+# Helper to run a function with its prints discarded, returning (result, seconds, peak traced MB or None)
+def _measure(func, *args, trace_memory = False, **kwargs):
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        if trace_memory:
+            tracemalloc.start()
+        start = time.perf_counter()
+        try:
+            result = func(*args, **kwargs)
+        finally:
+            seconds = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1] / 2 ** 20 if trace_memory else None
+            if trace_memory:
+                tracemalloc.stop()
+    return result, seconds, peak
+
+# Function to time a whole converter over the corpus (best of repeats, memory traced in one extra run)
+def time_converter(func, items, output_dir, repeats = 3):
+    best = float("inf")
+    for _ in range(repeats):
+        _, seconds, _ = _measure(lambda: [func(item, output_dir) for item in items])
+        best = min(best, seconds)
+    _, _, peak = _measure(lambda: [func(item, output_dir) for item in items], trace_memory = True)
+    return {"files": len(items), "seconds": round(best, 4), "files_per_sec": round(len(items) / best, 2),
+            "peak_traced_mb": round(peak, 2)}
+
+# Helper to turn the synthetic SVGs into the {category: path data} rows of the Excel input
+def paths_dicts_from_svgs(svg_paths):
+    rows = []
+    for svg_path in svg_paths:
+        row = {}
+        for gid, d in SvgStreamReader(svg_path, raster_layer = ""):
+            if gid != "layer_1":
+                row[gid] = f"{row[gid]} {d}" if gid in row else d
+        rows.append(row)
+    return rows
+
+# Helper to build blob masks like SAM outputs for the masks_to_svg benchmark
+def random_masks(count, height, width, seed = 0):
+    rng = np.random.default_rng(seed)
+    masks = np.zeros((count, height, width), dtype = bool)
+    for mask in masks:
+        canvas = np.zeros((height, width), dtype = np.uint8)
+        for _ in range(int(rng.integers(1, 4))):
+            center = (int(rng.uniform(0, width)), int(rng.uniform(0, height)))
+            axes = (int(rng.uniform(5, width / 4)), int(rng.uniform(5, height / 4)))
+            cv2.ellipse(canvas, center, axes, float(rng.uniform(0, 180)), 0, 360, 1, -1)
+        mask[:] = canvas.astype(bool)
+    return masks
+
+# Function to time masks_to_svg; imgsvg pulls in the SAM stack, so it is skipped when that is missing
+def time_masks_to_svg(output_dir, count = 50, size = (1080, 810), repeats = 3):
+    try:
+        import imgsvg
+    except ImportError as e:
+        return {"skipped": f"imgsvg could not be imported: {e}"}
+    width, height = size
+    masks = random_masks(count, height, width)
+    output_filepath = os.path.join(output_dir, "bench_masks.svg")
+    best = min(_measure(imgsvg.masks_to_svg, masks, output_filepath)[1] for _ in range(repeats))
+    _, _, peak = _measure(imgsvg.masks_to_svg, masks, output_filepath, trace_memory = True)
+    return {"masks": count, "seconds": round(best, 4), "masks_per_sec": round(count / best, 2),
+            "peak_traced_mb": round(peak, 2), "svg_bytes": os.path.getsize(output_filepath)}
+
+# Helper to read the current commit so results of two versions can be told apart
+def _git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output = True, text = True,
+                              cwd = os.path.dirname(os.path.abspath(__file__)), check = True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+# Function to run the whole suite and write the JSON results
+def run_benchmark(work_dir, n_files = 20, paths_per_category = 10, segments_per_path = 12, curve_mix = 0.3,
+                  n_categories = len(DEFAULT_CATEGORIES), raster_size = (1080, 810), seed = 0, repeats = 3,
+                  mask_count = 50, results_path = "bench_results.json"):
+    config = {"files": n_files, "categories": n_categories, "paths_per_category": paths_per_category,
+              "segments_per_path": segments_per_path, "curve_mix": curve_mix, "raster_size": list(raster_size),
+              "seed": seed, "repeats": repeats, "mask_count": mask_count}
+    categories = [DEFAULT_CATEGORIES[i % len(DEFAULT_CATEGORIES)] + (f"_{i}" if i >= len(DEFAULT_CATEGORIES) else "")
+                  for i in range(n_categories)]
+    print(f"Generating {n_files} synthetic SVGs in {work_dir} ...")
+    svg_paths = generate_corpus(os.path.join(work_dir, "svgs"), n_files, seed, categories = categories,
+                                paths_per_category = paths_per_category, segments_per_path = segments_per_path,
+                                curve_mix = curve_mix, raster_size = raster_size)
+
+    # Per-stage timings (best total of the repeats for every stage)
+    stage_runs = [profile_stages(svg_paths) for _ in range(repeats)]
+    n_paths = stage_runs[0][1]
+    stages = {stage: min(run[0][stage] for run in stage_runs) for stage in STAGES}
+    total = sum(stages.values())
+
+    output_dir = os.path.join(work_dir, "outputs")
+    os.makedirs(output_dir, exist_ok = True)
+    paths_rows = paths_dicts_from_svgs(svg_paths)
+    row_items = list(enumerate(paths_rows))
+    results = {
+        "revision": _git_revision(),
+        "date": datetime.datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": config,
+        "paths": n_paths,
+        "stages": {stage: {"seconds": round(seconds, 6), "ms_per_file": round(1000 * seconds / n_files, 3),
+                           "share": round(seconds / total, 3) if total else 0.0}
+                   for stage, seconds in stages.items()},
+        "svg_to_image_and_json": time_converter(svg_to_image_and_json, svg_paths, output_dir, repeats),
+        "process_paths_to_json": time_converter(
+            lambda item, out: process_paths_to_json(item[1], os.path.join(out, f"Image_{item[0] + 1}.json")),
+            row_items, output_dir, repeats),
+        "masks_to_svg": time_masks_to_svg(output_dir, mask_count, raster_size, repeats),
+    }
+    try:
+        import resource
+        # ru_maxrss is in kilobytes on Linux and bytes on macOS
+        divisor = 2 ** 20 if sys.platform == "darwin" else 2 ** 10
+        results["max_rss_mb"] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / divisor, 1)
+    except ImportError:
+        results["max_rss_mb"] = None
+
+    with open(results_path, "w") as f:
+        json.dump(results, f, indent = 4)
+
+    print(f"{n_files} files, {n_paths} paths")
+    for stage, entry in results["stages"].items():
+        print(f"{stage:18s}: {entry['seconds'] * 1000:9.2f} ms  ({entry['share'] * 100:5.1f}%)")
+    for name in ("svg_to_image_and_json", "process_paths_to_json"):
+        entry = results[name]
+        print(f"{name:22s}: {entry['files_per_sec']:8.2f} files/s, peak {entry['peak_traced_mb']:.1f} MB traced")
+    masks = results["masks_to_svg"]
+    if "skipped" in masks:
+        print(f"masks_to_svg          : skipped ({masks['skipped']})")
+    else:
+        print(f"masks_to_svg          : {masks['masks_per_sec']:8.2f} masks/s, peak {masks['peak_traced_mb']:.1f} MB traced")
+    print(f"Results saved to {results_path}")
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Benchmark the SVG/Excel converters on synthetic facade SVGs.")
+    parser.add_argument("--files", type = int, default = 20, help = "Number of synthetic SVGs.")
+    parser.add_argument("--categories", type = int, default = len(DEFAULT_CATEGORIES), help = "Category groups per SVG.")
+    parser.add_argument("--paths-per-category", type = int, default = 10)
+    parser.add_argument("--segments-per-path", type = int, default = 12)
+    parser.add_argument("--curve-mix", type = float, default = 0.3, help = "Fraction of curved segments (0-1).")
+    parser.add_argument("--raster-size", default = "1080x810", help = "WIDTHxHEIGHT of the embedded image.")
+    parser.add_argument("--masks", type = int, default = 50, help = "Masks for the masks_to_svg benchmark.")
+    parser.add_argument("--repeats", type = int, default = 3)
+    parser.add_argument("--seed", type = int, default = 0)
+    parser.add_argument("--work-dir", default = None, help = "Where to put the SVGs and outputs (default: a temp dir).")
+    parser.add_argument("--output", default = "bench_results.json", help = "JSON results file.")
+    args = parser.parse_args()
+
+    raster_size = tuple(int(v) for v in args.raster_size.lower().split("x"))
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        run_benchmark(args.work_dir or tmp_dir, n_files = args.files, paths_per_category = args.paths_per_category,
+                      segments_per_path = args.segments_per_path, curve_mix = args.curve_mix,
+                      n_categories = args.categories, raster_size = raster_size, seed = args.seed,
+                      repeats = args.repeats, mask_count = args.masks, results_path = args.output)
@@ -0,0 +1,48 @@
+# Importing Required Packages
+import sys
+import time
+import numpy as np
+import cv2
+import pycocotools.mask as maskUtils
+from rleencoder import polygon_to_rle, MaskScratch
+
+# The full-frame encode the converters used before rleencoder
+def dense_encode(pts, height, width):
+    mask = np.zeros((height, width), dtype = np.uint8)
+    cv2.fillPoly(mask, [pts], 1)
+    return maskUtils.encode(np.asfortranarray(mask.astype(np.uint8)))
+
+# Helper to build random polygons, including ones that leave the frame
+def random_polygons(count, height, width, seed = 0):
+    rng = np.random.default_rng(seed)
+    polygons = []
+    for i in range(count):
+        center = rng.uniform(-0.2, 1.2, 2) * (width, height)
+        spread = rng.uniform(1, max(0.5 * min(height, width), 1))
+        pts = center + rng.normal(0, spread, (int(rng.integers(3, 40)), 2))
+        if i % 5 == 0:
+            pts = np.clip(pts, 0, (width - 1, height - 1))
+        polygons.append(pts.astype(np.int32).reshape(-1, 1, 2))
+    return polygons
+
+# Helper to time an encoder over all polygons
+def time_encoder(func, polygons):
+    start = time.perf_counter()
+    for pts in polygons:
+        func(pts)
+    return time.perf_counter() - start
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    height, width = 1024, 1024
+    polygons = random_polygons(count, height, width)
+
+    # Byte identity with the dense encode is checked by tests/test_rleencoder.py
+    scratch = MaskScratch(height, width)
+    dense_time = time_encoder(lambda pts: dense_encode(pts, height, width), polygons)
+    direct_time = time_encoder(lambda pts: polygon_to_rle(pts, height, width), polygons)
+    scratch_time = time_encoder(lambda pts: (scratch.fill(pts), scratch.encode()), polygons)
+
+    print(f"full-frame mask + encode: {dense_time * 1000:8.2f} ms")
+    print(f"polygon_to_rle          : {direct_time * 1000:8.2f} ms  ({dense_time / direct_time:.1f}x)")
+    print(f"MaskScratch             : {scratch_time * 1000:8.2f} ms  ({dense_time / scratch_time:.1f}x)")
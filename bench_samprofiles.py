@@ -0,0 +1,150 @@
+# Importing Required Packages
+import os
+import json
+import time
+import argparse
+import datetime
+import platform
+import tempfile
+import numpy as np
+import cv2
+import imgsvg
+import samprofile
+from embeddingcache import EmbeddingCache, install_embedding_cache
+from bench_pipeline import _git_revision
+
+# Helper to paint a facade-like test image: wall, roof band, a grid of windows, a door and some texture
+def make_facade_image(rng, width = 1024, height = 1024):
+    wall = rng.integers(120, 230, 3)
+    image = np.empty((height, width, 3), dtype = np.uint8)
+    image[:] = wall
+    roof = int(height * rng.uniform(0.08, 0.2))
+    image[:roof] = rng.integers(30, 110, 3)
+    rows, cols = int(rng.integers(2, 5)), int(rng.integers(3, 7))
+    cell_w, cell_h = width / cols, (height - roof) / (rows + 1)
+    frame = tuple(int(c) for c in rng.integers(0, 255, 3))
+    glass = tuple(int(c) for c in rng.integers(20, 90, 3))
+    for r in range(rows):
+        for c in range(cols):
+            x0, y0 = int(c * cell_w + 0.25 * cell_w), int(roof + r * cell_h + 0.2 * cell_h)
+            x1, y1 = int(x0 + 0.5 * cell_w), int(y0 + 0.6 * cell_h)
+            cv2.rectangle(image, (x0 - 6, y0 - 6), (x1 + 6, y1 + 6), frame, -1)
+            cv2.rectangle(image, (x0, y0), (x1, y1), glass, -1)
+    door_x = int(rng.uniform(0.1, 0.8) * width)
+    cv2.rectangle(image, (door_x, int(height - 0.8 * cell_h)), (door_x + int(0.12 * width), height - 1),
+                  tuple(int(c) for c in rng.integers(40, 140, 3)), -1)
+    noise = rng.normal(0, 6, image.shape)
+    return np.clip(image + noise, 0, 255).astype(np.uint8)
+
+# Function to time mask generation and vectorization of every profile on the same images
+def run_profiles(images, profiles, sam, model_type, checkpoint_path, work_dir, repeats = 1):
+    """
+    Run every profile on every image and collect masks/sec and SVG size.
+
+    All profiles share an embedding cache that is filled first, so the
+    image encoder (identical for every profile) is timed once on its own and
+    the profile timings cover prompt decoding, filtering, RLE and masks_to_svg.
+    """
+    cache = EmbeddingCache(os.path.join(work_dir, "embeddings"))
+    warm = samprofile.build_mask_generator(sam, {"points_per_side": 1})
+    install_embedding_cache(warm, cache, model_type, checkpoint_path)
+    start = time.perf_counter()
+    for image in images:
+        warm.predictor.set_image(image)
+    encode_seconds = time.perf_counter() - start
+
+    results = {"encode_seconds_per_image": round(encode_seconds / len(images), 4), "profiles": {}}
+    for name in profiles:
+        mask_generator = samprofile.build_mask_generator(sam, name)
+        install_embedding_cache(mask_generator, cache, model_type, checkpoint_path)
+        generate_seconds = svg_seconds = float("inf")
+        for _ in range(repeats):
+            masks = svg_bytes = 0
+            generate_total = svg_total = 0.0
+            for i, image in enumerate(images):
+                start = time.perf_counter()
+                sam_result, image_masks = imgsvg.generate_masks(cv2.cvtColor(image, cv2.COLOR_RGB2BGR), mask_generator)
+                generate_total += time.perf_counter() - start
+                output_filepath = os.path.join(work_dir, f"{name}_{i}.svg")
+                start = time.perf_counter()
+                imgsvg.masks_to_svg(image_masks, output_filepath)
+                svg_total += time.perf_counter() - start
+                masks += len(image_masks)
+                svg_bytes += os.path.getsize(output_filepath)
+            generate_seconds = min(generate_seconds, generate_total)
+            svg_seconds = min(svg_seconds, svg_total)
+        seconds = generate_seconds + svg_seconds
+        results["profiles"][name] = {
+            "settings": samprofile.resolve_profile(name),
+            "masks": masks, "masks_per_image": round(masks / len(images), 2),
+            "generate_seconds": round(generate_seconds, 4), "svg_seconds": round(svg_seconds, 4),
+            "images_per_sec": round(len(images) / seconds, 3), "masks_per_sec": round(masks / seconds, 2),
+            "svg_bytes": svg_bytes, "pruned": getattr(mask_generator, "pruned", 0) // repeats,
+        }
+
+    # Speed and size of every profile relative to SAM's defaults
+    baseline = results["profiles"].get("default")
+    if baseline:
+        base_seconds = baseline["generate_seconds"] + baseline["svg_seconds"]
+        for entry in results["profiles"].values():
+            entry["speedup_vs_default"] = round(base_seconds / (entry["generate_seconds"] + entry["svg_seconds"]), 2)
+            entry["svg_size_vs_default"] = round(entry["svg_bytes"] / baseline["svg_bytes"], 3) \
+                if baseline["svg_bytes"] else None
+    return results
+
+# Function to run the benchmark on the given images (or synthetic facades) and write the JSON results
+def run_benchmark(image_paths = (), n_images = 2, profiles = ("default", "facade"), model_type = imgsvg.model_type,
+                  checkpoint_path = imgsvg.checkpoint_path, device = None, image_size = 1024, seed = 0,
+                  repeats = 1, work_dir = None, results_path = "bench_samprofiles.json"):
+    if image_paths:
+        images = [cv2.cvtColor(cv2.imread(path), cv2.COLOR_BGR2RGB) for path in image_paths]
+    else:
+        rng = np.random.default_rng(seed)
+        images = [make_facade_image(rng, image_size, image_size) for _ in range(n_images)]
+    print(f"Loading SAM '{model_type}' ...")
+    sam = imgsvg.load_sam_model(model_type, checkpoint_path, device)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        work_dir = work_dir or tmp_dir
+        os.makedirs(work_dir, exist_ok = True)
+        results = run_profiles(images, profiles, sam, model_type, checkpoint_path, work_dir, repeats)
+    results = dict({
+        "revision": _git_revision(),
+        "date": datetime.datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {"images": list(image_paths) or n_images, "image_size": image_size, "model_type": model_type,
+                   "checkpoint": checkpoint_path, "device": str(sam.device), "seed": seed, "repeats": repeats},
+    }, **results)
+
+    with open(results_path, "w") as f:
+        json.dump(results, f, indent = 4)
+
+    print(f"Image encoder: {results['encode_seconds_per_image']:.2f} s/image (shared by all profiles)")
+    for name, entry in results["profiles"].items():
+        print(f"{name:12s}: {entry['masks_per_image']:7.1f} masks/image, {entry['masks_per_sec']:8.2f} masks/s, "
+              f"{entry['images_per_sec']:6.3f} images/s, SVG {entry['svg_bytes'] / 1024:8.1f} KB"
+              + (f", x{entry['speedup_vs_default']} speed, x{entry['svg_size_vs_default']} size vs default"
+                 if "speedup_vs_default" in entry and entry["svg_size_vs_default"] is not None else ""))
+    print(f"Results saved to {results_path}")
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Compare SAM generation profiles: masks/sec and SVG size.")
+    parser.add_argument("images", nargs = "*", help = "Images to segment (default: synthetic facades).")
+    parser.add_argument("--synthetic", type = int, default = 2, help = "Number of synthetic facades without images.")
+    parser.add_argument("--image-size", type = int, default = 1024, help = "Side of the synthetic facades.")
+    parser.add_argument("--profiles", default = "default,facade", help = "Comma-separated profiles of samprofile.PROFILES.")
+    parser.add_argument("--model-type", default = imgsvg.model_type)
+    parser.add_argument("--checkpoint", default = imgsvg.checkpoint_path, help = "Pass an empty value for untrained weights.")
+    parser.add_argument("--device", default = None, help = "Torch device, e.g. cpu or cuda:0.")
+    parser.add_argument("--repeats", type = int, default = 1)
+    parser.add_argument("--seed", type = int, default = 0)
+    parser.add_argument("--work-dir", default = None, help = "Where to keep the SVGs and embeddings (default: a temp dir).")
+    parser.add_argument("--output", default = "bench_samprofiles.json", help = "JSON results file.")
+    args = parser.parse_args()
+
+    run_benchmark(args.images, n_images = args.synthetic, profiles = args.profiles.split(","),
+                  model_type = args.model_type, checkpoint_path = args.checkpoint or None, device = args.device,
+                  image_size = args.image_size, seed = args.seed, repeats = args.repeats, work_dir = args.work_dir,
+                  results_path = args.output)
@@ -0,0 +1,95 @@
+# Importing Required Packages
+import os
+import json
+import hashlib
+import tempfile
+
+# Memo of the annotation geometry of SVG paths, keyed by the hash of the path data
+class PathCache:
+    """
+    Reuse the bbox/area/RLE computed for a path on an earlier run when its
+    ``d`` string and the conversion parameters are unchanged.
+
+    ``keys`` lists the key of every path looked up successfully, in order, so
+    the caller can store which path produced which annotation.
+
+    Args:
+        previous (dict or None): Geometry by path key from the last build of the file.
+        params (str): Conversion parameters, part of every key.
+    """
+
+    def __init__(self, previous = None, params = ""):
+        self.previous = previous or {}
+        self.params = params
+        self.paths = {}
+        self.keys = []
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, d):
+        return hashlib.sha1(f"{self.params}|{d}".encode("utf-8")).hexdigest()
+
+    def geometry(self, d, compute):
+        """Return the cached geometry of ``d``, or ``compute(d)`` if it is new or edited."""
+        key = self.key(d)
+        geometry = self.paths.get(key) or self.previous.get(key)
+        if geometry is None:
+            geometry = compute(d)
+            self.misses += 1
+        else:
+            self.hits += 1
+        self.paths[key] = geometry
+        self.keys.append(key)
+        return geometry
+
+# Build-cache manifest: one JSON entry per converted file
+class BuildCache:
+    """
+    Remember, per converted file, the hash of its content and the geometry of
+    each of its paths, so a rerun skips unchanged files and re-rasterizes only
+    the edited paths of changed ones.
+
+    Entries are ``<cache_dir>/<name>.json`` files written atomically, so worker
+    processes read and write the entries of their own files without locking.
+    Entries built with different ``params`` are ignored.
+
+    Args:
+        cache_dir (str): Directory of the manifest entries.
+        params (str): Conversion parameters (sampling, simplification, image size).
+    """
+
+    def __init__(self, cache_dir, params = ""):
+        self.cache_dir = cache_dir
+        self.params = params
+        os.makedirs(cache_dir, exist_ok = True)
+
+    def file_hash(self, file_path):
+        h = hashlib.sha256(self.params.encode("utf-8"))
+        with open(file_path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                h.update(block)
+        return h.hexdigest()
+
+    def _path(self, name):
+        return os.path.join(self.cache_dir, f"{name}.json")
+
+    def get(self, name):
+        """Return the entry of ``name``, or None if missing, unreadable or built with other params."""
+        try:
+            with open(self._path(name), "r") as f:
+                entry = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+        return entry if entry.get("params") == self.params else None
+
+    def put(self, name, entry):
+        entry = dict(entry, params = self.params)
+        fd, tmp_path = tempfile.mkstemp(dir = self.cache_dir, suffix = ".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(entry, f, separators = (",", ":"))
+            os.replace(tmp_path, self._path(name))
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
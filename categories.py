@@ -0,0 +1,101 @@
+# Importing Required Packages
+import os
+import re
+import json
+import numpy as np
+
+# Name of the category table written next to per-image JSON files
+CATEGORIES_FILE = "categories.json"
+
+# Function to normalize a category name ("Front Wall", "front-wall" and "FRONT_WALL" are one category)
+def normalize_category_name(name):
+    return re.sub(r"[\s\-]+", "_", str(name).strip()).lower()
+
+# Registry of the categories of a dataset
+class CategoryRegistry:
+    """
+    Map normalized category names to integer ids, starting at 1 like COCO.
+
+    Annotations store the integer ``category_id`` and the dataset stores the
+    table once (``to_coco`` / ``save``). Registries built independently, e.g.
+    by worker processes, are combined with ``merge``, which returns the id
+    remapping to apply to the other registry's annotations.
+
+    Args:
+        names (iterable[str]): Category names to register, in id order.
+    """
+
+    def __init__(self, names = ()):
+        self.names = []
+        self.ids = {}
+        for name in names:
+            self.id_of(name)
+
+    def id_of(self, name):
+        """Return the id of ``name``, registering it if it is new."""
+        name = normalize_category_name(name)
+        category_id = self.ids.get(name)
+        if category_id is None:
+            self.names.append(name)
+            category_id = self.ids[name] = len(self.names)
+        return category_id
+
+    def get(self, name):
+        """Return the id of ``name``, or None if it is not registered."""
+        return self.ids.get(normalize_category_name(name))
+
+    def name_of(self, category_id):
+        return self.names[category_id - 1]
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return normalize_category_name(name) in self.ids
+
+    def merge(self, other):
+        """
+        Register the categories of ``other`` and return an int array where
+        ``remap[other_id]`` is the id of the same category in this registry.
+        """
+        remap = np.zeros(len(other) + 1, dtype = np.int64)
+        for other_id, name in enumerate(other.names, start = 1):
+            remap[other_id] = self.id_of(name)
+        return remap
+
+    def one_hot(self, category_ids, dtype = np.float32):
+        """Return a (N, len(self)) one-hot array of the given category ids."""
+        category_ids = np.asarray(category_ids, dtype = np.int64)
+        labels = np.zeros((len(category_ids), len(self)), dtype = dtype)
+        labels[np.arange(len(category_ids)), category_ids - 1] = 1
+        return labels
+
+    def to_coco(self):
+        return [{"id": category_id, "name": name, "supercategory": "none"}
+                for category_id, name in enumerate(self.names, start = 1)]
+
+    @classmethod
+    def from_coco(cls, categories):
+        registry = cls()
+        for category in sorted(categories, key = lambda c: c["id"]):
+            if registry.id_of(category["name"]) != category["id"]:
+                raise ValueError(f"Category ids must run from 1 without gaps, got {category['id']}")
+        return registry
+
+    def save(self, path):
+        with open(path, "w") as f:
+            json.dump(self.to_coco(), f, indent = 4)
+
+    @classmethod
+    def load(cls, path, missing_ok = False):
+        """Read a categories table written by ``save``; an empty registry if missing and ``missing_ok``."""
+        if missing_ok and not os.path.exists(path):
+            return cls()
+        with open(path, "r") as f:
+            return cls.from_coco(json.load(f))
+
+# Function to rewrite the category ids of annotations with a remapping from CategoryRegistry.merge
+def remap_category_ids(annotations, remap):
+    for annotation in annotations:
+        annotation["category_id"] = int(remap[annotation["category_id"]])
+    return annotations
@@ -0,0 +1,235 @@
+# Importing Required Packages
+# Every subcommand imports its modules when it runs, so only `segment` pays for torch and SAM
+import os
+import sys
+import logging
+import argparse
+import instrument
+
+logger = logging.getLogger(__name__)
+
+# Helper to expand files and directories into the files with one of the given extensions
+def _collect_files(paths, extensions):
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(os.path.join(path, name) for name in sorted(os.listdir(path))
+                         if name.lower().endswith(extensions))
+        else:
+            files.append(path)
+    return files
+
+# Subcommand: run SAM on images and write one SVG of mask paths per image
+def cmd_segment(args):
+    import imgsvg
+    import samprofile
+    import batchsegment
+    checkpoint_path = imgsvg.checkpoint_path if args.checkpoint is None else args.checkpoint or None
+    profile = samprofile.resolve_profile(args.profile, points_per_side = args.points_per_side,
+                                         points_per_batch = args.points_per_batch, min_area = args.min_area)
+    if not args.large:
+        batchsegment.segment_images(args.images, args.output_dir, args.model_type, checkpoint_path, args.device,
+                                    profile, batch_size = args.batch_size, memory_limit_mb = args.encoder_memory,
+                                    svg_workers = args.svg_workers, skip_existing = args.skip_existing,
+                                    precision = args.precision, cache_dir = args.embedding_cache)
+        return
+    mask_generator = imgsvg.load_mask_generator(args.model_type, checkpoint_path, args.device,
+                                                args.embedding_cache, output_mode = "coco_rle", profile = profile)
+    for image_path, name in batchsegment.iter_image_paths(args.images):
+        output_filepath = os.path.join(args.output_dir, f"mask_{name}.svg")
+        if args.skip_existing and os.path.exists(output_filepath):
+            continue
+        output_filepath = imgsvg.sam_large_image_svg_generation(
+            image_path, mask_generator, args.output_dir, memory_limit_mb = args.memory_limit,
+            max_side = args.max_side, tile_size = args.tile_size, precision = args.precision,
+            output_filepath = output_filepath)
+        logger.info(f"{image_path} -> {output_filepath}")
+
+# Subcommand: vectorize binary mask images into one SVG, without SAM
+def cmd_vectorize(args):
+    import cv2
+    import imgsvg
+    masks = []
+    for mask_path in _collect_files(args.masks, (".png", ".bmp", ".tif", ".tiff")):
+        mask = cv2.imread(mask_path, cv2.IMREAD_GRAYSCALE)
+        if mask is None:
+            logger.warning(f"Skipping '{mask_path}', not a readable image.")
+            continue
+        masks.append(mask > 127)
+    # Largest first, like the SAM masks, so small regions are drawn on top
+    masks.sort(key = lambda mask: int(mask.sum()), reverse = True)
+    imgsvg.masks_to_svg(masks, args.output, precision = args.precision, tolerance = args.tolerance)
+
+# Subcommand: convert a folder of SVGs, or the paths of an Excel file, into SAM JPG/JSON annotations
+def cmd_convert(args):
+    if args.input.lower().endswith((".xlsx", ".xlsm")):
+        from excelpathtorbfsam import convert_excel
+        convert_excel(args.input, args.output_dir, workers = args.workers, resume = args.resume,
+                      dataset = args.dataset, shard_size = args.shard_size)
+    else:
+        from svgtorbfsam_inference import run_batch
+        run_batch(args.input, args.output_dir, workers = args.workers, dataset = args.dataset,
+                  shard_size = args.shard_size, incremental = args.incremental, cache_dir = args.cache_dir)
+
+# Subcommand: build the region index sidecars of existing SVGs and JSON annotation files
+def cmd_index(args):
+    import json
+    from regionindex import RegionIndex, write_record_index, sidecar_path
+    for path in _collect_files(args.files, (".svg", ".json")):
+        if path.lower().endswith(".json"):
+            with open(path, "r") as f:
+                json_data = json.load(f)
+            if "annotations" not in json_data:
+                continue  # categories.json, manifest.json
+            index_path = write_record_index(json_data, path)
+        else:
+            index_path = RegionIndex.from_svg(path, args.height, args.width).save(sidecar_path(path))
+        logger.info(f"{path} -> {index_path}")
+
+# Subcommand: merge, intersect, subtract or split the paths of an SVG
+def cmd_edit(args):
+    from maskgeometry import edit_svg
+    regions = edit_svg(args.svg, args.operation, args.ids, line = args.line, output_path = args.output,
+                       precision = args.precision)
+    logger.info(f"{args.operation} of paths {args.ids}: {len(regions)} new regions, areas "
+                f"{[region['area'] for region in regions]} -> {args.output or args.svg}")
+
+# Subcommand: pack converter outputs into a memory-mapped mask store for fine-tuning
+def cmd_export(args):
+    from maskstore import export_mask_store
+    export_mask_store(args.inputs, args.output_dir, name = args.name, dataset = args.dataset,
+                      image_dir = args.image_dir, size = (args.size, args.size))
+
+# Subcommand: download and resize the images listed in an Excel file
+def cmd_download(args):
+    from urltojpgimage import download_images_from_excel
+    download_images_from_excel(args.excel, args.output_dir, concurrency = args.concurrency, per_host = args.per_host,
+                               retries = args.retries, resume = not args.no_resume,
+                               decode_workers = args.decode_workers)
+
+# Subcommand: resize the JPG images of a directory in place
+def cmd_resize(args):
+    from imageresizer import resize_images
+    resize_images(args.directory, size = (args.size, args.size), workers = args.workers)
+
+# Function to build the argument parser of all subcommands
+def build_parser():
+    # Options every subcommand accepts
+    common = argparse.ArgumentParser(add_help = False)
+    common.add_argument("--log-level", default = "INFO", help = "DEBUG, INFO, WARNING or ERROR.")
+    common.add_argument("--metrics", default = None,
+                        help = "Write per-stage timing histograms here (.json, or .prom for Prometheus text).")
+    common.add_argument("--metrics-memory", action = "store_true", help = "Also record peak traced memory per stage.")
+
+    parser = argparse.ArgumentParser(description = "SAM segmentation, vectorization and dataset conversion tools.")
+    subparsers = parser.add_subparsers(dest = "command", required = True)
+
+    segment = subparsers.add_parser("segment", parents = [common],
+                                    help = "Run SAM on images and write their masks as SVG paths.")
+    segment.add_argument("images", nargs = "+", help = "Image files, directories or glob patterns.")
+    segment.add_argument("--output-dir", default = "Extracted_MaskImage_SVG", help = "Directory for the SVG files.")
+    segment.add_argument("--model-type", default = "vit_h", help = "Key of sam_model_registry (vit_h, vit_l, vit_b).")
+    segment.add_argument("--checkpoint", default = None,
+                         help = "SAM checkpoint (default: imgsvg.checkpoint_path); pass an empty value for untrained weights.")
+    segment.add_argument("--device", default = None, help = "Torch device, e.g. cpu or cuda:0.")
+    segment.add_argument("--embedding-cache", default = None, help = "Directory to cache image embeddings in.")
+    segment.add_argument("--profile", default = "default",
+                         help = "Generation profile of samprofile.PROFILES: default, facade or facade_fine.")
+    segment.add_argument("--points-per-side", type = int, default = None, help = "Override the prompt grid of the profile.")
+    segment.add_argument("--points-per-batch", type = int, default = None, help = "Override the prompts run at once.")
+    segment.add_argument("--min-area", type = int, default = None, help = "Override the smallest mask area kept, in pixels.")
+    segment.add_argument("--batch-size", type = int, default = 4, help = "Images per image-encoder forward.")
+    segment.add_argument("--encoder-memory", type = int, default = None,
+                         help = "Memory budget in MB of one encoder forward on CPU (default: half the RAM).")
+    segment.add_argument("--svg-workers", type = int, default = 2, help = "Processes writing the SVG files.")
+    segment.add_argument("--skip-existing", action = "store_true", help = "Skip images whose SVG already exists.")
+    segment.add_argument("--large", action = "store_true",
+                         help = "Downscale/tile the image and keep bbox-local masks to bound memory.")
+    segment.add_argument("--memory-limit", type = int, default = 4096, help = "Memory ceiling in MB for --large.")
+    segment.add_argument("--max-side", type = int, default = None, help = "Longest image side SAM sees with --large.")
+    segment.add_argument("--tile-size", type = int, default = None, help = "Tile size in pixels with --large.")
+    segment.add_argument("--precision", type = int, default = 1, help = "Decimals per non-integer coordinate.")
+    segment.set_defaults(handler = cmd_segment)
+
+    vectorize = subparsers.add_parser("vectorize", parents = [common],
+                                      help = "Trace binary mask images into the paths of one SVG.")
+    vectorize.add_argument("masks", nargs = "+", help = "Mask images (non-zero = inside) or directories of them.")
+    vectorize.add_argument("--output", default = "masks.svg", help = "SVG file to write.")
+    vectorize.add_argument("--precision", type = int, default = 1, help = "Decimals per non-integer coordinate.")
+    vectorize.add_argument("--tolerance", type = float, default = 2.0, help = "Douglas-Peucker tolerance in pixels.")
+    vectorize.set_defaults(handler = cmd_vectorize)
+
+    convert = subparsers.add_parser("convert", parents = [common],
+                                    help = "Convert SVGs (a directory) or Excel paths (.xlsx) into SAM JSON.")
+    convert.add_argument("input", help = "Directory of SVG files, or Excel file with 'id' and 'paths' columns.")
+    convert.add_argument("--output-dir", default = "output", help = "Directory where outputs will be saved.")
+    convert.add_argument("--workers", type = int, default = 1, help = "Number of worker processes.")
+    convert.add_argument("--dataset", default = None,
+                         help = "Append to this sharded JSON Lines dataset instead of one JSON per image.")
+    convert.add_argument("--shard-size", type = int, default = None,
+                         help = "Records per dataset shard (default: the dataset's, or 1000).")
+    convert.add_argument("--incremental", action = "store_true",
+                         help = "SVG input: skip unchanged SVGs and re-rasterize only edited paths.")
+    convert.add_argument("--cache-dir", default = None, help = "SVG input: build-cache directory.")
+    convert.add_argument("--resume", action = "store_true", help = "Excel input: skip rows already converted.")
+    convert.set_defaults(handler = cmd_convert)
+
+    index = subparsers.add_parser("index", parents = [common],
+                                  help = "Write the .regions.npz hit-testing index of SVGs or JSON annotation files.")
+    index.add_argument("files", nargs = "+", help = "SVG or JSON files, or directories of them.")
+    index.add_argument("--height", type = int, default = None, help = "Image height of the SVG paths (default: its viewBox).")
+    index.add_argument("--width", type = int, default = None, help = "Image width of the SVG paths (default: its viewBox).")
+    index.set_defaults(handler = cmd_index)
+
+    edit = subparsers.add_parser("edit", parents = [common],
+                                 help = "Merge, intersect, subtract or split paths of an SVG (ids = path positions).")
+    edit.add_argument("svg", help = "SVG written by segment or vectorize.")
+    edit.add_argument("operation", choices = ("merge", "intersect", "subtract", "split"))
+    edit.add_argument("ids", type = int, nargs = "+", help = "Path positions; subtract removes the others from the first.")
+    edit.add_argument("--line", type = float, nargs = 4, default = None, metavar = ("X0", "Y0", "X1", "Y1"),
+                      help = "Split line for split.")
+    edit.add_argument("--output", default = None, help = "SVG to write (default: overwrite the input).")
+    edit.add_argument("--precision", type = int, default = 1, help = "Decimals per non-integer coordinate.")
+    edit.set_defaults(handler = cmd_edit)
+
+    export = subparsers.add_parser("export", parents = [common],
+                                   help = "Pack converter JSON/images into memory-mapped arrays for fine-tuning.")
+    export.add_argument("inputs", nargs = "+", help = "JSON files or directories (dataset directories with --dataset).")
+    export.add_argument("--output-dir", default = "mask_store", help = "Directory of the store.")
+    export.add_argument("--name", default = "masks", help = "Prefix of the store files.")
+    export.add_argument("--dataset", default = None, help = "Read this sharded JSON Lines dataset instead of JSON files.")
+    export.add_argument("--image-dir", default = None, help = "Directory of the images (default: next to the JSON).")
+    export.add_argument("--size", type = int, default = 1024, help = "Side of the stored images and masks.")
+    export.set_defaults(handler = cmd_export)
+
+    download = subparsers.add_parser("download", parents = [common],
+                                     help = "Download and resize the images listed in an Excel file.")
+    download.add_argument("--excel", default = "CompleteData.xlsx", help = "Excel file with 'imageUploaded' and 'id' columns.")
+    download.add_argument("--output-dir", default = "Outputs", help = "Directory to store the images in.")
+    download.add_argument("--concurrency", type = int, default = 16, help = "Simultaneous downloads.")
+    download.add_argument("--per-host", type = int, default = 4, help = "Simultaneous downloads per host.")
+    download.add_argument("--retries", type = int, default = 3, help = "Retries per image on network errors.")
+    download.add_argument("--decode-workers", type = int, default = None, help = "Processes that decode and resize.")
+    download.add_argument("--no-resume", action = "store_true", help = "Download again even if Image_N.jpg exists.")
+    download.set_defaults(handler = cmd_download)
+
+    resize = subparsers.add_parser("resize", parents = [common],
+                                   help = "Resize the JPG images of a directory in place.")
+    resize.add_argument("directory", nargs = "?", default = "Outputs", help = "Directory to process.")
+    resize.add_argument("--size", type = int, default = 1024, help = "Side of the square output images.")
+    resize.add_argument("--workers", type = int, default = os.cpu_count() or 1, help = "Number of worker processes.")
+    resize.set_defaults(handler = cmd_resize)
+    return parser
+
+# Entry point: python cli.py <command> [options]
+def main(argv = None):
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(level = args.log_level.upper(), format = "%(message)s")
+    if args.metrics:
+        instrument.enable(memory = args.metrics_memory)
+    args.handler(args)
+    if args.metrics:
+        instrument.export(args.metrics)
+
+if __name__ == "__main__":
+    sys.exit(main())
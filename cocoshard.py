@@ -0,0 +1,225 @@
+# Importing Required Packages
+import os
+import json
+import glob
+import numpy as np
+from categories import CategoryRegistry
+
+# orjson is optional; the standard library serializer is used without it
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Index entry of one record: byte offset and length inside the shard
+INDEX_DTYPE = np.dtype([("offset", "<u8"), ("length", "<u4")])
+
+# Records per shard of a new dataset
+DEFAULT_SHARD_SIZE = 1000
+
+# Index entries buffered before the shard is flushed and they are written
+FLUSH_RECORDS = 256
+
+# Helpers for compact (unindented) JSON as bytes
+def dumps_compact(obj):
+    if orjson is not None:
+        return orjson.dumps(obj, option = orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(obj, separators = (",", ":")).encode("utf-8")
+
+def loads_compact(data):
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+# Writer for a COCO-style dataset split over JSON Lines shards
+class DatasetWriter:
+    """
+    Append one record per image (``{"image": ..., "annotations": [...]}``,
+    the same layout as the per-image JSON files) to ``<name>-00000.jsonl``,
+    ``<name>-00001.jsonl``, ... with compact serialization. Every shard has an
+    ``.idx`` sidecar of (offset, length) pairs so records can be read back by
+    position without parsing the rest of the shard.
+
+    Records get their position in the dataset as ``image_id``. The category
+    table is kept once per dataset in ``<name>.categories.json``, written on
+    ``close``. Opening an existing dataset appends to it and extends its table,
+    unless ``overwrite`` is set, which starts the shards over (keeping the
+    category ids).
+
+    The shard size is stored in ``<name>.meta.json`` on the first write, since
+    a dataset is only readable with one shard size. Index entries are written
+    after the records they point to have been flushed, so an interrupted run
+    never leaves an index pointing past the end of its shard.
+
+    Args:
+        output_dir (str): Directory of the dataset.
+        name (str): Prefix of the shard files.
+        shard_size (int or None): Maximum number of records per shard (default: the
+            stored one, or DEFAULT_SHARD_SIZE for a new dataset).
+        categories (CategoryRegistry or None): Registry of the dataset (default: the saved table, if any).
+        overwrite (bool): Delete the existing shards first.
+
+    Raises:
+        ValueError: If ``shard_size`` differs from the one of the existing dataset.
+    """
+
+    def __init__(self, output_dir, name = "dataset", shard_size = None, categories = None, overwrite = False):
+        self.output_dir = output_dir
+        self.name = name
+        os.makedirs(output_dir, exist_ok = True)
+        if overwrite:
+            for index_path in shard_index_paths(output_dir, name):
+                os.remove(index_path)
+                os.remove(index_path[:-len(".idx")])
+            if os.path.exists(meta_path(output_dir, name)):
+                os.remove(meta_path(output_dir, name))
+        stored = stored_shard_size(output_dir, name)
+        if stored is not None and shard_size is not None and shard_size != stored:
+            raise ValueError(f"Dataset '{name}' in {output_dir} has {stored} records per shard, got "
+                             f"shard_size = {shard_size}; pass the same size or overwrite it.")
+        self.shard_size = shard_size or stored or DEFAULT_SHARD_SIZE
+        if categories is None:
+            categories = CategoryRegistry.load(categories_path(output_dir, name), missing_ok = True)
+        self.categories = categories
+
+        # Continue after the records already written
+        self.count = sum(os.path.getsize(p) // INDEX_DTYPE.itemsize for p in shard_index_paths(output_dir, name))
+        self._shard = None
+        self._index = None
+        self._pending = []
+        self._in_shard = 0
+
+    def _open_shard(self):
+        if not os.path.exists(meta_path(self.output_dir, self.name)):
+            with open(meta_path(self.output_dir, self.name), "w") as f:
+                json.dump({"shard_size": self.shard_size}, f)
+        shard_no = self.count // self.shard_size
+        path = os.path.join(self.output_dir, f"{self.name}-{shard_no:05d}.jsonl")
+        self._shard = open(path, "ab")
+        self._index = open(path + ".idx", "ab")
+        self._in_shard = self.count % self.shard_size
+
+    def append(self, record):
+        """Write one image record and return its position (image_id) in the dataset."""
+        if self._shard is None or self._in_shard >= self.shard_size:
+            self._close_shard()
+            self._open_shard()
+        record["image"]["image_id"] = self.count
+        data = dumps_compact(record) + b"\n"
+        offset = self._shard.tell()
+        self._shard.write(data)
+        self._pending.append((offset, len(data)))
+        if len(self._pending) >= FLUSH_RECORDS:
+            self.flush()
+        self._in_shard += 1
+        self.count += 1
+        return self.count - 1
+
+    def flush(self):
+        """Flush the records of the open shard, then write and flush their index entries."""
+        if self._shard is None:
+            return
+        self._shard.flush()
+        if self._pending:
+            self._index.write(np.array(self._pending, dtype = INDEX_DTYPE).tobytes())
+            self._pending = []
+        self._index.flush()
+
+    def _close_shard(self):
+        if self._shard is not None:
+            self.flush()
+            self._shard.close()
+            self._index.close()
+            self._shard = self._index = None
+
+    def close(self):
+        self._close_shard()
+        self.categories.save(categories_path(self.output_dir, self.name))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+# Random-access reader for a dataset written by DatasetWriter
+class DatasetReader:
+    """
+    Read image records by position. Only the small ``.idx`` files and the
+    category table are loaded up front; ``reader[n]`` seeks to record n and
+    parses that line only.
+    """
+
+    def __init__(self, output_dir, name = "dataset"):
+        self.shards = []
+        offsets = []
+        lengths = []
+        shard_ids = []
+        for shard_no, index_path in enumerate(shard_index_paths(output_dir, name)):
+            index = np.fromfile(index_path, dtype = INDEX_DTYPE)
+            self.shards.append(index_path[:-len(".idx")])
+            offsets.append(index["offset"])
+            lengths.append(index["length"])
+            shard_ids.append(np.full(len(index), shard_no, dtype = np.int32))
+        self.offsets = np.concatenate(offsets) if offsets else np.empty(0, np.uint64)
+        self.lengths = np.concatenate(lengths) if lengths else np.empty(0, np.uint32)
+        self.shard_ids = np.concatenate(shard_ids) if shard_ids else np.empty(0, np.int32)
+        self.categories = CategoryRegistry.load(categories_path(output_dir, name), missing_ok = True)
+        self._files = {}
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def __getitem__(self, n):
+        if n < 0:
+            n += len(self)
+        if not 0 <= n < len(self):
+            raise IndexError(f"Record {n} out of range for {len(self)} records")
+        shard_no = int(self.shard_ids[n])
+        f = self._files.get(shard_no)
+        if f is None:
+            f = self._files[shard_no] = open(self.shards[shard_no], "rb")
+        f.seek(int(self.offsets[n]))
+        return loads_compact(f.read(int(self.lengths[n])))
+
+    def __iter__(self):
+        for n in range(len(self)):
+            yield self[n]
+
+    def close(self):
+        for f in self._files.values():
+            f.close()
+        self._files = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+# Helper to list the index files of a dataset in shard order
+def shard_index_paths(output_dir, name = "dataset"):
+    return sorted(glob.glob(os.path.join(glob.escape(output_dir), f"{glob.escape(name)}-[0-9]*.jsonl.idx")))
+
+# Helper for the path of the metadata (shard size) of a dataset
+def meta_path(output_dir, name = "dataset"):
+    return os.path.join(output_dir, f"{name}.meta.json")
+
+# Function to read the shard size of an existing dataset
+def stored_shard_size(output_dir, name = "dataset"):
+    """
+    Return the records per shard of the dataset, from its metadata or, for
+    datasets written before it was stored, from the first of several shards.
+    None for a new dataset (or a single shard without metadata).
+    """
+    if os.path.exists(meta_path(output_dir, name)):
+        with open(meta_path(output_dir, name), "r") as f:
+            return json.load(f)["shard_size"]
+    index_paths = shard_index_paths(output_dir, name)
+    if len(index_paths) > 1:
+        return os.path.getsize(index_paths[0]) // INDEX_DTYPE.itemsize
+    return None
+
+# Helper for the path of the category table of a dataset
+def categories_path(output_dir, name = "dataset"):
+    return os.path.join(output_dir, f"{name}.categories.json")
@@ -0,0 +1,150 @@
+# Importing Required Packages
+import os
+import json
+import hashlib
+import tempfile
+import numpy as np
+
+# On-disk cache of SAM image embeddings
+class EmbeddingCache:
+    """
+    Store SAM image-encoder outputs as ``.npy`` files, read back memory-mapped.
+
+    Entries are keyed by the content hash of the image together with the model
+    type and the checkpoint hash, so changing the mask generator parameters
+    reuses the embedding while changing the model does not. The least recently
+    used entries are deleted once the directory grows beyond ``max_bytes``.
+
+    Args:
+        cache_dir (str): Directory holding the cached embeddings.
+        max_bytes (int): Size budget of the cache directory in bytes.
+    """
+
+    def __init__(self, cache_dir = "Embedding_Cache", max_bytes = 4 * 1024 ** 3):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(cache_dir, exist_ok = True)
+
+    def key(self, image, model_type, checkpoint_digest, image_format = "RGB"):
+        image = np.ascontiguousarray(image)
+        h = hashlib.sha256()
+        h.update(f"{model_type}|{checkpoint_digest}|{image_format}|{image.shape}|{image.dtype}|".encode())
+        h.update(image.data)
+        return h.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.npy")
+
+    def get(self, key):
+        """Return the cached embedding as a read-only memmap, or None."""
+        path = self._path(key)
+        try:
+            features = np.load(path, mmap_mode = "r")
+        except (FileNotFoundError, ValueError):
+            self.misses += 1
+            return None
+        # Touch the entry so eviction sees it as recently used
+        os.utime(path)
+        self.hits += 1
+        return features
+
+    def put(self, key, features):
+        """Store an embedding atomically and evict old entries beyond the budget."""
+        fd, tmp_path = tempfile.mkstemp(dir = self.cache_dir, suffix = ".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.save(f, np.ascontiguousarray(features))
+            os.replace(tmp_path, self._path(key))
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self.evict()
+
+    def evict(self):
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".npy"):
+                stat = os.stat(os.path.join(self.cache_dir, name))
+                entries.append((stat.st_mtime, stat.st_size, name))
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            os.remove(os.path.join(self.cache_dir, name))
+            total -= size
+
+# Function to hash a checkpoint file, remembering the result by path, size and mtime
+def checkpoint_hash(checkpoint_path, cache_dir):
+    if not checkpoint_path:
+        return "untrained"
+    stat = os.stat(checkpoint_path)
+    record_key = f"{os.path.abspath(checkpoint_path)}|{stat.st_size}|{stat.st_mtime_ns}"
+    index_path = os.path.join(cache_dir, "checkpoint_hashes.json")
+    try:
+        with open(index_path, "r") as f:
+            known = json.load(f)
+    except (FileNotFoundError, ValueError):
+        known = {}
+    if record_key not in known:
+        h = hashlib.sha256()
+        with open(checkpoint_path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 24), b""):
+                h.update(block)
+        known[record_key] = h.hexdigest()
+        with open(index_path, "w") as f:
+            json.dump(known, f, indent = 4)
+    return known[record_key]
+
+# Function to give a SamPredictor the embedding of an image without running the encoder
+def set_image_features(predictor, image, features):
+    """
+    Put a SamPredictor in the same state ``set_image(image)`` would, using
+    precomputed image-encoder features of shape (1, C, H, W): a tensor (e.g.
+    from batchsegment.encode_batch, possibly on the GPU) or a NumPy array or
+    memmap read from the cache.
+    """
+    import torch
+    predictor.reset_image()
+    h, w = image.shape[:2]
+    predictor.original_size = (h, w)
+    predictor.input_size = predictor.transform.get_preprocess_shape(h, w, predictor.transform.target_length)
+    if isinstance(features, torch.Tensor):
+        predictor.features = features.to(predictor.device)
+    else:
+        # Cache hits are read-only memmaps, which torch cannot wrap without a copy
+        predictor.features = torch.as_tensor(np.array(features), device = predictor.device)
+    predictor.is_image_set = True
+
+# Function to route a predictor's (or mask generator's) set_image through the cache
+def install_embedding_cache(predictor, cache, model_type, checkpoint_path):
+    """
+    Wrap ``predictor.set_image`` so embeddings are read from ``cache`` when the
+    same image was encoded before, and written to it otherwise.
+
+    Args:
+        predictor: A SamPredictor, or a SamAutomaticMaskGenerator (its predictor is used).
+        cache (EmbeddingCache): The cache to read and fill.
+        model_type (str): SAM model type, part of the cache key.
+        checkpoint_path (str or None): Checkpoint of the model, hashed into the cache key.
+
+    Returns:
+        predictor: The wrapped SamPredictor.
+    """
+    predictor = getattr(predictor, "predictor", predictor)
+    digest = checkpoint_hash(checkpoint_path, cache.cache_dir)
+    encode = predictor.set_image
+
+    def set_image(image, image_format = "RGB"):
+        key = cache.key(image, model_type, digest, image_format)
+        features = cache.get(key)
+        if features is None:
+            encode(image, image_format)
+            cache.put(key, predictor.features.detach().cpu().numpy())
+        else:
+            set_image_features(predictor, image, features)
+
+    predictor.set_image = set_image
+    return predictor
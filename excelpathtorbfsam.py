@@ -1,69 +1,75 @@
 # Importing Required Packages
 import os
 import json
+import logging
 import datetime
 import numpy as np
 import cv2
-from svgpathtools import parse_path
-import pycocotools.mask as maskUtils
-import pandas as pd
+from pathsampler import sample_path
+from rleencoder import polygon_to_rle
+import argparse
+import itertools
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from cocoshard import DatasetWriter, DatasetReader
+from categories import CategoryRegistry, CATEGORIES_FILE, remap_category_ids
+from regionindex import write_record_index
+import instrument
 
-def process_paths_to_json(paths_dict: dict, output_filepath: str):
+logger = logging.getLogger(__name__)
+
+def build_paths_record(paths_dict: dict, file_name: str, categories = None):
     """
-    Processes a dictionary of SVG path data strings and generates a single
-    JSON annotation file suitable for SAM fine-tuning.
+    Build the annotation record (image metadata and RLE annotations) of a
+    dictionary of SVG path data strings for the image ``file_name``.
 
     Args:
         paths_dict (dict): A dictionary where keys are category names and
                            values are the raw SVG path data strings.
-        output_filepath (str): The full path to save the output JSON file.
-    """
-    print(f"Processing paths for output file: {os.path.basename(output_filepath)}")
+        file_name (str): Name of the JPG image the annotations belong to.
+        categories (CategoryRegistry or None): Registry giving the ``category_id``
+            of each key (a new registry if None).
 
+    Returns:
+        json_data (dict): Record with "image" metadata and "annotations".
+    """
+    logger.info(f"Processing paths for image: {file_name}")
     width, height = 1024, 1024  # Standard image size for SAM
     annotations = []
     ann_id = 0
+    if categories is None:
+        categories = CategoryRegistry()
 
     # Iterate through the categories and their SVG path data strings
     for category_name, path_data in paths_dict.items():
         if not path_data:
-            print(f"Warning: Skipping category '{category_name}'. Path data is empty.")
+            logger.warning(f"Skipping category '{category_name}'. Path data is empty.")
             continue
 
         try:
-            # Directly parse the SVG path data string
-            path_obj = parse_path(path_data)
-            pts = []
-            
-            # Sample points along the SVG path
-            for seg in path_obj:
+            with instrument.span("path", category = category_name):
+                # Parse the SVG path data string once and sample points along it
                 # Use fewer points for simplification to decrease processing time
-                for t in np.linspace(0, 1, 25): 
-                    point = seg.point(t)
-                    pts.append([point.real, point.imag])
-            pts = np.array(pts, dtype=np.int32)
+                with instrument.span("sample"):
+                    pts = sample_path(path_data, samples_per_segment = 25, dtype = np.float64).astype(np.int32)
 
-            # Simplify the polygon using the Douglas-Peucker algorithm
-            epsilon = 0.005 * cv2.arcLength(pts, True)
-            simplified_pts = cv2.approxPolyDP(pts, epsilon, True)
+                with instrument.span("simplify"):
+                    # Simplify the polygon using the Douglas-Peucker algorithm
+                    epsilon = 0.005 * cv2.arcLength(pts, True)
+                    simplified_pts = cv2.approxPolyDP(pts, epsilon, True)
 
-            # create mask with the simplified points
-            mask = np.zeros((height, width), dtype=np.uint8)
-            cv2.fillPoly(mask, [simplified_pts], 1)
+                    # bounding box
+                    x, y, w, h = cv2.boundingRect(simplified_pts)
 
-            # bounding box
-            x, y, w, h = cv2.boundingRect(simplified_pts)
+                    # area
+                    area = float(cv2.contourArea(simplified_pts))
 
-            # area
-            area = float(cv2.contourArea(simplified_pts))
-
-            # segmentation (RLE)
-            rle = maskUtils.encode(np.asfortranarray(mask.astype(np.uint8)))
-            rle["counts"] = rle["counts"].decode("utf-8")
+                # segmentation (RLE) straight from the polygon, no full-frame mask
+                rle = polygon_to_rle(simplified_pts, height, width)
+                rle["counts"] = rle["counts"].decode("utf-8")
 
             annotations.append({
                 "id": ann_id,
-                "category": category_name,
+                "category_id": categories.id_of(category_name),
                 "bbox": [float(x), float(y), float(w), float(h)],
                 "area": area,
                 "segmentation": rle
@@ -71,68 +77,227 @@ def process_paths_to_json(paths_dict: dict, output_filepath: str):
             ann_id += 1
 
         except Exception as e:
-            print(f"Skipping path for category '{category_name}' due to error: {e}")
+            logger.warning(f"Skipping path for category '{category_name}' due to error: {e}")
             continue
 
-    # Save JSON file
-    json_data = {
+    return {
         "image": {
             "image_id": 0,
             "license": 1,
-            "file_name": os.path.basename(output_filepath).replace('.json', '.jpg'),
+            "file_name": file_name,
             "height": height,
             "width": width,
             "date_captured": datetime.datetime.now().isoformat(),
-            "extra": {"name": os.path.basename(output_filepath).replace('.json', '.jpg')}
+            "extra": {"name": file_name}
         },
         "annotations": annotations
     }
 
-    with open(output_filepath, "w") as f:
-        json.dump(json_data, f, indent=4)
+def process_paths_to_json(paths_dict: dict, output_filepath: str, writer = None, categories = None):
+    """
+    Processes a dictionary of SVG path data strings and generates a single
+    JSON annotation file suitable for SAM fine-tuning.
+
+    Args:
+        paths_dict (dict): A dictionary where keys are category names and
+                           values are the raw SVG path data strings.
+        output_filepath (str): The full path to save the output JSON file.
+        writer (cocoshard.DatasetWriter or None): Append the record to this
+            dataset instead of writing ``output_filepath``.
+        categories (CategoryRegistry or None): Registry for the JSON file output
+            (default: the categories.json next to it, if any). It is saved next
+            to the JSON file. Ignored with ``writer``.
+    """
+    categories_file = os.path.join(os.path.dirname(output_filepath), CATEGORIES_FILE)
+    if writer is not None:
+        categories = writer.categories
+    elif categories is None:
+        categories = CategoryRegistry.load(categories_file, missing_ok = True)
+    json_data = build_paths_record(paths_dict, os.path.basename(output_filepath).replace('.json', '.jpg'), categories)
+
+    # Save JSON file
+    with instrument.span("serialize"):
+        if writer is not None:
+            writer.append(json_data)
+        else:
+            with open(output_filepath, "w") as f:
+                json.dump(json_data, f, indent=4)
+            categories.save(categories_file)
+            write_record_index(json_data, output_filepath)
     
-    print(f"Processing finished for file: {os.path.basename(output_filepath)}")
+    logger.info(f"Processing finished for file: {os.path.basename(output_filepath)}")
 
-if __name__ == "__main__":
-    input_excel_file = 'CompleteData.xlsx'
-    output_dir = 'Outputs'
+# Function to stream the rows of the Excel file without loading it into a DataFrame
+def iter_excel_rows(excel_file: str, columns = ("id", "paths")):
+    """
+    Yield ``(index, value, ...)`` for every data row of the first sheet,
+    reading it with openpyxl in read-only mode and keeping only ``columns``.
 
+    ``index`` counts data rows from 0 like the DataFrame index did, so the
+    Image_N naming stays the same. Completely empty rows are counted but not yielded.
+    """
+    import openpyxl
+    workbook = openpyxl.load_workbook(excel_file, read_only = True, data_only = True)
     try:
-        df = pd.read_excel(input_excel_file)
-        print(f"Successfully read data from {input_excel_file}. Found {len(df)} entries.")
-    except FileNotFoundError:
-        print(f"Error: The file '{input_excel_file}' was not found.")
-        exit()
+        rows = workbook.active.iter_rows(values_only = True)
+        header = [str(value).strip() if value is not None else "" for value in next(rows, ())]
+        missing = [column for column in columns if column not in header]
+        if missing:
+            raise KeyError(f"Missing columns: {missing}")
+        positions = [header.index(column) for column in columns]
+
+        for index, row in enumerate(rows):
+            values = tuple(row[p] if p < len(row) else None for p in positions)
+            if all(value is None for value in values):
+                continue
+            yield (index,) + values
+    finally:
+        workbook.close()
+
+# Function to build the record of one Excel row (runs inside the worker processes)
+# The record, its worker-local category names and the stage timings go back to the parent, which writes them
+def convert_row(index: int, paths_str):
+    try:
+        paths_dict = json.loads(paths_str)
+        categories = CategoryRegistry()
+        json_data = build_paths_record(paths_dict, f"Image_{index + 1}.jpg", categories)
+        message = None
+    except json.JSONDecodeError:
+        json_data = categories = None
+        message = f"Skipping row {index} due to invalid JSON in 'Paths' column."
+    except KeyError as e:
+        json_data = categories = None
+        message = f"Skipping row {index}. Missing expected key in Paths dictionary: {e}"
     except Exception as e:
-        print(f"An error occurred while reading the Excel file: {e}")
-        exit()
+        json_data = categories = None
+        message = f"An unexpected error occurred while processing row {index}: {e}"
+    metrics = instrument.drain() if instrument.is_enabled() else None
+    # An empty registry is falsy (it has __len__), so test for None: rows without paths still get their file
+    return index, message, json_data, categories.names if categories is not None else None, metrics
 
-    if 'paths' not in df.columns or 'id' not in df.columns:
-        print("Error: The Excel file must contain 'paths' and 'id' columns.")
-        exit()
+# Function to convert every row of the Excel file, optionally across a process pool
+def convert_excel(input_excel_file: str, output_dir: str, workers: int = 1, resume: bool = False,
+                  max_in_flight: int = None, dataset: str = None, shard_size: int = None):
+    """
+    Stream the 'id' and 'paths' columns of the Excel file and write one
+    Image_N.json per row, named by row position whatever order workers finish in.
+
+    Workers only build the records; this process merges their category ids
+    into one registry, saved as ``categories.json``, and writes the files. With
+    ``dataset`` the records are appended to the sharded JSON Lines dataset
+    ``output_dir/<dataset>-NNNNN.jsonl`` instead (see cocoshard) in completion
+    order, each keeping its Image_N.jpg file name.
 
+    Args:
+        input_excel_file (str): Excel file with 'id' and 'paths' columns.
+        output_dir (str): Directory for the JSON files.
+        workers (int): Number of worker processes; 1 converts in this process.
+        resume (bool): Skip rows whose Image_N.json (or dataset record) already exists.
+        max_in_flight (int or None): Cap on submitted but unfinished rows (default 4 x workers).
+        dataset (str or None): Name of the sharded dataset to append to.
+        shard_size (int or None): Records per dataset shard (default: the dataset's, or 1000).
+    """
     os.makedirs(output_dir, exist_ok=True)
-    print(f"Created output directory: {output_dir}")
+    rows = iter_excel_rows(input_excel_file)
+    try:
+        first = next(rows, None)
+    except FileNotFoundError:
+        logger.error(f"The file '{input_excel_file}' was not found.")
+        return
+    except KeyError:
+        logger.error("The Excel file must contain 'paths' and 'id' columns.")
+        return
+    except Exception as e:
+        logger.error(f"An error occurred while reading the Excel file: {e}")
+        return
+    logger.info(f"Streaming rows from {input_excel_file} into {output_dir}")
 
-    for index, row in df.iterrows():
-        try:
-            paths_str = row['paths']
-            paths_dict = json.loads(paths_str)
-            name = row['id']
-            
-            output_filename = f"Image_{index + 1}.json"
-            output_filepath = os.path.join(output_dir, output_filename)
-            
-            process_paths_to_json(paths_dict, output_filepath)
-        
-        except json.JSONDecodeError:
-            print(f"Warning: Skipping row {index} due to invalid JSON in 'Paths' column.")
-            continue
-        except KeyError as e:
-            print(f"Warning: Skipping row {index}. Missing expected key in Paths dictionary: {e}")
-            continue
-        except Exception as e:
-            print(f"An unexpected error occurred while processing row {index}: {e}")
-            continue
+    # Images already in the dataset, for resuming
+    writer = None
+    done_images = set()
+    if dataset:
+        writer = DatasetWriter(output_dir, dataset, shard_size)
+        categories = writer.categories
+        if resume:
+            with DatasetReader(output_dir, dataset) as reader:
+                done_images = {record["image"]["file_name"] for record in reader}
+    else:
+        categories = CategoryRegistry.load(os.path.join(output_dir, CATEGORIES_FILE), missing_ok = True)
+
+    def pending_rows():
+        for index, name, paths_str in itertools.chain([first] if first else [], rows):
+            if resume and (f"Image_{index + 1}.jpg" in done_images or
+                           not dataset and os.path.exists(os.path.join(output_dir, f"Image_{index + 1}.json"))):
+                continue
+            yield index, paths_str
+
+    converted = failed = 0
+
+    def record(result):
+        nonlocal converted, failed
+        index, message, json_data, category_names, metrics = result
+        instrument.merge(metrics)
+        if message:
+            logger.warning(message)
+            failed += 1
+            return
+        remap_category_ids(json_data["annotations"], categories.merge(CategoryRegistry(category_names)))
+        with instrument.span("serialize"):
+            if writer is not None:
+                writer.append(json_data)
+            else:
+                output_filepath = os.path.join(output_dir, f"Image_{index + 1}.json")
+                with open(output_filepath, "w") as f:
+                    json.dump(json_data, f, indent=4)
+                write_record_index(json_data, output_filepath)
+        logger.info(f"Processing finished for file: Image_{index + 1}.json")
+        converted += 1
+
+    try:
+        if workers <= 1:
+            for index, paths_str in pending_rows():
+                record(convert_row(index, paths_str))
+        else:
+            max_in_flight = max_in_flight or 4 * workers
+            in_flight = set()
+            with ProcessPoolExecutor(max_workers = workers) as pool:
+                for index, paths_str in pending_rows():
+                    in_flight.add(pool.submit(convert_row, index, paths_str))
+                    # Keep only a bounded number of rows in memory
+                    if len(in_flight) >= max_in_flight:
+                        done, in_flight = wait(in_flight, return_when = FIRST_COMPLETED)
+                        for future in done:
+                            record(future.result())
+                for future in in_flight:
+                    record(future.result())
+    finally:
+        if writer is not None:
+            writer.close()
+        else:
+            categories.save(os.path.join(output_dir, CATEGORIES_FILE))
+
+    logger.info(f"All processing complete. Converted {converted} rows, {failed} skipped.")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Convert the SVG paths of an Excel file into SAM JSON annotations.")
+    parser.add_argument("--excel", default = "CompleteData.xlsx", help = "Excel file with 'id' and 'paths' columns.")
+    parser.add_argument("--output-dir", default = "Outputs", help = "Directory for the JSON files.")
+    parser.add_argument("--workers", type = int, default = 1, help = "Number of worker processes.")
+    parser.add_argument("--resume", action = "store_true", help = "Skip rows already converted (Image_N.json or dataset record).")
+    parser.add_argument("--dataset", default = None,
+                        help = "Append to this sharded JSON Lines dataset instead of one JSON per row.")
+    parser.add_argument("--shard-size", type = int, default = None,
+                        help = "Records per dataset shard (default: the dataset's, or 1000).")
+    parser.add_argument("--log-level", default = "INFO", help = "DEBUG, INFO, WARNING or ERROR.")
+    parser.add_argument("--metrics", default = None,
+                        help = "Write per-stage timing histograms here (.json, or .prom for Prometheus text).")
+    parser.add_argument("--metrics-memory", action = "store_true", help = "Also record peak traced memory per stage.")
+    args = parser.parse_args()
 
-    print("\nAll processing complete.")
\ No newline at end of file
+    logging.basicConfig(level = args.log_level.upper(), format = "%(message)s")
+    if args.metrics:
+        instrument.enable(memory = args.metrics_memory)
+    convert_excel(args.excel, args.output_dir, workers = args.workers, resume = args.resume,
+                  dataset = args.dataset, shard_size = args.shard_size)
+    if args.metrics:
+        instrument.export(args.metrics)
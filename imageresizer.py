@@ -1,41 +1,90 @@
 # Importing Required Packages
 import os
+import shutil
+import argparse
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
 from PIL import Image
 
+# Function to resize a single image file in place (runs in the worker processes)
+def resize_image_file(filepath, size = (1024, 1024)):
+    with Image.open(filepath) as img:
+        # Skip the files that are already at the target size
+        if img.size == tuple(size):
+            return "skipped"
+
+        # Let the JPEG decoder scale by 1/2, 1/4 or 1/8 while decoding (result stays >= size)
+        img.draft(None, size)
+
+        # Resize the image
+        resized_img = img.resize(size, Image.Resampling.LANCZOS)
+
+    # Save to a temp file next to the original and swap it in, so a crash never corrupts the original
+    fd, tmp_path = tempfile.mkstemp(dir = os.path.dirname(filepath) or ".", suffix = ".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            resized_img.save(f, "JPEG")
+        shutil.copymode(filepath, tmp_path)
+        os.replace(tmp_path, filepath)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return "resized"
+
+# Helper that reports errors as a result instead of raising across the process pool
+def _resize_task(filepath, size):
+    try:
+        return filepath, resize_image_file(filepath, size), None
+    except Exception as e:
+        return filepath, "failed", e
+
 # Define a function to resize the Images in to 1024*1024
-def resize_images(directory, size=(1024, 1024)):
-    
+def resize_images(directory, size=(1024, 1024), workers = 1):
+
     print(f"Starting image resizing process in directory: {directory}")
-    
+
     # Check if the directory exists
     if not os.path.isdir(directory):
         print(f"Error: The directory '{directory}' does not exist.")
         return
 
     # List all files in the directory
-    for filename in os.listdir(directory):
-        if filename.lower().endswith(('.jpg', '.jpeg')):
-            filepath = os.path.join(directory, filename)
-            try:
-                # Open the image file
-                with Image.open(filepath) as img:
-                    print(f"Resizing '{filename}'...")
-                    
-                    # Resize the image
-                    resized_img = img.resize(size, Image.Resampling.LANCZOS)
-                    
-                    # Save the resized image, overwriting the original
-                    resized_img.save(filepath, "JPEG")
-                    print(f"Successfully resized and saved '{filename}'.")
-                    
-            except Exception as e:
-                print(f"Failed to process '{filename}'. Error: {e}")
-
-    print("\nAll image processing complete.")
+    filepaths = [os.path.join(directory, filename) for filename in os.listdir(directory)
+                 if filename.lower().endswith(('.jpg', '.jpeg'))]
+    counts = {"resized": 0, "skipped": 0, "failed": 0}
+
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers = workers) as pool:
+            results = pool.map(_resize_task, filepaths, [size] * len(filepaths), chunksize = 8)
+            for filepath, status, error in results:
+                counts[status] += 1
+                _report(filepath, status, error)
+    else:
+        for filepath in filepaths:
+            filepath, status, error = _resize_task(filepath, size)
+            counts[status] += 1
+            _report(filepath, status, error)
+
+    print(f"\nAll image processing complete. Resized {counts['resized']}, skipped {counts['skipped']}, "
+          f"failed {counts['failed']}.")
+    return counts
+
+# Helper to print the outcome of one file
+def _report(filepath, status, error):
+    filename = os.path.basename(filepath)
+    if status == "resized":
+        print(f"Successfully resized and saved '{filename}'.")
+    elif status == "skipped":
+        print(f"Skipping '{filename}', already at the target size.")
+    else:
+        print(f"Failed to process '{filename}'. Error: {error}")
 
 if __name__ == "__main__":
-    # Define the directory to process
-    outputs_folder = "Outputs"
-    
+    parser = argparse.ArgumentParser(description = "Resize the JPG images of a directory to 1024x1024 in place.")
+    parser.add_argument("directory", nargs = "?", default = "Outputs", help = "Directory to process.")
+    parser.add_argument("--workers", type = int, default = os.cpu_count() or 1, help = "Number of worker processes.")
+    args = parser.parse_args()
+
     # Call the function to start the process
-    resize_images(outputs_folder)
\ No newline at end of file
+    resize_images(args.directory, workers = args.workers)
@@ -1,83 +1,307 @@
 # Importing Required Packages
+# torch, segment_anything, supervision and pycocotools are imported on first use,
+# so the vectorization helpers load without the SAM stack
 import numpy as np
-import pandas as pd
-import matplotlib.pyplot as plt
 import cv2
-import supervision as sv
-from segment_anything import sam_model_registry, SamAutomaticMaskGenerator, SamPredictor
 import svgwrite
-from skimage import measure
-import torch
-import uuid
 import os
 import io
-from skimage.measure import approximate_polygon
-from torch.cuda.nccl import unique_id
+import logging
+import functools
+from embeddingcache import EmbeddingCache, install_embedding_cache
+import instrument
 
-# Set the devivce
-DEVICE = torch.device('cuda:0' if torch.cuda.is_available() else 'cpu')
+logger = logging.getLogger(__name__)
+
+# Set the devivce (resolved on first use, see __getattr__ for imgsvg.DEVICE)
+@functools.lru_cache(maxsize = None)
+def default_device():
+    import torch
+    return torch.device('cuda:0' if torch.cuda.is_available() else 'cpu')
+
+def __getattr__(name):
+    if name == "DEVICE":
+        return default_device()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # SAM Model Type and checkpoint path
 model_type = 'vit_h'
 checkpoint_path = r"C:\Users\Webbies\Jupyter_Notebooks\Berger_Exterior_Segmentation\sam_vit_h_4b8939.pth"
 
-# Creating the SAM model
-sam = sam_model_registry[model_type](checkpoint = checkpoint_path).to(device = DEVICE)
+# SAM models and mask generators that were already built
+_sam_models = {}
+_mask_generators = {}
+
+# Function to create a SAM model on first use and reuse it afterwards
+def load_sam_model(model_type = model_type, checkpoint_path = checkpoint_path, device = None):
+    import torch
+    from segment_anything import sam_model_registry
+    device = torch.device(device) if device is not None else default_device()
+    model_key = (model_type, checkpoint_path, str(device))
+    if model_key not in _sam_models:
+        with instrument.span("model_load"):
+            _sam_models[model_key] = sam_model_registry[model_type](checkpoint = checkpoint_path).to(device = device)
+    return _sam_models[model_key]
+
+# Function to create the SAM model once and keep one mask generator per generation profile warm
+# With cache_dir, image embeddings are cached on disk so repeat runs on an image skip the encoder
+# profile is a name of samprofile.PROFILES or a dict of settings (None: SAM's defaults)
+def load_mask_generator(model_type = model_type, checkpoint_path = checkpoint_path, device = None, cache_dir = None,
+                        output_mode = "binary_mask", profile = None):
+    import samprofile
+    device = str(device) if device is not None else str(default_device())
+    settings = samprofile.resolve_profile(profile)
+    key = (model_type, checkpoint_path, device, cache_dir, output_mode, tuple(sorted(settings.items())))
+    if key not in _mask_generators:
+        sam = load_sam_model(model_type, checkpoint_path, device)
+        mask_generator = samprofile.build_mask_generator(sam, settings, output_mode)
+        if cache_dir:
+            install_embedding_cache(mask_generator, EmbeddingCache(cache_dir), model_type, checkpoint_path)
+        _mask_generators[key] = mask_generator
+    return _mask_generators[key]
+
+# Stroke colours cycled over the masks of one SVG
+stroke_colors = ['blue', 'green', 'red', 'orange', 'purple', 'brown',
+                 'cyan', 'magenta', 'yellow', 'lime', 'teal', 'olive']
+
+# Kernel of the morphological clean-up
+_kernel = np.ones((3, 3), np.uint8)
+
+# Helper to clean one mask and trace its outer boundaries and holes
+def mask_to_contours(mask, tolerance = 2.0):
+    """
+    Clean a binary mask with an opening and a closing, then trace it with
+    ``cv2.findContours`` (two-level hierarchy, so holes are kept) and simplify
+    every contour with Ramer-Douglas-Peucker.
+
+    Only the bounding box of the mask (plus a margin for the closing) is
+    processed; the returned (K, 2) arrays are in full-image (x, y) coordinates.
+    """
+    with instrument.span("contours"):
+        return _mask_to_contours(mask, tolerance)
+
+# Body of mask_to_contours, timed as the "contours" stage
+def _mask_to_contours(mask, tolerance):
+    mask_uint8 = np.ascontiguousarray(mask, dtype = np.uint8)
+    x, y, w, h = cv2.boundingRect(mask_uint8)
+    if w == 0 or h == 0:
+        return []
+
+    # Crop with a 2px margin, except where the box touches the image border
+    img_h, img_w = mask_uint8.shape
+    x0, y0 = max(x - 2, 0), max(y - 2, 0)
+    x1, y1 = min(x + w + 2, img_w), min(y + h + 2, img_h)
+    crop = (mask_uint8[y0:y1, x0:x1] != 0).astype(np.uint8)
+
+    # Clean the mask using morphological operations
+    cleaned = cv2.morphologyEx(crop, cv2.MORPH_OPEN, _kernel)
+    cleaned = cv2.morphologyEx(cleaned, cv2.MORPH_CLOSE, _kernel)
+
+    # Extract outer contours and holes, then simplify them
+    contours, _ = cv2.findContours(cleaned, cv2.RETR_CCOMP, cv2.CHAIN_APPROX_SIMPLE)
+    simplified = []
+    for contour in contours:
+        contour = cv2.approxPolyDP(contour, tolerance, True)
+        if len(contour) < 3:
+            continue  # Skip if not enough points to form a shape
+        simplified.append(contour.reshape(-1, 2) + (x0, y0))
+    return simplified
+
+# Helper to write contours as SVG path data with a fixed number of decimals
+# Integer (pixel) contours are written without decimals
+def format_path_data(contours, precision = 1):
+    subpaths = []
+    for contour in contours:
+        contour = np.asarray(contour)
+        fmt = "%d" if np.issubdtype(contour.dtype, np.integer) else f"%.{max(precision, 0)}f"
+        # One format template per contour instead of string concatenation per point
+        template = f"M{fmt},{fmt}" + f" L{fmt},{fmt}" * (len(contour) - 1) + " Z"
+        subpaths.append(template % tuple(contour.ravel().tolist()))
+    return " ".join(subpaths)
+
+# Create a helper function to write the SAM masks as paths of one SVG file
+def masks_to_svg(masks, output_filepath, precision = 1, tolerance = 2.0, offsets = None, scale = 1.0,
+                 image_size = None):
+    """
+    Vectorize masks into a single SVG file, one path element per mask.
+
+    Each mask is traced on its own rather than all at once from one label
+    array: SAM masks overlap, and a label array keeps a single mask per pixel.
+    Holes are subpaths of their mask's path, filled with ``fill-rule="evenodd"``.
 
-# Use the SamAutomaticMaskGenerator to generate the masks
-mask_generator = SamAutomaticMaskGenerator(sam)
+    Args:
+        masks (list[np.ndarray] or np.ndarray): Boolean masks, or a stacked (N, H, W) array.
+        output_filepath (str): Where to save the SVG.
+        precision (int): Decimals written per non-integer coordinate; lower values give smaller files.
+        tolerance (float): Douglas-Peucker tolerance in pixels.
+        offsets (list[tuple] or None): (x, y) position of each mask when the masks are bbox crops.
+        scale (float): Scale of the masks relative to the original image; contours are divided by it.
+        image_size (tuple or None): (height, width) of the original image, used for the SVG size and
+            viewBox (default: the shape of the first mask divided by ``scale``; required for bbox crops).
 
-# Create a helper function image_svg_without_noise to create Raster images to svg format (redefined helper function)
-def masks_to_svg(masks, output_filepath):
-    dwg = svgwrite.Drawing(output_filepath, size = ("1080px", "810px"), profile = 'tiny')
+    Returns:
+        written (list[int]): Indices of the masks that got a path, in path order
+            (masks too small to trace are left out).
+    """
+    # The canvas is the source image, so paths in image coordinates render where they belong
+    if image_size is None:
+        if offsets is not None:
+            raise ValueError("image_size is required when the masks are bbox crops.")
+        image_size = [int(round(side / scale)) for side in np.shape(masks[0])[:2]] if len(masks) else (810, 1080)  # the old fixed canvas
+    height, width = (int(side) for side in image_size)
+    dwg = svgwrite.Drawing(output_filepath, size = (f"{width}px", f"{height}px"), profile = 'tiny')
+    dwg.viewbox(0, 0, width, height)
+    written = []
     for i, mask in enumerate(masks):
-        # Clean the mask using morphological operations
-        mask_uint8 = (mask.astype(np.uint8) * 255)
-        kernel = np.ones((3, 3), np.uint8)
-        cleaned_mask = cv2.morphologyEx(mask_uint8, cv2.MORPH_OPEN, kernel)
-        cleaned_mask = cv2.morphologyEx(cleaned_mask, cv2.MORPH_CLOSE, kernel)
-        # Extract contours from the cleaned mask
-        contours = measure.find_contours(cleaned_mask.astype(int), 0.5)
-        for contour in contours:
-            # Simplify contour using Ramer–Douglas–Peucker algorithm
-            simplified_contour = approximate_polygon(contour, tolerance = 2.0)
-            if len(simplified_contour) < 3:
-                continue  # Skip if not enough points to form a shape
-            # Build SVG path from simplified contour
-            path_data = f"M{simplified_contour[0, 1]},{simplified_contour[0, 0]}"
-            for point in simplified_contour[1:]:
-                path_data += f" L{point[1]},{point[0]}"
-            path_data += " Z"
-            # Create an SVG path element.
-            stroke_colors = ['blue', 'green', 'red', 'orange', 'purple', 'brown',
-                             'cyan', 'magenta', 'yellow', 'lime', 'teal', 'olive']
-            stroke_color = stroke_colors[i % len(stroke_colors)]  # Cycle through colors
-            # path = dwg.path(d=path_data, fill = 'none', stroke = stroke_color, stroke_width = 1)
-            path = dwg.path(d = path_data, fill = 'lightblue', stroke = stroke_color, fill_opacity = 0.4, stroke_width = 2)
-            # Add the path element to the SVG drawing.
-            dwg.add(path)
+        contours = mask_to_contours(mask, tolerance)
+        if not contours:
+            continue
+        written.append(i)
+        # Map cropped / downscaled masks back to original image coordinates
+        if offsets is not None:
+            contours = [contour + offsets[i] for contour in contours]
+        if scale != 1.0:
+            contours = [contour / scale for contour in contours]
+        # Outer boundaries and holes share one path; even-odd filling leaves the holes empty
+        with instrument.span("format"):
+            path_data = format_path_data(contours, precision)
+        stroke_color = stroke_colors[i % len(stroke_colors)]  # Cycle through colors
+        path = dwg.path(d = path_data, fill = 'lightblue', stroke = stroke_color, fill_opacity = 0.4,
+                        stroke_width = 2, fill_rule = 'evenodd')
+        # Add the path element to the SVG drawing.
+        dwg.add(path)
     # Save the complete SVG drawing to the output file.
-    dwg.save()
-    print(f"All mask paths saved to a single SVG file: {output_filepath}")
+    with instrument.span("svg_save"):
+        dwg.save()
+    logger.info(f"All mask paths saved to a single SVG file: {output_filepath}")
+    return written
+
+# Helper to read the image (height, width) of an <svg> element from its viewBox, or its width/height in pixels
+def svg_image_size(svg_elem):
+    view_box = svg_elem.get("viewBox", "").replace(",", " ").split()
+    if len(view_box) == 4:
+        size = (float(view_box[3]), float(view_box[2]))
+    else:
+        size = tuple(float((svg_elem.get(key) or "nan").replace("px", "")) for key in ("height", "width"))
+    if not all(np.isfinite(size)):
+        raise ValueError("The SVG has no viewBox or pixel size; pass the image height and width.")
+    return int(round(size[0])), int(round(size[1]))
+
+# Helper to name the SVG after its image, so a rerun overwrites the same file instead of adding one
+def svg_output_path(image_path, output_dir):
+    return os.path.join(output_dir, f"mask_{os.path.splitext(os.path.basename(image_path))[0]}.svg")
+
+# Function to choose the downscale factor and tile size that keep SAM under a memory ceiling
+def plan_large_image_inference(height, width, memory_limit_mb = 4096, points_per_batch = 64, max_side = None,
+                               tile_size = None):
+    """
+    For every batch of prompt points SAM upsamples 3 float32 mask logits per
+    point to the size of the image it was given, so peak memory grows with
+    points_per_batch x pixels. Returns (scale, tile_size) such that one
+    batch of the (downscaled) image or tile stays under ``memory_limit_mb``.
+    """
+    scale = 1.0
+    if max_side:
+        scale = min(scale, max_side / max(height, width))
+
+    # float32 logits + bool masks for 3 outputs per point, plus the RGB pixels
+    bytes_per_pixel = points_per_batch * 3 * (4 + 1) + 3
+    max_pixels = memory_limit_mb * 1024 ** 2 / bytes_per_pixel
+    if tile_size:
+        tile_size = int(min(tile_size, np.sqrt(max_pixels)))
+    else:
+        scale = min(scale, float(np.sqrt(max_pixels / (height * width))))
+    return scale, tile_size
+
+# Helper to turn one SAM record into a bbox-local crop with a 2px margin
+def _crop_segmentation(segmentation, bbox):
+    import pycocotools.mask as maskUtils
+    if isinstance(segmentation, dict):
+        if isinstance(segmentation["counts"], list):
+            h, w = segmentation["size"]
+            segmentation = maskUtils.frPyObjects(segmentation, h, w)
+        segmentation = maskUtils.decode(segmentation)
+    img_h, img_w = segmentation.shape
+    x, y, w, h = (int(round(v)) for v in bbox)
+    x0, y0 = max(x - 2, 0), max(y - 2, 0)
+    x1, y1 = min(x + w + 3, img_w), min(y + h + 3, img_h)
+    return np.array(segmentation[y0:y1, x0:x1], dtype = bool), np.array([x0, y0])
+
+# Define a function to run SAM on a downscaled and/or tiled image, keeping only bbox-local masks
+def generate_mask_regions(image_bgr, mask_generator = None, scale = 1.0, tile_size = None):
+    """
+    Run SAM on a downscaled copy of the image, tile by tile if ``tile_size``
+    is set, and keep every mask as a crop of its bounding box.
+
+    With an RLE ``output_mode`` on the generator only one full-size mask is
+    decoded at a time. Masks that cross a tile border are returned per tile.
+
+    Returns:
+        regions (list[dict]): Largest first, with keys 'mask' (bool crop),
+                              'offset' ((x, y) of the crop in the downscaled image)
+                              and 'area' (in original-image pixels).
+    """
+    mask_generator = mask_generator or load_mask_generator(output_mode = "coco_rle")
+    image_rgb = cv2.cvtColor(image_bgr, cv2.COLOR_BGR2RGB)
+    if scale < 1.0:
+        new_size = (max(int(round(image_rgb.shape[1] * scale)), 1), max(int(round(image_rgb.shape[0] * scale)), 1))
+        image_rgb = cv2.resize(image_rgb, new_size, interpolation = cv2.INTER_AREA)
+
+    height, width = image_rgb.shape[:2]
+    tile_size = tile_size or max(height, width)
+    regions = []
+    for ty in range(0, height, tile_size):
+        for tx in range(0, width, tile_size):
+            tile = np.ascontiguousarray(image_rgb[ty:ty + tile_size, tx:tx + tile_size])
+            with instrument.span("sam_generate"):
+                records = mask_generator.generate(tile)
+            for record in records:
+                crop, offset = _crop_segmentation(record["segmentation"], record["bbox"])
+                regions.append({"mask": crop, "offset": offset + (tx, ty), "area": record["area"] / scale ** 2})
+    regions.sort(key = lambda r: r["area"], reverse = True)
+    return regions
+
+# Define a function to vectorize very large images without full-resolution masks
+def sam_large_image_svg_generation(image_path, mask_generator = None, output_dir = "Extracted_MaskImage_SVG",
+                                   memory_limit_mb = 4096, max_side = None, tile_size = None, precision = 1,
+                                   output_filepath = None):
+    image_bgr = cv2.imread(image_path)
+    mask_generator = mask_generator or load_mask_generator(output_mode = "coco_rle")
+    scale, tile_size = plan_large_image_inference(image_bgr.shape[0], image_bgr.shape[1], memory_limit_mb,
+                                                  mask_generator.points_per_batch, max_side, tile_size)
+    logger.info(f"Running SAM at scale {scale:.3f}" + (f" on {tile_size}px tiles" if tile_size else ""))
+    regions = generate_mask_regions(image_bgr, mask_generator, scale, tile_size)
+    image_size = image_bgr.shape[:2]
+    del image_bgr
+    os.makedirs(output_dir, exist_ok=True)
+    output_filepath = output_filepath or svg_output_path(image_path, output_dir)
+    masks_to_svg([r["mask"] for r in regions], output_filepath, precision = precision,
+                 offsets = [r["offset"] for r in regions], scale = scale, image_size = image_size)
+    return output_filepath
+
+# Define a function to run SAM on a BGR image and return its masks, largest first
+def generate_masks(image_bgr, mask_generator = None):
+  mask_generator = mask_generator or load_mask_generator()
+  image_rgb = cv2.cvtColor(image_bgr, cv2.COLOR_BGR2RGB)
+  with instrument.span("sam_generate"):
+    sam_result = mask_generator.generate(image_rgb)
+  return sam_result, [mask['segmentation'] for mask in sorted(sam_result, key = lambda x: x['area'], reverse = True)]
 
 # Define a function so convert the masks into svg with the above helper function
-def sam_mask_svg_generation(image_path): # image_url
+def sam_mask_svg_generation(image_path, mask_generator = None, output_dir = "Extracted_MaskImage_SVG"): # image_url
+  import supervision as sv
   image_bgr = cv2.imread(image_path)
-  image_rgb = cv2.cvtColor(image_bgr, cv2.COLOR_BGR2RGB)
-  sam_result = mask_generator.generate(image_rgb)
+  sam_result, masks = generate_masks(image_bgr, mask_generator)
   mask_annotator = sv.MaskAnnotator(color_lookup=sv.ColorLookup.INDEX)
   detections = sv.Detections.from_sam(sam_result=sam_result)
   annotated_image = mask_annotator.annotate(scene=image_bgr.copy(), detections=detections)
-  masks = [mask['segmentation'] for mask in sorted(sam_result, key = lambda x: x['area'], reverse = True)]
-  output_dir = "Extracted_MaskImage_SVG"
   os.makedirs(output_dir, exist_ok=True)
-  unique_id = str(uuid.uuid4())[:8]
-  output_filepath = os.path.join(output_dir, f"mask_{unique_id}.svg")
-  masks_to_svg(masks, output_filepath)
-
+  output_filepath = svg_output_path(image_path, output_dir)
+  masks_to_svg(masks, output_filepath, image_size = image_bgr.shape[:2])
+  return output_filepath
 
 ##### To change the naming pattern of the mask paths
-##### Use this instead of unique_id......................second last part
+##### Use this instead of svg_output_path......................second last part
 # existing_svgs = [f for f in os.listdir(output_dir) if f.endswith('.svg')]
 # next_index = len(existing_svgs) + 1
 # output_filepath = os.path.join(output_dir, f"mask_{next_index}.svg")
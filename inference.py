@@ -1,8 +1,18 @@
 # Importing Required Packages
+import os
+import sys
+import logging
 from imgsvg import sam_mask_svg_generation
+from batchsegment import segment_images
 
 # Define the Image Path
 img_path = r"C:\Users\Webbies\Jupyter_Notebooks\Berger_Exterior_Segmentation\Original_Ext_Images\Image13.jpg"
 
-# Implementing the Function
-sam_mask_svg_generation(img_path)
\ No newline at end of file
+# Implementing the Function (one image, or a directory / glob pattern of images in batches)
+if __name__ == "__main__":
+    logging.basicConfig(level = logging.INFO, format = "%(message)s")
+    inputs = sys.argv[1:] or [img_path]
+    if len(inputs) == 1 and os.path.isfile(inputs[0]):
+        sam_mask_svg_generation(inputs[0])
+    else:
+        segment_images(inputs)
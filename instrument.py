@@ -0,0 +1,187 @@
+# Importing Required Packages
+import os
+import json
+import time
+import bisect
+import threading
+import tracemalloc
+
+# Environment variable that switches instrumentation on, also in worker processes ("1" or "memory")
+ENV_VAR = "SAM_INSTRUMENT"
+
+# Upper bounds (seconds) of the histogram buckets, Prometheus style
+BUCKETS = (0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 60.0)
+
+_enabled = False
+_memory = False
+_lock = threading.Lock()
+_histograms = {}
+_local = threading.local()
+
+# Aggregated observations of one (stage, category)
+class _Histogram:
+    __slots__ = ("count", "total", "min", "max", "buckets", "peak_bytes")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = float("inf")
+        self.max = 0.0
+        self.buckets = [0] * (len(BUCKETS) + 1)
+        self.peak_bytes = 0
+
+    def observe(self, seconds, peak_bytes = 0):
+        self.count += 1
+        self.total += seconds
+        self.min = min(self.min, seconds)
+        self.max = max(self.max, seconds)
+        self.buckets[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.peak_bytes = max(self.peak_bytes, peak_bytes)
+
+# Span returned while instrumentation is off: entering and leaving it does nothing
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NULL_SPAN = _NullSpan()
+
+# Timed span of one stage
+class _Span:
+    __slots__ = ("stage", "category", "start", "start_bytes", "outer_category")
+
+    def __init__(self, stage, category):
+        self.stage = stage
+        self.category = category
+
+    def __enter__(self):
+        self.outer_category = getattr(_local, "category", None)
+        if self.category is None:
+            self.category = self.outer_category
+        else:
+            _local.category = self.category
+        if _memory:
+            tracemalloc.reset_peak()
+            self.start_bytes = tracemalloc.get_traced_memory()[0]
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        seconds = time.perf_counter() - self.start
+        peak = tracemalloc.get_traced_memory()[1] - self.start_bytes if _memory else 0
+        _local.category = self.outer_category
+        record(self.stage, seconds, self.category, peak)
+        return False
+
+# Function to time a block as one observation of ``stage``
+def span(stage, category = None):
+    """
+    Context manager timing its block as one observation of ``stage``.
+
+    A span given a ``category`` makes it the category of the spans nested in
+    it, so per-path stages are aggregated per category without passing the
+    name down. While instrumentation is off the shared no-op span is returned.
+    With memory tracking the peak traced allocation above the level at entry
+    is recorded as well; the peak is reset on entry, so it is exact for spans
+    without nested spans.
+    """
+    if not _enabled:
+        return _NULL_SPAN
+    return _Span(stage, category)
+
+# Function to add an observation measured by the caller
+def record(stage, seconds, category = None, peak_bytes = 0):
+    if not _enabled:
+        return
+    key = (stage, category or "")
+    with _lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = _Histogram()
+        histogram.observe(seconds, peak_bytes)
+
+# Function to switch instrumentation on or off (worker processes started later inherit the setting)
+def enable(on = True, memory = False):
+    global _enabled, _memory
+    _enabled = on
+    _memory = on and memory
+    if _memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    if on:
+        os.environ[ENV_VAR] = "memory" if memory else "1"
+    else:
+        os.environ.pop(ENV_VAR, None)
+
+def is_enabled():
+    return _enabled
+
+# Function to return the aggregated histograms as plain data
+def snapshot():
+    with _lock:
+        return {"buckets": list(BUCKETS), "stages": [
+            {"stage": stage, "category": category, "count": h.count, "sum": h.total,
+             "min": h.min if h.count else 0.0, "max": h.max, "buckets": list(h.buckets), "peak_bytes": h.peak_bytes}
+            for (stage, category), h in sorted(_histograms.items())]}
+
+# Function to take the histograms and start over (for worker processes reporting to the parent)
+def drain():
+    data = snapshot()
+    reset()
+    return data
+
+def reset():
+    with _lock:
+        _histograms.clear()
+
+# Function to add a snapshot (e.g. from a worker process) to the histograms of this process
+def merge(data):
+    if not data:
+        return
+    with _lock:
+        for entry in data["stages"]:
+            key = (entry["stage"], entry["category"])
+            histogram = _histograms.get(key)
+            if histogram is None:
+                histogram = _histograms[key] = _Histogram()
+            if entry["count"]:
+                histogram.min = min(histogram.min, entry["min"])
+            histogram.count += entry["count"]
+            histogram.total += entry["sum"]
+            histogram.max = max(histogram.max, entry["max"])
+            histogram.buckets = [a + b for a, b in zip(histogram.buckets, entry["buckets"])]
+            histogram.peak_bytes = max(histogram.peak_bytes, entry["peak_bytes"])
+
+# Helper to render the histograms in the Prometheus text exposition format
+def to_prometheus(data = None, prefix = "converter_stage"):
+    data = data or snapshot()
+    lines = [f"# HELP {prefix}_seconds Time spent per conversion stage.", f"# TYPE {prefix}_seconds histogram"]
+    peaks = [f"# HELP {prefix}_peak_bytes Peak traced memory per conversion stage.", f"# TYPE {prefix}_peak_bytes gauge"]
+    for entry in data["stages"]:
+        labels = f'stage="{entry["stage"]}",category="{entry["category"]}"'
+        cumulative = 0
+        for bound, count in zip(list(data["buckets"]) + ["+Inf"], entry["buckets"]):
+            cumulative += count
+            lines.append(f'{prefix}_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f"{prefix}_seconds_sum{{{labels}}} {entry['sum']:.9f}")
+        lines.append(f"{prefix}_seconds_count{{{labels}}} {entry['count']}")
+        if entry["peak_bytes"]:
+            peaks.append(f"{prefix}_peak_bytes{{{labels}}} {entry['peak_bytes']}")
+    return "\n".join(lines + (peaks if len(peaks) > 2 else [])) + "\n"
+
+# Function to write the histograms as JSON, or as Prometheus text for .prom/.txt paths
+def export(path):
+    data = snapshot()
+    with open(path, "w") as f:
+        if path.endswith((".prom", ".txt")):
+            f.write(to_prometheus(data))
+        else:
+            json.dump(data, f, indent = 4)
+    return path
+
+# Switch on in processes started with the environment variable set
+if os.environ.get(ENV_VAR):
+    enable(True, memory = os.environ[ENV_VAR] == "memory")
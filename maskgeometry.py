@@ -0,0 +1,320 @@
+# Importing Required Packages
+import os
+import numpy as np
+import cv2
+import pycocotools.mask as maskUtils
+from rleencoder import crop_to_rle, runs_to_rle
+from pathsampler import sample_path
+import imgsvg
+import instrument
+
+# SVG namespace of the files written by imgsvg.masks_to_svg
+SVG_NAMESPACE = "http://www.w3.org/2000/svg"
+
+# Function to decode the counts string of a compressed COCO RLE
+def decode_counts(counts):
+    """
+    Decode COCO's compressed counts (bytes or str) into run lengths, like
+    ``rleFrString`` of pycocotools but vectorized with numpy.
+
+    Each value is a little-endian group of 5-bit chunks offset by 48 (bit
+    0x20 = more chunks follow, bit 0x10 of the last chunk = negative), and
+    from the fourth run on it is the difference to the run two positions earlier.
+    """
+    if isinstance(counts, str):
+        counts = counts.encode("ascii")
+    chunks = np.frombuffer(counts, dtype = np.uint8).astype(np.int64) - 48
+    if chunks.size == 0:
+        return np.empty(0, dtype = np.int64)
+    last = (chunks & 0x20) == 0
+    value_of_chunk = np.concatenate(([0], np.cumsum(last)[:-1]))
+    first_chunk = np.concatenate(([0], np.flatnonzero(last)[:-1] + 1))
+    shift = 5 * (np.arange(chunks.size) - first_chunk[value_of_chunk])
+    values = np.bincount(value_of_chunk, weights = (chunks & 0x1f) << shift).astype(np.int64)
+    negative = (chunks[last] & 0x10) != 0
+    values[negative] -= np.left_shift(1, shift[last][negative] + 5)
+
+    # Undo the delta coding: the odd and the even runs after the first two are running sums
+    runs = values.copy()
+    runs[1::2] = np.cumsum(values[1::2])
+    runs[2::2] = np.cumsum(values[2::2])
+    return runs
+
+# Function to get the foreground runs [start, end) of a COCO RLE in Fortran order
+def rle_to_runs(rle):
+    """
+    Return ``(starts, ends)`` of the foreground runs of ``rle`` as flat
+    column-major indices, the form ``rleencoder.runs_to_rle`` encodes.
+    """
+    counts = rle["counts"]
+    runs = np.asarray(counts, dtype = np.int64) if isinstance(counts, list) else decode_counts(counts)
+    bounds = np.cumsum(runs)
+    n = runs.size // 2
+    return bounds[0:2 * n:2], bounds[1:2 * n:2]
+
+# Helper to evaluate a boolean operation of two run lists on their elementary intervals
+def _combine_runs(a, b, op):
+    (a_starts, a_ends), (b_starts, b_ends) = a, b
+    edges = np.unique(np.concatenate((a_starts, a_ends, b_starts, b_ends)))
+    if edges.size < 2:
+        return np.empty(0, np.int64), np.empty(0, np.int64)
+    left = edges[:-1]
+    in_a = np.searchsorted(a_starts, left, "right") > np.searchsorted(a_ends, left, "right")
+    in_b = np.searchsorted(b_starts, left, "right") > np.searchsorted(b_ends, left, "right")
+
+    # Neighbouring kept intervals become one run
+    change = np.diff(np.concatenate(([0], op(in_a, in_b).view(np.int8), [0])))
+    return edges[change == 1], edges[np.flatnonzero(change == -1)]
+
+# Helper to give pycocotools an RLE with compressed counts (the converters store them as str)
+def _compressed(rle):
+    if isinstance(rle["counts"], list):
+        height, width = rle["size"]
+        return maskUtils.frPyObjects(rle, height, width)
+    if isinstance(rle["counts"], str):
+        return {"size": rle["size"], "counts": rle["counts"].encode("utf-8")}
+    return rle
+
+# Function to get the union of masks in RLE form
+def rle_union(rles):
+    """Union of COCO RLEs of one image size, merged run by run by pycocotools."""
+    with instrument.span("mask_union"):
+        return maskUtils.merge([_compressed(rle) for rle in rles], intersect = False)
+
+# Function to get the intersection of masks in RLE form
+def rle_intersection(rles):
+    """Intersection of COCO RLEs of one image size, merged run by run by pycocotools."""
+    with instrument.span("mask_intersection"):
+        return maskUtils.merge([_compressed(rle) for rle in rles], intersect = True)
+
+# Function to remove masks from a mask in RLE form
+def rle_difference(rle, others):
+    """
+    Return ``rle`` minus the union of ``others`` (RLEs of the same image),
+    computed on the run lists; pycocotools has no difference operation.
+    """
+    height, width = rle["size"]
+    if not others:
+        return _compressed(rle)
+    with instrument.span("mask_difference"):
+        starts, ends = _combine_runs(rle_to_runs(rle), rle_to_runs(rle_union(others)), lambda a, b: a & ~b)
+        return runs_to_rle(starts, ends, height, width)
+
+# Function to fill polygons with the even-odd rule into COCO RLE, rasterizing only their bounding box
+def polygons_to_rle(polygons, height, width):
+    """
+    Rasterize float polygons, all in one ``cv2.fillPoly`` call so that their
+    overlaps are filled with the even-odd rule like the ``fill-rule="evenodd"``
+    paths of ``imgsvg.masks_to_svg``, and encode them as COCO RLE of a
+    (height, width) image. Coordinates keep 8 fractional bits.
+    """
+    polygons = [np.asarray(p, dtype = np.float64).reshape(-1, 2) for p in polygons]
+    polygons = [p for p in polygons if len(p) >= 3]
+    empty = np.empty(0, np.int64)
+    if not polygons:
+        return runs_to_rle(empty, empty, height, width)
+    points = np.concatenate(polygons)
+    x0, y0 = max(int(np.floor(points[:, 0].min())), 0), max(int(np.floor(points[:, 1].min())), 0)
+    x1, y1 = min(int(np.ceil(points[:, 0].max())) + 1, width), min(int(np.ceil(points[:, 1].max())) + 1, height)
+    if x1 <= x0 or y1 <= y0:
+        return runs_to_rle(empty, empty, height, width)
+    with instrument.span("rasterize"):
+        crop = np.zeros((y1 - y0, x1 - x0), dtype = np.uint8)
+        fixed = [np.round((p - (x0, y0)) * 256).astype(np.int32).reshape(-1, 1, 2) for p in polygons]
+        cv2.fillPoly(crop, fixed, 1, shift = 8)
+    with instrument.span("rle"):
+        return crop_to_rle(crop, x0, y0, height, width)
+
+# Helper to clip the half-plane on one side of a line to a box [left, top, right, bottom]
+def _half_plane(p0, p1, box):
+    (x0, y0), (x1, y1) = p0, p1
+    normal = np.array([y0 - y1, x1 - x0], dtype = np.float64)
+    if not normal.any():
+        raise ValueError("The split line needs two distinct points.")
+    left, top, right, bottom = box
+    corners = np.array([[left, top], [right, top], [right, bottom], [left, bottom]], dtype = np.float64)
+    side = (corners - (x0, y0)) @ normal
+    polygon = []
+    for i in range(4):
+        j = (i + 1) % 4
+        if side[i] >= 0:
+            polygon.append(corners[i])
+        if (side[i] >= 0) != (side[j] >= 0):
+            polygon.append(corners[i] + side[i] / (side[i] - side[j]) * (corners[j] - corners[i]))
+    return np.array(polygon)
+
+# Function to cut a mask in two along a line
+def rle_split(rle, p0, p1):
+    """
+    Split ``rle`` along the infinite line through ``p0`` and ``p1`` ((x, y) in pixels).
+
+    Returns ``(right, left)``: the pixels on the right of the line when going
+    from p0 to p1 on screen (y pointing down), and the rest of the mask. The
+    two parts never overlap and together make up the mask. Only the bounding
+    box of the mask is rasterized.
+    """
+    height, width = rle["size"]
+    rle = _compressed(rle)
+    x, y, w, h = maskUtils.toBbox(rle)
+    with instrument.span("mask_split"):
+        side = polygons_to_rle([_half_plane(p0, p1, (x - 1, y - 1, x + w + 1, y + h + 1))], height, width)
+        return rle_intersection([rle, side]), rle_difference(rle, [side])
+
+# Function to decode only the bounding box of a mask
+def rle_to_crop(rle, margin = 0):
+    """
+    Decode the part of ``rle`` inside its bounding box (grown by ``margin``
+    pixels, clipped to the image) straight from the runs.
+
+    Returns:
+        crop (np.ndarray): Boolean mask of the box.
+        offset (np.ndarray): (x, y) of the box in the image.
+    """
+    height, width = rle["size"]
+    starts, ends = rle_to_runs(rle)
+    if starts.size == 0:
+        return np.zeros((0, 0), dtype = bool), np.array([0, 0])
+
+    # Cut the runs at column boundaries: piece k covers rows [top, bottom) of column col
+    first_col, last_col = starts // height, (ends - 1) // height
+    pieces = last_col - first_col + 1
+    run = np.repeat(np.arange(starts.size), pieces)
+    col = first_col[run] + np.arange(run.size) - np.repeat(np.cumsum(pieces) - pieces, pieces)
+    top = np.maximum(starts[run] - col * height, 0)
+    bottom = np.minimum(ends[run] - col * height, height)
+
+    x0, x1 = max(int(col.min()) - margin, 0), min(int(col.max()) + 1 + margin, width)
+    y0, y1 = max(int(top.min()) - margin, 0), min(int(bottom.max()) + margin, height)
+    # +1 where a piece starts and -1 where it ends, summed down each column
+    edges = np.zeros((x1 - x0, y1 - y0 + 1), dtype = np.int32)
+    np.add.at(edges, (col - x0, top - y0), 1)
+    np.add.at(edges, (col - x0, bottom - y0), -1)
+    return np.cumsum(edges[:, :-1], axis = 1).T > 0, np.array([x0, y0])
+
+# Function to turn SVG path data into COCO RLE
+def path_to_rle(path_data, height, width, samples_per_segment = 25):
+    """
+    Rasterize an SVG path (every subpath, even-odd filled like the paths
+    written by ``imgsvg.masks_to_svg``) into COCO RLE of a (height, width) image.
+    """
+    from svgpathtools import parse_path
+    with instrument.span("parse_path"):
+        path = parse_path(path_data)
+    polygons = [sample_path(subpath, samples_per_segment = samples_per_segment)
+                for subpath in path.continuous_subpaths()]
+    return polygons_to_rle(polygons, height, width)
+
+# Function to turn COCO RLE into SVG path data
+def rle_to_path(rle, precision = 1, tolerance = 2.0):
+    """
+    Vectorize ``rle`` the way ``imgsvg.masks_to_svg`` vectorizes SAM masks,
+    decoding only its bounding box (plus a 2 px margin for the clean-up).
+    """
+    crop, offset = rle_to_crop(rle, margin = 2)
+    contours = imgsvg.mask_to_contours(crop, tolerance) if crop.size else []
+    with instrument.span("format"):
+        return imgsvg.format_path_data([contour + offset for contour in contours], precision)
+
+# Function to bundle a mask with its box, area and path data
+def region(rle, precision = 1, tolerance = 2.0):
+    """
+    Return ``{"segmentation", "bbox", "area", "d"}`` for ``rle``, the fields
+    of a converter annotation (with str counts, so it serializes to JSON
+    the same way) plus the SVG path data of the mask.
+    """
+    rle = _compressed(rle)
+    segmentation = {"size": [int(v) for v in rle["size"]], "counts": rle["counts"].decode("utf-8")}
+    return {"segmentation": segmentation, "bbox": [float(v) for v in maskUtils.toBbox(rle)],
+            "area": float(maskUtils.area(rle)), "d": rle_to_path(rle, precision, tolerance)}
+
+# Helper to accept masks as RLE dicts or SVG path data
+def _as_rle(mask, size):
+    if isinstance(mask, str):
+        if size is None:
+            raise ValueError("size (height, width) is required for masks given as SVG path data.")
+        return path_to_rle(mask, *size)
+    return _compressed(mask)
+
+# Function to merge masks into one region
+def merge_masks(masks, size = None, precision = 1, tolerance = 2.0):
+    """
+    Merge masks given as COCO RLE or SVG path data (``size`` = (height,
+    width) is needed for path data) and return the region of their union.
+    """
+    return region(rle_union([_as_rle(mask, size) for mask in masks]), precision, tolerance)
+
+# Function to keep only the overlap of masks
+def intersect_masks(masks, size = None, precision = 1, tolerance = 2.0):
+    """Region of the intersection of masks given as COCO RLE or SVG path data."""
+    return region(rle_intersection([_as_rle(mask, size) for mask in masks]), precision, tolerance)
+
+# Function to cut masks out of a mask
+def subtract_masks(mask, others, size = None, precision = 1, tolerance = 2.0):
+    """Region of ``mask`` minus ``others``, given as COCO RLE or SVG path data."""
+    return region(rle_difference(_as_rle(mask, size), [_as_rle(other, size) for other in others]),
+                  precision, tolerance)
+
+# Function to split a mask along a line into two regions
+def split_mask(mask, p0, p1, size = None, precision = 1, tolerance = 2.0):
+    """Regions of the two parts of ``mask`` on either side of the line p0 -> p1 (see rle_split)."""
+    return tuple(region(part, precision, tolerance) for part in rle_split(_as_rle(mask, size), p0, p1))
+
+# Function to apply one edit to the paths of an SVG written by masks_to_svg
+def edit_svg(svg_path, operation, path_ids, line = None, output_path = None, precision = 1, tolerance = 2.0):
+    """
+    Merge, intersect, subtract or split paths of an SVG and save it (by
+    default over ``svg_path``). Untouched paths keep their position and style.
+
+    ``path_ids`` are positions of paths in the document, the region ids of
+    regionindex. "merge" and "intersect" put the result in place of the first
+    path and drop the others, "subtract" replaces the first path by itself
+    minus the others, and "split" replaces one path by its two parts along
+    ``line`` = (x0, y0, x1, y1). Empty results are dropped. A ``.regions.npz``
+    index next to the SVG is rebuilt.
+
+    Returns:
+        regions (list[dict]): The new regions (see region()).
+    """
+    from xml.etree import ElementTree
+    from regionindex import RegionIndex, sidecar_path
+    tree = ElementTree.parse(svg_path)
+    root = tree.getroot()
+    size = imgsvg.svg_image_size(root)
+    parents = {child: parent for parent in root.iter() for child in parent}
+    paths = [elem for elem in root.iter() if elem.tag.rsplit("}", 1)[-1] == "path" and elem.get("d")]
+    if not path_ids or any(not 0 <= i < len(paths) for i in path_ids):
+        raise ValueError(f"Path ids must be positions of the {len(paths)} paths of {svg_path}, got {list(path_ids)}")
+    targets = [paths[i] for i in path_ids]
+    masks = [elem.get("d") for elem in targets]
+
+    if operation == "merge":
+        regions = [merge_masks(masks, size, precision, tolerance)]
+    elif operation == "intersect":
+        regions = [intersect_masks(masks, size, precision, tolerance)]
+    elif operation == "subtract":
+        regions = [subtract_masks(masks[0], masks[1:], size, precision, tolerance)]
+    elif operation == "split":
+        if len(targets) != 1 or line is None:
+            raise ValueError("split takes one path id and a line (x0, y0, x1, y1).")
+        regions = list(split_mask(masks[0], line[:2], line[2:], size, precision, tolerance))
+    else:
+        raise ValueError(f"Unknown operation '{operation}', expected merge, intersect, subtract or split")
+
+    # The results take the place of the first path, copying its style
+    first = targets[0]
+    parent = parents[first]
+    position = list(parent).index(first)
+    for offset, result in enumerate(regions):
+        if result["d"]:
+            elem = ElementTree.Element(first.tag, dict(first.attrib, d = result["d"]))
+            parent.insert(position + offset, elem)
+    for elem in targets:
+        parents[elem].remove(elem)
+
+    # Write the paths unprefixed (importing svgpathtools registers an "svg:" prefix)
+    ElementTree.register_namespace("", SVG_NAMESPACE)
+    output_path = output_path or svg_path
+    tree.write(output_path, encoding = "utf-8", xml_declaration = True)
+    if os.path.exists(sidecar_path(svg_path)):
+        RegionIndex.from_svg(output_path).save(sidecar_path(output_path))
+    return regions
@@ -0,0 +1,258 @@
+# Importing Required Packages
+# torch is only needed by MaskStoreDataset and is imported there
+import os
+import json
+import glob
+import logging
+import numpy as np
+import cv2
+import pycocotools.mask as maskUtils
+from categories import CategoryRegistry, CATEGORIES_FILE
+from cocoshard import DatasetReader
+import instrument
+
+logger = logging.getLogger(__name__)
+
+# Helper for the path of one file of a store: images.u8, masks.bits, index.npz or meta.json (written last)
+def store_path(store_dir, name, kind):
+    return os.path.join(store_dir, f"{name}.{kind}")
+
+# Function to list the (record, image directory, category table) of per-image JSON files or a sharded dataset
+def iter_records(inputs, dataset = None, image_dir = None):
+    """
+    Yield ``(record, image_dir, categories)`` for the per-image JSON files in
+    ``inputs`` (files or directories), or for every record of the sharded
+    ``dataset`` in each input directory (see cocoshard). Images are looked up in
+    ``image_dir``, or next to the JSON files / dataset by default.
+    """
+    for entry in inputs:
+        if dataset:
+            categories = CategoryRegistry.load(os.path.join(entry, f"{dataset}.categories.json"), missing_ok = True)
+            with DatasetReader(entry, dataset) as reader:
+                for record in reader:
+                    yield record, image_dir or entry, categories
+            continue
+        paths = sorted(glob.glob(os.path.join(glob.escape(entry), "*.json"))) if os.path.isdir(entry) else [entry]
+        tables = {}
+        for path in paths:
+            with open(path, "r") as f:
+                record = json.load(f)
+            if not isinstance(record, dict) or "annotations" not in record:
+                continue  # categories.json, manifest.json
+            json_dir = os.path.dirname(path)
+            if json_dir not in tables:
+                tables[json_dir] = CategoryRegistry.load(os.path.join(json_dir, CATEGORIES_FILE), missing_ok = True)
+            yield record, image_dir or json_dir, tables[json_dir]
+
+# Function to pack images and masks of converter records into memory-mapped training files
+def export_mask_store(inputs, store_dir, name = "masks", dataset = None, image_dir = None, size = (1024, 1024)):
+    """
+    Pack the images and annotation masks of converter records (per-image JSON
+    files from svg_to_image_and_json / process_paths_to_json, or a sharded
+    dataset) into files that are read back with ``np.memmap``:
+
+    - ``<name>.images.u8``: uint8 RGB images, (N, height, width, 3);
+    - ``<name>.masks.bits``: every mask bit-packed along its rows, (M, height, width / 8);
+    - ``<name>.index.npz``: ``image_offsets`` (N + 1) giving the masks of image i as
+      ``image_offsets[i]:image_offsets[i + 1]``, plus ``category_ids``, ``bboxes`` and
+      ``annotation_ids`` per mask;
+    - ``<name>.meta.json``: shape, counts, file names and the category table.
+
+    Masks are kept one per annotation rather than as a label map, so overlapping
+    annotations survive. Images not already ``size`` are resized, and the
+    masks and boxes with them.
+
+    Args:
+        inputs (list[str]): JSON files or directories, or dataset directories with ``dataset``.
+        store_dir (str): Directory of the store.
+        name (str): Prefix of the store files.
+        dataset (str or None): Read the sharded dataset of this name instead of JSON files.
+        image_dir (str or None): Directory of the images (default: next to the records).
+        size (tuple): (height, width) of the stored images and masks; width must be a multiple of 8.
+
+    Returns:
+        meta (dict): Contents of ``<name>.meta.json``.
+    """
+    height, width = size
+    if width % 8:
+        raise ValueError(f"The width must be a multiple of 8 to bit-pack the mask rows, got {width}")
+    os.makedirs(store_dir, exist_ok = True)
+    meta_path = store_path(store_dir, name, "meta.json")
+    if os.path.exists(meta_path):
+        os.remove(meta_path)  # the store is incomplete until the meta file is written again
+
+    categories = CategoryRegistry()
+    remaps = {}
+    file_names = []
+    image_offsets = [0]
+    category_ids, bboxes, annotation_ids = [], [], []
+    with open(store_path(store_dir, name, "images.u8"), "wb") as images_file, \
+            open(store_path(store_dir, name, "masks.bits"), "wb") as masks_file:
+        for record, record_image_dir, table in iter_records(inputs, dataset, image_dir):
+            file_name = record["image"]["file_name"]
+            with instrument.span("image_read"):
+                image = cv2.imread(os.path.join(record_image_dir, file_name))
+            if image is None:
+                logger.warning(f"Skipping {file_name}, image not found in {record_image_dir}.")
+                continue
+            # Boxes are in pixels of the record's image and follow it to the stored size
+            box_scale = np.array([width / record["image"]["width"], height / record["image"]["height"]] * 2)
+            if image.shape[:2] != (height, width):
+                image = cv2.resize(image, (width, height), interpolation = cv2.INTER_AREA)
+            images_file.write(cv2.cvtColor(image, cv2.COLOR_BGR2RGB).tobytes())
+
+            if id(table) not in remaps:
+                remaps[id(table)] = categories.merge(table)
+            remap = remaps[id(table)]
+            for annotation in record["annotations"]:
+                rle = dict(annotation["segmentation"])
+                if isinstance(rle["counts"], str):
+                    rle["counts"] = rle["counts"].encode("utf-8")
+                with instrument.span("rle_decode"):
+                    mask = maskUtils.decode(rle)
+                if mask.shape != (height, width):
+                    mask = cv2.resize(mask, (width, height), interpolation = cv2.INTER_NEAREST)
+                masks_file.write(np.packbits(mask, axis = -1).tobytes())
+                category_id = annotation.get("category_id", 0)
+                category_ids.append(int(remap[category_id]) if 0 < category_id < len(remap) else category_id)
+                bboxes.append(np.asarray(annotation["bbox"], dtype = np.float64) * box_scale)
+                annotation_ids.append(annotation.get("id", -1))
+            file_names.append(file_name)
+            image_offsets.append(image_offsets[-1] + len(record["annotations"]))
+
+    np.savez(store_path(store_dir, name, "index.npz"),
+             image_offsets = np.asarray(image_offsets, dtype = np.int64),
+             category_ids = np.asarray(category_ids, dtype = np.int64),
+             bboxes = np.asarray(bboxes, dtype = np.float32).reshape(-1, 4),
+             annotation_ids = np.asarray(annotation_ids, dtype = np.int64))
+    meta = {"height": height, "width": width, "images": len(file_names), "masks": len(category_ids),
+            "file_names": file_names, "categories": categories.to_coco()}
+    with open(meta_path, "w") as f:
+        json.dump(meta, f, indent = 4)
+    logger.info(f"Packed {len(file_names)} images and {len(category_ids)} masks into {store_dir}/{name}.*")
+    return meta
+
+# Random-access reader for a store written by export_mask_store
+class MaskStore:
+    """
+    Read samples of a mask store as NumPy views of the memory-mapped files:
+    ``store[i]`` parses nothing and decodes nothing, it only slices the maps.
+
+    The maps are opened on first access and not pickled, so a store handed to
+    DataLoader worker processes opens its own maps in each worker.
+
+    Args:
+        store_dir (str): Directory of the store.
+        name (str): Prefix of the store files.
+    """
+
+    def __init__(self, store_dir, name = "masks"):
+        self.store_dir = store_dir
+        self.name = name
+        with open(store_path(store_dir, name, "meta.json"), "r") as f:
+            self.meta = json.load(f)
+        self.height, self.width = self.meta["height"], self.meta["width"]
+        self.categories = CategoryRegistry.from_coco(self.meta["categories"])
+        with np.load(store_path(store_dir, name, "index.npz")) as index:
+            self.image_offsets = index["image_offsets"]
+            self.category_ids = index["category_ids"]
+            self.bboxes = index["bboxes"]
+            self.annotation_ids = index["annotation_ids"]
+        self._images = self._masks = None
+
+    # Open the maps copy-on-write, so the views are writable (torch.from_numpy needs that) but never change the files
+    def _open(self):
+        self._images = self._map("images.u8", (self.meta["images"], self.height, self.width, 3))
+        self._masks = self._map("masks.bits", (self.meta["masks"], self.height, self.width // 8))
+
+    def _map(self, kind, shape):
+        # np.memmap cannot map an empty file
+        if not shape[0]:
+            return np.zeros(shape, dtype = np.uint8)
+        return np.memmap(store_path(self.store_dir, self.name, kind), dtype = np.uint8, mode = "c", shape = shape)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_images"] = state["_masks"] = None
+        return state
+
+    def __len__(self):
+        return self.meta["images"]
+
+    def __getitem__(self, i):
+        """
+        Return sample ``i`` as a dict of ``image`` (H, W, 3) uint8, ``masks``
+        (K, H, W / 8) bit-packed rows, ``category_ids`` (K), ``bboxes`` (K, 4) and ``file_name``.
+        """
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(f"Sample {i} out of range for {len(self)} samples")
+        if self._images is None:
+            self._open()
+        start, end = self.image_offsets[i], self.image_offsets[i + 1]
+        return {"image": self._images[i], "masks": self._masks[start:end],
+                "category_ids": self.category_ids[start:end], "bboxes": self.bboxes[start:end],
+                "file_name": self.meta["file_names"][i]}
+
+    def masks(self, i):
+        """Return the masks of sample ``i`` unpacked to (K, H, W) bool."""
+        return unpack_masks(self[i]["masks"], self.width)
+
+# Function to unpack bit-packed mask rows into boolean masks
+def unpack_masks(packed, width):
+    return np.unpackbits(packed, axis = -1, count = width).view(bool)
+
+# PyTorch Dataset over a mask store
+class MaskStoreDataset:
+    """
+    Map-style dataset for ``torch.utils.data.DataLoader``. Each sample is a
+    dict of ``image`` (3, H, W) uint8 tensor sharing memory with the map,
+    ``masks`` (K, H, W) bool, or still bit-packed (K, H, W / 8) uint8 with
+    ``unpack = False`` to unpack on the GPU, ``category_ids`` and ``bboxes``.
+    Samples have different numbers of masks; batch them with ``collate``.
+
+    Args:
+        store_dir (str): Directory of the store.
+        name (str): Prefix of the store files.
+        unpack (bool): Unpack the masks in the worker.
+        transform (callable or None): Applied to every sample dict.
+    """
+
+    def __init__(self, store_dir, name = "masks", unpack = True, transform = None):
+        import torch
+        self.torch = torch
+        self.store = MaskStore(store_dir, name)
+        self.unpack = unpack
+        self.transform = transform
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["torch"]
+        return state
+
+    def __setstate__(self, state):
+        import torch
+        self.__dict__.update(state, torch = torch)
+
+    def __len__(self):
+        return len(self.store)
+
+    def __getitem__(self, i):
+        torch = self.torch
+        sample = self.store[i]
+        masks = unpack_masks(sample["masks"], self.store.width) if self.unpack else sample["masks"]
+        sample = {"image": torch.from_numpy(sample["image"]).permute(2, 0, 1), "masks": torch.from_numpy(masks),
+                  "category_ids": torch.from_numpy(sample["category_ids"]),
+                  "bboxes": torch.from_numpy(sample["bboxes"])}
+        return self.transform(sample) if self.transform is not None else sample
+
+    # Batch samples: images are stacked, the per-sample masks, categories and boxes stay lists
+    @staticmethod
+    def collate(samples):
+        import torch
+        batch = {"image": torch.stack([sample["image"] for sample in samples])}
+        for key in samples[0]:
+            if key != "image":
+                batch[key] = [sample[key] for sample in samples]
+        return batch
@@ -0,0 +1,128 @@
+# Importing Required Packages
+import math
+import numpy as np
+import instrument
+
+# Segment kinds used in the batched evaluation below
+_LINE, _CUBIC, _QUADRATIC, _ARC = 0, 1, 2, 3
+
+# Function to sample an SVG path into a polyline in one batched NumPy pass
+def sample_path(path_data, samples_per_segment = 25, tolerance = None, dtype = np.float64):
+    """
+    Sample every segment of an SVG path and return the points as one array.
+
+    The ``d`` string is parsed once, the control points of all
+    Line/CubicBezier/QuadraticBezier/Arc segments are gathered into arrays and
+    every sample is evaluated in a single vectorized pass, which replaces the
+    ``for t in np.linspace(0, 1, 25): seg.point(t)`` loop of the converters.
+
+    Args:
+        path_data (str or svgpathtools.Path): Raw SVG path data or a parsed path.
+        samples_per_segment (int): Number of points per segment (both ends included),
+                                   used when no tolerance is given.
+        tolerance (float or None): If set, flatten adaptively so that the chord error
+                                   of every segment stays below this many pixels.
+        dtype: Data type of the returned array. Keep float64 when the points are cast to
+               int32 pixels: float32 rounding moves some of them by one pixel.
+
+    Returns:
+        pts (np.ndarray): Array of shape (N, 2) holding the (x, y) samples.
+    """
+    # svgpathtools takes most of a second to import, so it is loaded on the first call
+    from svgpathtools import parse_path, Line, CubicBezier, QuadraticBezier, Arc
+    if isinstance(path_data, str):
+        with instrument.span("parse_path"):
+            path_obj = parse_path(path_data)
+    else:
+        path_obj = path_data
+    n_segs = len(path_obj)
+    if n_segs == 0:
+        return np.empty((0, 2), dtype = dtype)
+
+    # Gather the control points of every segment (arcs store their parameters)
+    kinds = np.empty(n_segs, dtype = np.int8)
+    ctrl = np.zeros((n_segs, 4), dtype = np.complex128)
+    for i, seg in enumerate(path_obj):
+        if isinstance(seg, Line):
+            kinds[i] = _LINE
+            ctrl[i, 0], ctrl[i, 1] = seg.start, seg.end
+        elif isinstance(seg, CubicBezier):
+            kinds[i] = _CUBIC
+            ctrl[i] = seg.start, seg.control1, seg.control2, seg.end
+        elif isinstance(seg, QuadraticBezier):
+            kinds[i] = _QUADRATIC
+            ctrl[i, :3] = seg.start, seg.control, seg.end
+        elif isinstance(seg, Arc):
+            kinds[i] = _ARC
+            ctrl[i] = seg.center, seg.radius, seg.rot_matrix, complex(seg.theta, seg.delta)
+        else:
+            raise TypeError(f"Unsupported path segment: {type(seg).__name__}")
+
+    # Number of samples for each segment
+    if tolerance is None:
+        counts = np.full(n_segs, samples_per_segment, dtype = np.int64)
+    else:
+        counts = _adaptive_counts(kinds, ctrl, tolerance)
+
+    # Segment index and curve parameter t for every output sample
+    seg_idx = np.repeat(np.arange(n_segs), counts)
+    starts = np.cumsum(counts) - counts
+    step = np.repeat(counts - 1, counts).astype(np.float64)
+    local = np.arange(seg_idx.size) - np.repeat(starts, counts)
+    t = np.divide(local, step, out = np.zeros_like(step), where = step > 0)
+
+    out = np.empty(seg_idx.size, dtype = np.complex128)
+    sample_kinds = kinds[seg_idx]
+
+    for kind, evaluate in ((_LINE, _eval_line), (_CUBIC, _eval_cubic),
+                           (_QUADRATIC, _eval_quadratic), (_ARC, _eval_arc)):
+        sel = sample_kinds == kind
+        if sel.any():
+            out[sel] = evaluate(ctrl[seg_idx[sel]], t[sel])
+
+    pts = np.empty((out.size, 2), dtype = dtype)
+    pts[:, 0] = out.real
+    pts[:, 1] = out.imag
+    return pts
+
+# Same formulas as svgpathtools' segment.point(), applied to whole arrays
+def _eval_line(c, t):
+    return c[:, 0] + (c[:, 1] - c[:, 0]) * t
+
+def _eval_cubic(c, t):
+    p0, p1, p2, p3 = c[:, 0], c[:, 1], c[:, 2], c[:, 3]
+    return p0 + t * (3 * (p1 - p0) + t * (3 * (p0 + p2) - 6 * p1 + t * (-p0 + 3 * (p1 - p2) + p3)))
+
+def _eval_quadratic(c, t):
+    tc = 1 - t
+    return tc * tc * c[:, 0] + 2 * tc * t * c[:, 1] + t * t * c[:, 2]
+
+def _eval_arc(c, t):
+    center, radius, rot = c[:, 0], c[:, 1], c[:, 2]
+    angle = (c[:, 3].real + t * c[:, 3].imag) * math.pi / 180
+    cos_a, sin_a = np.cos(angle), np.sin(angle)
+    x = radius.real * rot.real * cos_a - radius.imag * rot.imag * sin_a + center.real
+    y = radius.real * rot.imag * cos_a + radius.imag * rot.real * sin_a + center.imag
+    return x + y * 1j
+
+# Helper to pick per-segment sample counts from a chord error tolerance
+def _adaptive_counts(kinds, ctrl, tolerance):
+    # Bound on |B''(t)| for each segment; the chord error of n pieces is <= M / (8 n^2)
+    second = np.zeros(len(kinds), dtype = np.float64)
+
+    cubic = kinds == _CUBIC
+    c = ctrl[cubic]
+    second[cubic] = 6 * np.maximum(np.abs(c[:, 0] - 2 * c[:, 1] + c[:, 2]),
+                                   np.abs(c[:, 1] - 2 * c[:, 2] + c[:, 3]))
+
+    quad = kinds == _QUADRATIC
+    c = ctrl[quad]
+    second[quad] = 2 * np.abs(c[:, 0] - 2 * c[:, 1] + c[:, 2])
+
+    arc = kinds == _ARC
+    c = ctrl[arc]
+    sweep = np.radians(np.abs(c[:, 3].imag))
+    second[arc] = np.maximum(c[:, 1].real, c[:, 1].imag) * sweep ** 2
+
+    pieces = np.ceil(np.sqrt(second / (8.0 * max(tolerance, 1e-9))))
+    return np.maximum(pieces, 1).astype(np.int64) + 1
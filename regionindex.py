@@ -0,0 +1,221 @@
+# Importing Required Packages
+import os
+import tempfile
+import numpy as np
+from maskgeometry import rle_to_runs
+from rleencoder import runs_to_rle
+import instrument
+
+# Suffix of the index written next to an SVG or JSON file
+SIDECAR_SUFFIX = ".regions.npz"
+
+# Helper for the sidecar path of an SVG, JSON or JPG output
+def sidecar_path(path):
+    return os.path.splitext(path)[0] + SIDECAR_SUFFIX
+
+# Spatial index over the regions (masks or annotations) of one image
+class RegionIndex:
+    """
+    Answer "which regions are under this point / touch this box" without
+    testing every region.
+
+    A uniform grid over the image lists, per cell, the regions whose bounding
+    box overlaps the cell. A query looks at the regions of the cells it
+    touches, keeps those whose box matches and then tests the region itself on
+    its foreground runs (column-major [start, end) pixel intervals of its RLE),
+    which is a binary search per candidate. All arrays are flat NumPy arrays, so
+    the index is saved as one ``.npz`` sidecar and loaded without parsing.
+
+    Results are region ids in reverse drawing order, so the region drawn on top
+    (the last path of the SVG) comes first.
+
+    Args:
+        rles (list[dict]): COCO RLEs of the regions (compressed or not), in drawing order.
+        ids (list[int] or None): Id of each region, e.g. the annotation id or the path
+            position in the SVG (default: 0..N-1).
+        category_ids (list[int] or None): Category of each region (default: -1).
+        size (tuple or None): (height, width) of the image, needed when there are no regions.
+        grid_size (int or None): Cells per side of the grid (default: about sqrt(N), at most 64).
+    """
+
+    def __init__(self, rles, ids = None, category_ids = None, size = None, grid_size = None):
+        if rles:
+            size = rles[0]["size"]
+        elif size is None:
+            raise ValueError("size (height, width) is required for an index without regions.")
+        self.height, self.width = int(size[0]), int(size[1])
+        n = len(rles)
+        self.ids = np.arange(n, dtype = np.int64) if ids is None else np.asarray(ids, dtype = np.int64)
+        self.category_ids = np.full(n, -1, np.int64) if category_ids is None \
+            else np.asarray(category_ids, dtype = np.int64)
+
+        # Foreground runs of every region, concatenated, with per-region offsets
+        with instrument.span("index_runs"):
+            starts, ends = zip(*[rle_to_runs(rle) for rle in rles]) if rles else ((), ())
+            self.run_offsets = np.concatenate(([0], np.cumsum([len(s) for s in starts]))).astype(np.int64)
+            self.starts = np.concatenate(starts).astype(np.int64) if rles else np.empty(0, np.int64)
+            self.ends = np.concatenate(ends).astype(np.int64) if rles else np.empty(0, np.int64)
+
+        # Pixel boxes [x0, y0, x1, y1), from the runs so they match the RLE exactly
+        self.boxes = np.zeros((n, 4), dtype = np.int64)
+        for i in range(n):
+            s, e = self.run_offsets[i], self.run_offsets[i + 1]
+            if s == e:
+                continue
+            first, last = self.starts[s:e], self.ends[s:e] - 1
+            x0, x1 = first[0] // self.height, last[-1] // self.height
+            # Runs spanning several columns cover the whole height of the inner columns
+            full = (last // self.height) > (first // self.height)
+            y0 = 0 if full.any() else int((first % self.height).min())
+            y1 = self.height if full.any() else int((last % self.height).max()) + 1
+            self.boxes[i] = x0, y0, x1 + 1, y1
+
+        self.grid_size = grid_size or int(np.clip(np.sqrt(n), 1, 64))
+        with instrument.span("index_grid"):
+            self._build_grid()
+        self._prepare()
+
+    # Runs keyed by region, so one searchsorted tests many regions at once
+    def _prepare(self):
+        self.cell_w, self.cell_h = self.width / self.grid_size, self.height / self.grid_size
+        self._pixels = self.height * self.width
+        base = np.repeat(np.arange(len(self.ids), dtype = np.int64) * self._pixels, np.diff(self.run_offsets))
+        self._keyed_starts = self.starts + base
+        self._keyed_ends = self.ends + base
+
+    # Lists of the regions of every grid cell, as one array of items plus offsets per cell
+    def _build_grid(self):
+        g = self.grid_size
+        self.cell_w, self.cell_h = self.width / g, self.height / g
+        boxes = self.boxes[self.run_offsets[1:] > self.run_offsets[:-1]]
+        regions = np.flatnonzero(self.run_offsets[1:] > self.run_offsets[:-1])
+        cx0, cy0 = self._cell(boxes[:, 0], boxes[:, 1])
+        cx1, cy1 = self._cell(boxes[:, 2] - 1, boxes[:, 3] - 1)
+        cols, rows = cx1 - cx0 + 1, cy1 - cy0 + 1
+        per_region = cols * rows
+        region = np.repeat(np.arange(len(boxes)), per_region)
+        local = np.arange(region.size) - np.repeat(np.cumsum(per_region) - per_region, per_region)
+        cell = (cy0[region] + local // cols[region]) * g + cx0[region] + local % cols[region]
+        order = np.argsort(cell, kind = "stable")
+        self.cell_items = regions[region[order]]
+        self.cell_offsets = np.concatenate(([0], np.cumsum(np.bincount(cell, minlength = g * g)))).astype(np.int64)
+
+    def _cell(self, x, y):
+        g = self.grid_size
+        return (np.clip((np.asarray(x) / self.cell_w).astype(np.int64), 0, g - 1),
+                np.clip((np.asarray(y) / self.cell_h).astype(np.int64), 0, g - 1))
+
+    def __len__(self):
+        return len(self.ids)
+
+    # Helper to test, for regions and pixel intervals [lo, hi) broadcast together, whether the region has a pixel there
+    def _hits(self, regions, lo, hi):
+        offset = regions * self._pixels
+        k = np.searchsorted(self._keyed_ends, lo + offset, "right")
+        inside = k < self.run_offsets[regions + 1]
+        return inside & (self._keyed_starts[np.minimum(k, len(self._keyed_starts) - 1)] < hi + offset)
+
+    def at(self, x, y):
+        """Return the ids of the regions covering pixel (x, y), topmost first."""
+        x, y = int(np.floor(x)), int(np.floor(y))
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            return np.empty(0, np.int64)
+        cx, cy = self._cell(x, y)
+        cell = cy * self.grid_size + cx
+        candidates = self.cell_items[self.cell_offsets[cell]:self.cell_offsets[cell + 1]]
+        b = self.boxes[candidates]
+        candidates = candidates[(b[:, 0] <= x) & (x < b[:, 2]) & (b[:, 1] <= y) & (y < b[:, 3])]
+        flat = x * self.height + y
+        return self.ids[candidates[self._hits(candidates, flat, flat + 1)][::-1]]
+
+    def in_box(self, x0, y0, x1, y1, exact = True):
+        """
+        Return the ids of the regions intersecting the box [x0, x1) x [y0, y1),
+        topmost first. With ``exact = False`` only the bounding boxes are compared.
+        """
+        x0, y0 = max(int(np.floor(x0)), 0), max(int(np.floor(y0)), 0)
+        x1, y1 = min(int(np.ceil(x1)), self.width), min(int(np.ceil(y1)), self.height)
+        if x1 <= x0 or y1 <= y0:
+            return np.empty(0, np.int64)
+        (cx0, cy0), (cx1, cy1) = self._cell(x0, y0), self._cell(x1 - 1, y1 - 1)
+        g = self.grid_size
+        cells = (np.arange(cy0, cy1 + 1)[:, None] * g + np.arange(cx0, cx1 + 1)).ravel()
+        candidates = np.unique(np.concatenate(
+            [self.cell_items[self.cell_offsets[c]:self.cell_offsets[c + 1]] for c in cells]))
+        b = self.boxes[candidates]
+        candidates = candidates[(b[:, 0] < x1) & (x0 < b[:, 2]) & (b[:, 1] < y1) & (y0 < b[:, 3])]
+        if exact:
+            # One [column start + y0, column start + y1) interval per column of the box
+            lo = np.arange(x0, x1, dtype = np.int64) * self.height + y0
+            candidates = candidates[self._hits(candidates[:, None], lo, lo + (y1 - y0)).any(axis = 1)]
+        return self.ids[candidates[::-1]]
+
+    def rle(self, position):
+        """Return the COCO RLE of the region at ``position`` (not id) of the index."""
+        s, e = self.run_offsets[position], self.run_offsets[position + 1]
+        return runs_to_rle(self.starts[s:e], self.ends[s:e], self.height, self.width)
+
+    def save(self, path):
+        """Write the index to ``path`` (an uncompressed .npz), atomically."""
+        arrays = {name: getattr(self, name) for name in ("ids", "category_ids", "run_offsets", "starts", "ends",
+                                                         "boxes", "cell_items", "cell_offsets")}
+        arrays["shape"] = np.array([self.height, self.width, self.grid_size], dtype = np.int64)
+        fd, tmp_path = tempfile.mkstemp(dir = os.path.dirname(os.path.abspath(path)), suffix = ".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez(f, **arrays)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return path
+
+    @classmethod
+    def load(cls, path):
+        """Read an index written by ``save``."""
+        index = cls.__new__(cls)
+        with np.load(path) as data:
+            for name in data.files:
+                setattr(index, name, data[name])
+        index.height, index.width, index.grid_size = (int(v) for v in index.shape)
+        del index.shape
+        index._prepare()
+        return index
+
+    @classmethod
+    def from_annotations(cls, annotations, height, width):
+        """Index the annotations of a converter record (``segmentation`` RLE, ``id``, ``category_id``)."""
+        return cls([ann["segmentation"] for ann in annotations], [ann["id"] for ann in annotations],
+                   [ann.get("category_id", -1) for ann in annotations], size = (height, width))
+
+    @classmethod
+    def from_svg(cls, svg_path, height = None, width = None):
+        """
+        Index the paths of an SVG (e.g. written by ``imgsvg.masks_to_svg``) in
+        document order; region ids are the positions of the paths. The image
+        size defaults to the SVG's viewBox, which masks_to_svg sets to the source image.
+        """
+        from xml.etree.ElementTree import iterparse
+        from maskgeometry import path_to_rle
+        from imgsvg import svg_image_size
+        paths = []
+        for event, elem in iterparse(svg_path, events = ("start",)):
+            tag = elem.tag.rsplit("}", 1)[-1]
+            if tag == "svg" and (height is None or width is None):
+                size = svg_image_size(elem)
+                height = size[0] if height is None else height
+                width = size[1] if width is None else width
+            elif tag == "path" and elem.get("d"):
+                paths.append(elem.get("d"))
+        rles = [path_to_rle(d, height, width) for d in paths]
+        return cls(rles, size = (height, width))
+
+# Function to write the sidecar index of a converter record next to its output
+def write_record_index(json_data, output_path):
+    """Index the annotations of ``json_data`` and save them as the sidecar of ``output_path``."""
+    image = json_data["image"]
+    index = RegionIndex.from_annotations(json_data["annotations"], image["height"], image["width"])
+    with instrument.span("index_save"):
+        return index.save(sidecar_path(output_path))
+
@@ -0,0 +1,144 @@
+# Importing Required Packages
+import numpy as np
+import cv2
+import pycocotools.mask as maskUtils
+import instrument
+
+# Function to encode a filled polygon as COCO RLE without a full-frame mask
+def polygon_to_rle(pts, height, width):
+    """
+    Rasterize a polygon with ``cv2.fillPoly`` into a buffer the size of its
+    bounding box only and encode it as COCO RLE for a (height, width) image.
+
+    The result is byte-identical to filling a full ``np.zeros((height, width))``
+    mask and calling ``maskUtils.encode(np.asfortranarray(mask))``.
+
+    Args:
+        pts (np.ndarray): Integer polygon points of shape (N, 1, 2) or (N, 2).
+        height (int): Image height.
+        width (int): Image width.
+
+    Returns:
+        rle (dict): COCO RLE with keys 'size' and 'counts' (bytes).
+    """
+    pts = np.asarray(pts, dtype = np.int32).reshape(-1, 1, 2)
+    x, y, w, h = cv2.boundingRect(pts)
+
+    # Clip the bounding box to the image
+    x0, y0 = max(x, 0), max(y, 0)
+    x1, y1 = min(x + w, width), min(y + h, height)
+    if x1 <= x0 or y1 <= y0:
+        return runs_to_rle(np.empty(0, np.int64), np.empty(0, np.int64), height, width)
+
+    # Fill the polygon into a bbox-sized buffer
+    with instrument.span("rasterize"):
+        crop = np.zeros((y1 - y0, x1 - x0), dtype = np.uint8)
+        cv2.fillPoly(crop, [pts - np.array([x0, y0], dtype = np.int32)], 1)
+    with instrument.span("rle"):
+        return crop_to_rle(crop, x0, y0, height, width)
+
+# Function to encode a bbox-local mask as COCO RLE of the full image
+def crop_to_rle(crop, x0, y0, height, width):
+    """
+    Encode a cropped binary mask placed at (x0, y0) as COCO RLE of the full
+    (height, width) image, walking only the pixels inside the crop.
+
+    Args:
+        crop (np.ndarray): 2D binary mask of the bounding box region.
+        x0 (int): Column of the crop's top-left corner.
+        y0 (int): Row of the crop's top-left corner.
+        height (int): Image height.
+        width (int): Image width.
+
+    Returns:
+        rle (dict): COCO RLE with keys 'size' and 'counts' (bytes).
+    """
+    # Column-major scan of the crop: each row of the transpose is one image column
+    crop = (np.asarray(crop) != 0).view(np.uint8)
+    rows = crop.shape[0]
+    if crop.size == 0:
+        return runs_to_rle(np.empty(0, np.int64), np.empty(0, np.int64), height, width)
+    cols = cv2.transpose(crop)
+
+    # Value changes inside each column, plus runs touching the crop's top or bottom
+    inner = np.flatnonzero(cols[:, 1:] != cols[:, :-1])
+    top = np.flatnonzero(cols[:, 0])
+    bottom = np.flatnonzero(cols[:, -1])
+    col = np.concatenate((inner // max(rows - 1, 1), top, bottom))
+    row = np.concatenate((inner % max(rows - 1, 1) + 1, np.zeros_like(top), np.full_like(bottom, rows)))
+
+    # Flat Fortran-order index of every change in the full image; starts and ends alternate
+    edges = np.sort((x0 + col) * height + y0 + row)
+    starts, ends = edges[0::2], edges[1::2]
+    return runs_to_rle(starts, ends, height, width)
+
+# Function to build COCO RLE from foreground runs [start, end) in Fortran order
+def runs_to_rle(starts, ends, height, width):
+    """
+    Build a compressed COCO RLE from sorted foreground runs.
+
+    Args:
+        starts (np.ndarray): Sorted flat (column-major) indices where runs start.
+        ends (np.ndarray): Matching exclusive end indices.
+        height (int): Image height.
+        width (int): Image width.
+
+    Returns:
+        rle (dict): COCO RLE with keys 'size' and 'counts' (bytes).
+    """
+    starts = np.asarray(starts, dtype = np.int64)
+    ends = np.asarray(ends, dtype = np.int64)
+
+    # Runs that continue from the bottom of one column to the top of the next are one run
+    if starts.size > 1:
+        joined = ends[:-1] == starts[1:]
+        if joined.any():
+            starts = starts[np.concatenate(([True], ~joined))]
+            ends = ends[np.concatenate((~joined, [True]))]
+
+    # Alternate background/foreground lengths, always starting with background
+    bounds = np.empty(2 * starts.size + 2, dtype = np.int64)
+    bounds[0] = 0
+    bounds[1:-1:2] = starts
+    bounds[2:-1:2] = ends
+    bounds[-1] = height * width
+    counts = np.diff(bounds).tolist()
+
+    # pycocotools does not emit a trailing empty background run
+    if len(counts) > 1 and counts[-1] == 0:
+        counts.pop()
+    return maskUtils.frPyObjects({"counts": counts, "size": [height, width]}, height, width)
+
+# Reusable dense mask for callers that still need the full-frame array
+class MaskScratch:
+    """
+    A single (height, width) uint8 mask reused across polygons.
+
+    Each ``fill`` only clears the bounding box written by the previous polygon,
+    and ``encode`` walks the current bounding box instead of copying the whole
+    frame into Fortran order.
+    """
+
+    def __init__(self, height, width):
+        self.height = height
+        self.width = width
+        self.mask = np.zeros((height, width), dtype = np.uint8)
+        self.bbox = (0, 0, 0, 0)
+
+    def fill(self, pts):
+        """Clear the previous polygon and fill ``pts``; returns the dense mask."""
+        x0, y0, x1, y1 = self.bbox
+        self.mask[y0:y1, x0:x1] = 0
+
+        pts = np.asarray(pts, dtype = np.int32).reshape(-1, 1, 2)
+        x, y, w, h = cv2.boundingRect(pts)
+        x0, y0 = max(x, 0), max(y, 0)
+        x1, y1 = max(min(x + w, self.width), x0), max(min(y + h, self.height), y0)
+        cv2.fillPoly(self.mask, [pts], 1)
+        self.bbox = (x0, y0, x1, y1)
+        return self.mask
+
+    def encode(self):
+        """Encode the current mask as COCO RLE."""
+        x0, y0, x1, y1 = self.bbox
+        return crop_to_rle(self.mask[y0:y1, x0:x1], x0, y0, self.height, self.width)
@@ -0,0 +1,158 @@
+# Importing Required Packages
+import math
+import torch
+from segment_anything import SamAutomaticMaskGenerator
+from segment_anything.utils.amg import MaskData, calculate_stability_score, batched_mask_to_box, \
+    is_box_near_crop_edge, uncrop_masks, mask_to_rle_pytorch
+import instrument
+
+# Generation profiles: SamAutomaticMaskGenerator settings plus ``min_area`` (pixels of the image SAM sees)
+PROFILES = {
+    # SAM's own defaults: 32x32 points, no crop layers, nothing pruned by size
+    "default": {},
+    # Structural facade regions: a coarser grid, stricter quality and no masks below 32x32 px
+    "facade": {"points_per_side": 16, "points_per_batch": 128, "pred_iou_thresh": 0.9,
+               "stability_score_thresh": 0.95, "min_area": 1024},
+    # Finer grid plus one layer of 2x2 crops with half the points each, for small openings
+    "facade_fine": {"points_per_side": 32, "points_per_batch": 128, "crop_n_layers": 1,
+                    "crop_n_points_downscale_factor": 2, "pred_iou_thresh": 0.88, "min_area": 256},
+}
+
+# Settings a profile may set
+PROFILE_KEYS = ("points_per_side", "points_per_batch", "pred_iou_thresh", "stability_score_thresh",
+                "stability_score_offset", "box_nms_thresh", "crop_n_layers", "crop_nms_thresh",
+                "crop_overlap_ratio", "crop_n_points_downscale_factor", "min_area")
+
+# Function to turn a profile name or dict, plus overrides, into generator settings
+def resolve_profile(profile = None, **overrides):
+    """
+    Return the settings of ``profile`` (a name of PROFILES, a dict or None for
+    "default") with the overrides that are not None applied on top.
+
+    Raises:
+        ValueError: If the profile name or one of the settings is unknown.
+    """
+    if profile is None or isinstance(profile, str):
+        name = profile or "default"
+        if name not in PROFILES:
+            raise ValueError(f"Unknown generation profile '{name}', expected one of {sorted(PROFILES)}")
+        profile = PROFILES[name]
+    settings = dict(profile)
+    settings.update((key, value) for key, value in overrides.items() if value is not None)
+    unknown = sorted(set(settings) - set(PROFILE_KEYS))
+    if unknown:
+        raise ValueError(f"Unknown generation settings: {unknown}")
+    return settings
+
+# Function to build the mask generator of a profile
+def build_mask_generator(sam, profile = None, output_mode = "binary_mask", **overrides):
+    """
+    Create the mask generator for ``profile`` on an already loaded SAM model.
+
+    Profiles without ``min_area`` get a plain SamAutomaticMaskGenerator, so
+    "default" behaves exactly like ``SamAutomaticMaskGenerator(sam)``.
+    """
+    settings = resolve_profile(profile, **overrides)
+    min_area = settings.pop("min_area", 0)
+    if min_area:
+        return PruningMaskGenerator(sam, min_area = min_area, output_mode = output_mode, **settings)
+    return SamAutomaticMaskGenerator(sam, output_mode = output_mode, **settings)
+
+# SamAutomaticMaskGenerator that drops small and low-quality masks before upsampling them
+class PruningMaskGenerator(SamAutomaticMaskGenerator):
+    """
+    Mask generator that prunes masks while they are still SAM's 256x256 logits.
+
+    The stock generator upsamples the 3 mask logits of every prompt point to
+    the full image before it filters them. Here the predicted-IoU filter and an
+    area estimate on the low-resolution logits run first, so only candidates
+    that can pass are upsampled, checked for stability and RLE-encoded. Masks
+    whose exact area is below ``min_area`` are dropped before NMS, so they are
+    never decoded, sorted or vectorized either.
+
+    Args:
+        model (Sam): The SAM model.
+        min_area (int): Smallest mask area kept, in pixels of the image (or crop) given to SAM.
+        prune_margin (float): Fraction of ``min_area`` the low-resolution estimate must reach;
+            below 1 so masks near the limit are decided on their exact area.
+        **kwargs: Settings of SamAutomaticMaskGenerator.
+    """
+
+    def __init__(self, model, min_area = 0, prune_margin = 0.5, **kwargs):
+        super().__init__(model, **kwargs)
+        self.min_area = min_area
+        self.prune_margin = prune_margin
+        self.pruned = 0
+
+    def _process_crop(self, image, crop_box, crop_layer_idx, orig_size):
+        data = super()._process_crop(image, crop_box, crop_layer_idx, orig_size)
+        # Pruning can leave a crop without masks; keep crop_boxes (N, 4) so merging the crops still works
+        if len(data["rles"]) == 0:
+            data["crop_boxes"] = torch.zeros((0, 4), dtype = torch.int64)
+        return data
+
+    def _process_batch(self, points, im_size, crop_box, orig_size):
+        orig_h, orig_w = orig_size
+        predictor = self.predictor
+        model = predictor.model
+
+        # Run the prompt encoder and mask decoder (SamPredictor.predict_torch without the upsampling)
+        transformed_points = predictor.transform.apply_coords(points, im_size)
+        in_points = torch.as_tensor(transformed_points, device = predictor.device)
+        in_labels = torch.ones(in_points.shape[0], dtype = torch.int, device = in_points.device)
+        sparse_embeddings, dense_embeddings = model.prompt_encoder(
+            points = (in_points[:, None, :], in_labels[:, None]), boxes = None, masks = None)
+        low_res_masks, iou_preds = model.mask_decoder(
+            image_embeddings = predictor.features, image_pe = model.prompt_encoder.get_dense_pe(),
+            sparse_prompt_embeddings = sparse_embeddings, dense_prompt_embeddings = dense_embeddings,
+            multimask_output = True)
+        n_outputs = low_res_masks.shape[1]
+        low_res_masks = low_res_masks.flatten(0, 1)
+        iou_preds = iou_preds.flatten(0, 1)
+
+        # Filter by predicted IoU and by the area estimated on the unpadded part of the logits
+        with instrument.span("prune"):
+            keep = torch.ones_like(iou_preds, dtype = torch.bool)
+            if self.pred_iou_thresh > 0.0:
+                keep &= iou_preds > self.pred_iou_thresh
+            if self.min_area > 0:
+                stride = model.image_encoder.img_size / low_res_masks.shape[-1]
+                valid_h = math.ceil(predictor.input_size[0] / stride)
+                valid_w = math.ceil(predictor.input_size[1] / stride)
+                inside = (low_res_masks[:, :valid_h, :valid_w] > model.mask_threshold).sum(dim = (1, 2))
+                estimate = inside * (im_size[0] * im_size[1] / (valid_h * valid_w))
+                keep &= estimate >= self.min_area * self.prune_margin
+            self.pruned += int((~keep).sum())
+            keep_points = torch.as_tensor(points.repeat(n_outputs, axis = 0))[keep.cpu()]
+            low_res_masks = low_res_masks[keep]
+
+        # Upscale only the masks that are left
+        masks = model.postprocess_masks(low_res_masks[:, None], predictor.input_size, predictor.original_size)[:, 0]
+        data = MaskData(masks = masks, iou_preds = iou_preds[keep], points = keep_points)
+        del masks, low_res_masks
+
+        # Calculate stability score
+        data["stability_score"] = calculate_stability_score(
+            data["masks"], model.mask_threshold, self.stability_score_offset)
+        if self.stability_score_thresh > 0.0:
+            data.filter(data["stability_score"] >= self.stability_score_thresh)
+
+        # Threshold masks, drop the ones below min_area on their exact area and calculate boxes
+        data["masks"] = data["masks"] > model.mask_threshold
+        if self.min_area > 0:
+            keep_mask = data["masks"].sum(dim = (1, 2)) >= self.min_area
+            self.pruned += int((~keep_mask).sum())
+            data.filter(keep_mask)
+        data["boxes"] = batched_mask_to_box(data["masks"])
+
+        # Filter boxes that touch crop boundaries
+        keep_mask = ~is_box_near_crop_edge(data["boxes"], crop_box, [0, 0, orig_w, orig_h])
+        if not torch.all(keep_mask):
+            data.filter(keep_mask)
+
+        # Compress to RLE
+        data["masks"] = uncrop_masks(data["masks"], crop_box, orig_h, orig_w)
+        data["rles"] = mask_to_rle_pytorch(data["masks"])
+        del data["masks"]
+
+        return data
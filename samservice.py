@@ -0,0 +1,252 @@
+# Importing Required Packages
+import os
+import json
+import time
+import queue
+import hashlib
+import logging
+import argparse
+import threading
+import socketserver
+from collections import deque
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+import cv2
+import imgsvg
+import instrument
+
+logger = logging.getLogger(__name__)
+
+# Long-running SAM worker: one warm model, one queue
+class SamService:
+    """
+    Keep one SAM model and its SamAutomaticMaskGenerator loaded and serve
+    mask-to-SVG requests from a queue, one at a time, on a worker thread.
+
+    Args:
+        model_type (str): Key of ``sam_model_registry`` (e.g. 'vit_h', 'vit_b').
+        checkpoint_path (str or None): SAM checkpoint to load.
+        device (str or None): Torch device, e.g. 'cpu' or 'cuda:0' (default: imgsvg.DEVICE).
+        output_dir (str): Directory where the SVG files are written.
+        max_queue (int): Maximum number of waiting requests before new ones are refused.
+        cache_dir (str or None): Directory of the on-disk image embedding cache, if any.
+        profile (str, dict or None): Generation profile of the mask generator (see samprofile).
+    """
+
+    def __init__(self, model_type = imgsvg.model_type, checkpoint_path = imgsvg.checkpoint_path, device = None,
+                 output_dir = "Extracted_MaskImage_SVG", max_queue = 16, cache_dir = None, profile = None):
+        self.model_type = model_type
+        self.device = str(device or imgsvg.DEVICE)
+        self.output_dir = output_dir
+        os.makedirs(output_dir, exist_ok = True)
+
+        logger.info(f"Loading SAM '{model_type}' on {self.device} ...")
+        start = time.perf_counter()
+        self.mask_generator = imgsvg.load_mask_generator(model_type, checkpoint_path, self.device, cache_dir,
+                                                         profile = profile)
+        self.load_seconds = time.perf_counter() - start
+        logger.info(f"SAM model loaded in {self.load_seconds:.1f}s")
+
+        self.started = time.time()
+        self.requests = queue.Queue(maxsize = max_queue)
+        self.lock = threading.Lock()
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.busy = False
+        self.latencies = deque(maxlen = 1000)
+        self.worker = threading.Thread(target = self._run, name = "sam-worker", daemon = True)
+        self.worker.start()
+
+    def submit(self, image_bgr, name):
+        """Queue an image; returns a Future resolving to the SVG text. Raises queue.Full when saturated."""
+        future = Future()
+        try:
+            self.requests.put_nowait((image_bgr, name, future, time.perf_counter()))
+        except queue.Full:
+            with self.lock:
+                self.rejected += 1
+            raise
+        return future
+
+    def _run(self):
+        while True:
+            image_bgr, name, future, queued_at = self.requests.get()
+            if not future.set_running_or_notify_cancel():
+                continue
+            with self.lock:
+                self.busy = True
+            try:
+                _, masks = imgsvg.generate_masks(image_bgr, self.mask_generator)
+                output_filepath = os.path.join(self.output_dir, f"mask_{name}.svg")
+                imgsvg.masks_to_svg(masks, output_filepath, image_size = image_bgr.shape[:2])
+                with open(output_filepath, "r", encoding = "utf-8") as f:
+                    svg = f.read()
+                # Count the request before answering it, so /metrics is current for the client
+                with self.lock:
+                    self.completed += 1
+                    self.latencies.append(time.perf_counter() - queued_at)
+                future.set_result(svg)
+            except Exception as e:
+                with self.lock:
+                    self.failed += 1
+                future.set_exception(e)
+            finally:
+                with self.lock:
+                    self.busy = False
+
+    def health(self):
+        return {"status": "ok", "model_type": self.model_type, "device": self.device,
+                "queue_depth": self.requests.qsize()}
+
+    def metrics(self):
+        with self.lock:
+            latencies = np.array(self.latencies, dtype = np.float64)
+            metrics = {
+                "model_type": self.model_type,
+                "device": self.device,
+                "model_load_seconds": round(self.load_seconds, 3),
+                "uptime_seconds": round(time.time() - self.started, 1),
+                "queue_depth": self.requests.qsize(),
+                "busy": self.busy,
+                "completed": self.completed,
+                "failed": self.failed,
+                "rejected": self.rejected,
+            }
+        if latencies.size:
+            metrics["latency_seconds"] = {
+                "mean": round(float(latencies.mean()), 3),
+                "p50": round(float(np.percentile(latencies, 50)), 3),
+                "p95": round(float(np.percentile(latencies, 95)), 3),
+                "max": round(float(latencies.max()), 3),
+            }
+        if instrument.is_enabled():
+            metrics["stages"] = instrument.snapshot()["stages"]
+        return metrics
+
+# HTTP front end: GET /health, GET /metrics, GET /metrics/prometheus, POST /segment
+class SamRequestHandler(BaseHTTPRequestHandler):
+    service = None
+    timeout_seconds = 600
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send_json(200, self.service.health())
+        elif self.path == "/metrics":
+            self._send_json(200, self.service.metrics())
+        elif self.path == "/metrics/prometheus":
+            payload = instrument.to_prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+        else:
+            self._send_json(404, {"error": f"Unknown endpoint {self.path}"})
+
+    def do_POST(self):
+        if self.path != "/segment":
+            self._send_json(404, {"error": f"Unknown endpoint {self.path}"})
+            return
+
+        # Accept either {"image_path": ...} as JSON or the raw image bytes
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if self.headers.get("Content-Type", "").startswith("application/json"):
+            try:
+                image_path = json.loads(body)["image_path"]
+            except (ValueError, KeyError, TypeError):
+                self._send_json(400, {"error": "Expected a JSON body with an 'image_path' key."})
+                return
+            image_bgr = cv2.imread(image_path)
+            # Images of the same basename in different directories get different SVGs
+            full_path = os.path.realpath(image_path).encode("utf-8")
+            name = f"{os.path.splitext(os.path.basename(image_path))[0]}_{hashlib.sha1(full_path).hexdigest()[:8]}"
+        else:
+            image_bgr = cv2.imdecode(np.frombuffer(body, dtype = np.uint8), cv2.IMREAD_COLOR)
+            name = hashlib.sha1(body).hexdigest()[:8]
+        if image_bgr is None:
+            self._send_json(400, {"error": "Could not read the image."})
+            return
+
+        try:
+            future = self.service.submit(image_bgr, name)
+        except queue.Full:
+            self._send_json(503, {"error": "Request queue is full, try again later."})
+            return
+        try:
+            svg = future.result(timeout = self.timeout_seconds)
+        except Exception as e:
+            self._send_json(500, {"error": str(e)})
+            return
+
+        payload = svg.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "image/svg+xml")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _send_json(self, status, data):
+        payload = json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def address_string(self):
+        # Unix sockets have no client address
+        return self.client_address[0] if self.client_address else "unix"
+
+# HTTP over a Unix domain socket
+class ThreadingUnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+# Function to bind the HTTP server of a service, on TCP (port 0 picks a free port) or a Unix socket
+def make_server(service, host = "127.0.0.1", port = 8765, socket_path = None):
+    handler = type("BoundSamRequestHandler", (SamRequestHandler,), {"service": service})
+    if socket_path:
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        server = ThreadingUnixHTTPServer(socket_path, handler)
+        logger.info(f"SAM service listening on unix socket {socket_path}")
+    else:
+        server = ThreadingHTTPServer((host, port), handler)
+        logger.info(f"SAM service listening on http://{host}:{server.server_address[1]}")
+    return server
+
+# Function to start the service and block serving requests
+def serve(service, host = "127.0.0.1", port = 8765, socket_path = None):
+    server = make_server(service, host, port, socket_path)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return server
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Serve SAM masks as SVG from a warm model.")
+    parser.add_argument("--model-type", default = imgsvg.model_type)
+    parser.add_argument("--checkpoint", default = imgsvg.checkpoint_path, help = "Pass an empty value for untrained weights.")
+    parser.add_argument("--device", default = None, help = "Torch device, e.g. cpu or cuda:0.")
+    parser.add_argument("--host", default = "127.0.0.1")
+    parser.add_argument("--port", type = int, default = 8765)
+    parser.add_argument("--socket", default = None, help = "Serve on this Unix socket instead of TCP.")
+    parser.add_argument("--output-dir", default = "Extracted_MaskImage_SVG")
+    parser.add_argument("--max-queue", type = int, default = 16)
+    parser.add_argument("--embedding-cache", default = None, help = "Directory to cache image embeddings in.")
+    parser.add_argument("--profile", default = "default", help = "Generation profile: default, facade or facade_fine.")
+    parser.add_argument("--instrument", action = "store_true", help = "Record per-stage timing histograms for /metrics.")
+    parser.add_argument("--log-level", default = "INFO", help = "DEBUG, INFO, WARNING or ERROR.")
+    args = parser.parse_args()
+
+    logging.basicConfig(level = args.log_level.upper(), format = "%(message)s")
+    if args.instrument:
+        instrument.enable()
+
+    sam_service = SamService(args.model_type, args.checkpoint or None, args.device, args.output_dir, args.max_queue,
+                             args.embedding_cache, args.profile)
+    serve(sam_service, args.host, args.port, args.socket)
@@ -0,0 +1,170 @@
+# Importing Required Packages
+import io
+import re
+import time
+import base64
+from collections import deque
+from xml.etree.ElementTree import XMLPullParser
+from PIL import Image
+import instrument
+
+# Marker that opens the payload of a base64 data URI
+_B64_MARKER = b";base64,"
+# An attribute holding a data:image URI whose payload starts right after the marker
+_DATA_URI_ATTR = re.compile(rb"""=\s*(["'])data:image/[^"']*$""")
+_IMAGE_TAG = re.compile(rb"^<(?:[\w.-]+:)?image\b")
+# Characters an XML attribute may carry inside base64 text
+_B64_NOISE = re.compile(rb"&#(?:x[0-9a-fA-F]+|[0-9]+);|\s")
+
+# Streaming reader for the Illustrator SVGs of the dataset
+class SvgStreamReader:
+    """
+    Read an SVG in one linear pass, yielding ``(group_id, path_d)`` for every
+    path and decoding the embedded raster of the raster layer on the fly.
+
+    The file is fed in chunks to an ``XMLPullParser``. Base64 payloads of
+    ``data:image`` hrefs are cut out of the byte stream before it reaches the
+    parser and decoded chunk by chunk into a buffer of the binary image (a
+    quarter smaller than its base64 text), which is opened with PIL once the
+    payload ends. Neither the base64 string nor a DOM of the document is
+    held in memory. (PIL's incremental ``ImageFile.Parser`` would not help:
+    it buffers JPEG data until ``close`` as well.)
+
+    ``group_id`` is the stripped, lower-cased id of the innermost ``<g>`` that
+    encloses the path; paths outside any group are not yielded. After the
+    iteration ``image`` holds the first raster found inside the raster layer,
+    or None.
+
+    Args:
+        svg_path (str): Path of the SVG file.
+        raster_layer (str): Id of the group holding the base64 image.
+        chunk_size (int): Number of bytes read per step.
+    """
+
+    def __init__(self, svg_path, raster_layer = "Layer_1", chunk_size = 1 << 16):
+        if chunk_size < 1:
+            raise ValueError(f"chunk_size must be positive, got {chunk_size}")
+        self.svg_path = svg_path
+        self.raster_layer = raster_layer.strip().lower()
+        self.chunk_size = chunk_size
+        self.image = None
+
+    def __iter__(self):
+        self.image = None
+        parser = XMLPullParser(events = ("start", "end"))
+        stack = []          # (tag, group id) of the open elements
+        ready = deque()     # paths parsed but not yielded yet
+        tag_head = b""      # bytes of the tag currently being written to the parser
+        payload = None      # _Base64Image (or False to discard) while inside a payload
+        quote = b'"'
+        tail = b""
+
+        def emit(data):
+            nonlocal tag_head
+            if not data:
+                return
+            parser.feed(data)
+            lt = data.rfind(b"<")
+            tag_head = data[lt:] if lt >= 0 else (tag_head + data)[-4096:]
+            for event, elem in parser.read_events():
+                tag = elem.tag.rsplit("}", 1)[-1]
+                if event == "start":
+                    gid = elem.get("id", "").strip().lower() if tag == "g" else None
+                    stack.append((tag, gid))
+                    if tag == "path":
+                        group = next((g for t, g in reversed(stack) if t == "g"), None)
+                        d = elem.get("d")
+                        if group is not None and d:
+                            ready.append((group, d))
+                else:
+                    stack.pop()
+                    elem.clear()
+
+        with open(self.svg_path, "rb") as f:
+            while True:
+                chunk = f.read(self.chunk_size)
+                data = tail + chunk
+                tail = b""
+
+                while data:
+                    if payload is not None:
+                        # Inside a base64 payload: everything up to the closing quote is image data
+                        end = data.find(quote)
+                        if end < 0:
+                            if payload:
+                                payload.feed(data)
+                            data = b""
+                            break
+                        if payload:
+                            payload.feed(data[:end])
+                            self.image = payload.close()
+                        payload = None
+                        data = data[end:]
+                        continue
+
+                    idx = data.find(_B64_MARKER)
+                    if idx < 0:
+                        # Keep a possible partial marker for the next chunk (all of data if it is shorter)
+                        cut = max(len(data) - (len(_B64_MARKER) - 1), 0) if chunk else len(data)
+                        emit(data[:cut])
+                        tail = data[cut:]
+                        break
+
+                    head_end = idx + len(_B64_MARKER)
+                    emit(data[:head_end])
+                    data = data[head_end:]
+                    attr = _DATA_URI_ATTR.search(tag_head)
+                    if attr is None:
+                        continue
+                    quote = attr.group(1)
+                    wanted = (self.image is None and _IMAGE_TAG.match(tag_head) is not None
+                              and any(t == "g" and g == self.raster_layer for t, g in stack))
+                    payload = _Base64Image() if wanted else False
+
+                while ready:
+                    yield ready.popleft()
+                if not chunk:
+                    break
+
+        parser.close()
+
+# Incremental base64 decoder collecting the binary image, opened with PIL at the end of the payload
+# The decode time of all chunks is reported as one "decode" observation per image
+class _Base64Image:
+    def __init__(self):
+        self._binary = bytearray()
+        self._carry = b""
+        self._pending = b""
+        self._seconds = 0.0
+
+    def feed(self, data):
+        if instrument.is_enabled():
+            start = time.perf_counter()
+            self._feed(data)
+            self._seconds += time.perf_counter() - start
+        else:
+            self._feed(data)
+
+    def _feed(self, data):
+        data = self._pending + data
+        # An entity such as &#10; may be split across chunks
+        amp = data.rfind(b"&")
+        if amp >= 0 and b";" not in data[amp:]:
+            self._pending, data = data[amp:], data[:amp]
+        else:
+            self._pending = b""
+        data = self._carry + _B64_NOISE.sub(b"", data)
+        usable = len(data) - len(data) % 4
+        self._carry = data[usable:]
+        if usable:
+            self._binary += base64.b64decode(data[:usable])
+
+    def close(self):
+        start = time.perf_counter()
+        if self._carry:
+            self._binary += base64.b64decode(self._carry + b"=" * (-len(self._carry) % 4))
+        image = Image.open(io.BytesIO(self._binary))
+        image.load()
+        self._binary = None
+        instrument.record("decode", self._seconds + time.perf_counter() - start)
+        return image
@@ -4,36 +4,299 @@
 # svg_to_image_and_json(path, output_dir = 'outputs')
 
 # Importing Required Packages
-from svgtoroboflow import svg_to_image_and_json
+from svgtoroboflow import svg_to_record, BUILD_PARAMS
+from buildcache import BuildCache, PathCache
+from cocoshard import DatasetWriter
+from categories import CategoryRegistry, CATEGORIES_FILE, remap_category_ids
+from regionindex import write_record_index
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+import instrument
+import argparse
+import datetime
+import itertools
+import logging
+import json
 import os
+import time
 
-# Inference step
-input_dir = "SVGs"
-output_dir = "output" # You can change this to any directory you want
+logger = logging.getLogger(__name__)
 
-# Check if the Input Directory Exists or Not
-if not os.path.isdir(input_dir):
-    print(f"Error: The directory '{input_dir}' does not exist.")
-    print("Please create an 'SVGs' folder and place your SVG files inside.")
+# Function to convert a single SVG file through the build cache
+def convert_with_cache(file_path, output_dir, cache, categories, reuse_outputs = True):
+    """
+    Skip the file if its content is unchanged since the cached build, and
+    otherwise re-rasterize only the paths whose ``d`` string changed.
 
-    # If the Input Directory Exists then go to the next step
-else:
-    
-    # Check if the SVG files are present or not
+    Args:
+        file_path (str): The SVG file.
+        output_dir (str): Directory where outputs are saved.
+        cache (BuildCache): Build-cache manifest to read and update.
+        categories (CategoryRegistry): Registry giving the ``category_id`` of each group.
+        reuse_outputs (bool): For unchanged files whose JSON exists, return no record at all.
+
+    Returns:
+        status (str): "cached" if the file is unchanged, else "ok".
+        output_img (str): Path of the JPG.
+        json_data (dict or None): The record, None when the existing JSON is reused.
+        stats (dict): Number of paths reused from the cache and rasterized.
+    """
+    name = os.path.splitext(os.path.basename(file_path))[0]
+    output_img = os.path.join(output_dir, f"{name}.jpg")
+    file_hash = cache.file_hash(file_path)
+    entry = cache.get(name)
+
+    if entry is not None and entry["file_hash"] == file_hash and os.path.exists(output_img):
+        stats = {"paths_reused": len(entry["annotations"]), "paths_rasterized": 0}
+        if reuse_outputs and os.path.exists(os.path.join(output_dir, f"{name}.json")):
+            return "cached", output_img, None, stats
+        # Rebuild the record from the cache without reading the SVG
+        annotations = [{"id": ann_id, "category_id": categories.id_of(ann["category"]), **entry["paths"][ann["path"]]}
+                       for ann_id, ann in enumerate(entry["annotations"])]
+        return "cached", output_img, {"image": entry["image"], "annotations": annotations}, stats
+
+    path_cache = PathCache(entry["paths"] if entry else None, cache.params)
+    output_img, json_data = svg_to_record(file_path, output_dir, categories, path_cache)
+    cache.put(name, {
+        "file_hash": file_hash,
+        "image": json_data["image"],
+        "annotations": [{"category": categories.name_of(ann["category_id"]), "path": key}
+                        for ann, key in zip(json_data["annotations"], path_cache.keys)],
+        "paths": path_cache.paths
+    })
+    return "ok", output_img, json_data, {"paths_reused": path_cache.hits, "paths_rasterized": path_cache.misses}
+
+# Function to convert a single SVG file and time it (runs inside the worker processes)
+# The JPG is written here; the record, its worker-local category names and the stage timings go back to the parent
+def convert_svg_file(file_path, output_dir, cache_dir = None, reuse_outputs = True):
+    start = time.perf_counter()
+    result = _convert_svg_file(file_path, output_dir, cache_dir, reuse_outputs, start)
+    if instrument.is_enabled():
+        result["metrics"] = instrument.drain()
+    return result
+
+def _convert_svg_file(file_path, output_dir, cache_dir, reuse_outputs, start):
+    try:
+        categories = CategoryRegistry()
+        if cache_dir:
+            cache = BuildCache(cache_dir, BUILD_PARAMS)
+            status, output_img, json_data, stats = convert_with_cache(file_path, output_dir, cache, categories,
+                                                                      reuse_outputs)
+        else:
+            status, stats = "ok", {}
+            output_img, json_data = svg_to_record(file_path, output_dir, categories)
+        return {"svg": file_path, "status": status, "seconds": round(time.perf_counter() - start, 3), **stats,
+                "image": output_img, "record": json_data, "categories": categories.names}
+    except Exception as e:
+        return {"svg": file_path, "status": "error", "seconds": round(time.perf_counter() - start, 3),
+                "error": str(e)}
+
+# Function to convert every SVG in a directory, optionally across a process pool
+def run_batch(input_dir, output_dir, workers = 1, max_in_flight = None, max_tasks_per_child = None,
+              manifest_path = None, dataset = None, shard_size = None, incremental = False, cache_dir = None):
+    """
+    Convert all SVG files of a directory and write a summary manifest.
+
+    Files are fanned out over ``workers`` processes. At most ``max_in_flight``
+    files are submitted at any time, so only that many decoded base64 images
+    are alive at once, and results are recorded as soon as each file finishes.
+    If a worker dies (e.g. killed for memory), the files in flight are marked
+    failed and the rest continue on a new pool. The manifest is written even
+    when the run is interrupted, with the files not processed counted as pending.
+
+    Workers write the JPGs and return the annotation records; this process
+    merges their category ids into one registry and writes one JSON per SVG
+    (with its ``.regions.npz`` index, see regionindex) plus ``categories.json``, or with ``dataset`` appends the records to the
+    sharded JSON Lines dataset ``output_dir/<dataset>-NNNNN.jsonl`` (see cocoshard).
+
+    With ``incremental`` a build cache (see buildcache) records the hash of
+    every SVG and of every path. Unchanged files are skipped, and only the
+    edited paths of changed files are rasterized again. An incremental dataset
+    is rewritten from scratch each run, with unchanged records taken from the cache.
+
+    Args:
+        input_dir (str): Directory holding the SVG files.
+        output_dir (str): Directory where outputs will be saved.
+        workers (int): Number of worker processes; 1 converts in this process.
+        max_in_flight (int or None): Cap on submitted but unfinished files (default 2 x workers).
+        max_tasks_per_child (int or None): Recycle a worker after this many files to release memory.
+        manifest_path (str or None): Where to write the manifest (default output_dir/manifest.json).
+        dataset (str or None): Name of the sharded dataset to append to.
+        shard_size (int or None): Records per dataset shard (default: the dataset's, or 1000).
+        incremental (bool): Reuse unchanged files and paths from the build cache.
+        cache_dir (str or None): Build-cache directory (default output_dir/.build_cache).
 
-    svg_files = [f for f in os.listdir(input_dir) if f.lower().endswith(".svg")]
+    Returns:
+        manifest (dict): Summary with per-file status and timings, or None if nothing ran.
+    """
+    # Check if the Input Directory Exists or Not
+    if not os.path.isdir(input_dir):
+        logger.error(f"The directory '{input_dir}' does not exist.")
+        logger.error("Please create an 'SVGs' folder and place your SVG files inside.")
+        return None
+
+    # Check if the SVG files are present or not
+    svg_files = sorted(f for f in os.listdir(input_dir) if f.lower().endswith(".svg"))
     if not svg_files:
-        print(f"No SVG files found in '{input_dir}'.")
+        logger.warning(f"No SVG files found in '{input_dir}'.")
+        return None
 
-        # If the SVG files are found, go to the next step
+    logger.info(f"Found {len(svg_files)} SVG files to process with {workers} worker(s).")
+    os.makedirs(output_dir, exist_ok = True)
+    file_paths = [os.path.join(input_dir, file_name) for file_name in svg_files]
+    records = []
+    start = time.perf_counter()
+    writer = DatasetWriter(output_dir, dataset, shard_size, overwrite = incremental) if dataset else None
+    if incremental:
+        cache_dir = cache_dir or os.path.join(output_dir, ".build_cache")
+    else:
+        cache_dir = None
+    reuse_outputs = writer is None
+    if writer is not None:
+        categories = writer.categories
     else:
-        print(f"Found {len(svg_files)} SVG files to process.")
-        for file_name in svg_files:
-            file_path = os.path.join(input_dir, file_name)
-            print(f"\n--- Starting processing file: {file_name} ---")
+        categories = CategoryRegistry.load(os.path.join(output_dir, CATEGORIES_FILE), missing_ok = True)
+
+    def record(result):
+        instrument.merge(result.pop("metrics", None))
+        if result["status"] != "error":
+            json_data = result.pop("record")
+            worker_categories = CategoryRegistry(result.pop("categories"))
+            output_img = result.pop("image")
+            if json_data is not None:
+                remap_category_ids(json_data["annotations"], categories.merge(worker_categories))
+            if json_data is None:
+                # Unchanged file, its JSON is already on disk
+                result["outputs"] = [{"image": output_img, "json": os.path.splitext(output_img)[0] + ".json"}]
+            elif writer is not None:
+                result["outputs"] = [{"image": output_img, "image_id": writer.append(json_data)}]
+            else:
+                output_json = os.path.splitext(output_img)[0] + ".json"
+                with instrument.span("serialize"), open(output_json, "w") as f:
+                    json.dump(json_data, f, indent = 4)
+                write_record_index(json_data, output_json)
+                result["outputs"] = [{"image": output_img, "json": output_json}]
+        records.append(result)
+        file_name = os.path.basename(result["svg"])
+        if result["status"] == "cached":
+            logger.info(f"--- Unchanged, reused cached outputs for file: {file_name} [{len(records)}/{len(file_paths)}] ---")
+        elif result["status"] == "ok":
+            logger.info(f"--- Processing finished for file: {file_name} ({result['seconds']:.2f}s) "
+                        f"[{len(records)}/{len(file_paths)}] ---")
+        else:
+            logger.error(f"--- Error processing file: {file_name} ---")
+            logger.error(f"Error details: {result['error']}")
+
+    # Write the summary manifest of the files recorded so far
+    def write_manifest():
+        failed = [r for r in records if r["status"] == "error"]
+        manifest = {
+            "input_dir": input_dir,
+            "output_dir": output_dir,
+            "workers": workers,
+            "dataset": dataset,
+            "date_processed": datetime.datetime.now().isoformat(),
+            "total_seconds": round(time.perf_counter() - start, 3),
+            "succeeded": len(records) - len(failed),
+            "failed": len(failed),
+            "unchanged": sum(r["status"] == "cached" for r in records),
+            "pending": len(file_paths) - len(records),
+            "files": sorted(records, key = lambda r: r["svg"])
+        }
+        with open(manifest_path, "w") as f:
+            json.dump(manifest, f, indent = 4)
+        return manifest
+
+    manifest_path = manifest_path or os.path.join(output_dir, "manifest.json")
+    try:
+        if workers <= 1:
+            for file_path in file_paths:
+                logger.debug(f"--- Starting processing file: {os.path.basename(file_path)} ---")
+                record(convert_svg_file(file_path, output_dir, cache_dir, reuse_outputs))
+        else:
+            max_in_flight = max_in_flight or 2 * workers
+            pending_files = iter(file_paths)
+            in_flight = {}
+            new_pool = lambda: ProcessPoolExecutor(max_workers = workers, max_tasks_per_child = max_tasks_per_child)
+            pool = new_pool()
             try:
-                svg_to_image_and_json(file_path, output_dir)
-                print(f"--- Processing finished for file: {file_name} ---")
-            except Exception as e:
-                print(f"--- Error processing file: {file_name} ---")
-                print(f"Error details: {e}")
\ No newline at end of file
+                while True:
+                    # Top up the pool without queueing the whole directory at once
+                    broken = False
+                    for file_path in pending_files:
+                        try:
+                            future = pool.submit(convert_svg_file, file_path, output_dir, cache_dir, reuse_outputs)
+                        except BrokenProcessPool:
+                            # The pool died while results were recorded; the file goes to the next pool
+                            pending_files, broken = itertools.chain([file_path], pending_files), True
+                            break
+                        in_flight[future] = (file_path, time.perf_counter())
+                        if len(in_flight) >= max_in_flight:
+                            break
+                    if not in_flight:
+                        if not broken:
+                            break
+                        pool = new_pool()
+                        continue
+                    done, _ = wait(in_flight, return_when = FIRST_COMPLETED)
+                    for future in done:
+                        file_path, submitted = in_flight.pop(future)
+                        try:
+                            result = future.result()
+                        except Exception as e:
+                            broken = broken or isinstance(e, BrokenProcessPool)
+                            result = {"svg": file_path, "status": "error",
+                                      "seconds": round(time.perf_counter() - submitted, 3),
+                                      "error": f"{type(e).__name__}: {e}"}
+                        record(result)
+                    if broken and not in_flight:
+                        # The files in flight failed with the dead pool; the rest go to a new one
+                        logger.warning("A worker process died; continuing on a new process pool.")
+                        pool.shutdown(wait = False, cancel_futures = True)
+                        pool = new_pool()
+            finally:
+                pool.shutdown(cancel_futures = True)
+    finally:
+        if writer is not None:
+            writer.close()
+        else:
+            categories.save(os.path.join(output_dir, CATEGORIES_FILE))
+        manifest = write_manifest()
+
+    logger.info(f"Processed {len(records)} files ({manifest['failed']} failed) in {manifest['total_seconds']:.1f}s. "
+                f"Manifest: {manifest_path}")
+    return manifest
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Convert a folder of SVGs into SAM JPG/JSON pairs.")
+    parser.add_argument("--input-dir", default = "SVGs", help = "Directory holding the SVG files.")
+    parser.add_argument("--output-dir", default = "output", help = "Directory where outputs will be saved.")
+    parser.add_argument("--workers", type = int, default = 1, help = "Number of worker processes.")
+    parser.add_argument("--max-in-flight", type = int, default = None,
+                        help = "Maximum files submitted at once (default 2 x workers).")
+    parser.add_argument("--max-tasks-per-child", type = int, default = None,
+                        help = "Restart a worker after this many files.")
+    parser.add_argument("--manifest", default = None, help = "Manifest path (default <output-dir>/manifest.json).")
+    parser.add_argument("--dataset", default = None,
+                        help = "Append to this sharded JSON Lines dataset instead of one JSON per SVG.")
+    parser.add_argument("--shard-size", type = int, default = None,
+                        help = "Records per dataset shard (default: the dataset's, or 1000).")
+    parser.add_argument("--incremental", action = "store_true",
+                        help = "Skip unchanged SVGs and re-rasterize only edited paths, using the build cache.")
+    parser.add_argument("--cache-dir", default = None, help = "Build-cache directory (default <output-dir>/.build_cache).")
+    parser.add_argument("--log-level", default = "INFO", help = "DEBUG, INFO, WARNING or ERROR.")
+    parser.add_argument("--metrics", default = None,
+                        help = "Write per-stage timing histograms here (.json, or .prom for Prometheus text).")
+    parser.add_argument("--metrics-memory", action = "store_true", help = "Also record peak traced memory per stage.")
+    args = parser.parse_args()
+
+    logging.basicConfig(level = args.log_level.upper(), format = "%(message)s")
+    if args.metrics:
+        instrument.enable(memory = args.metrics_memory)
+
+    run_batch(args.input_dir, args.output_dir, workers = args.workers, max_in_flight = args.max_in_flight,
+              max_tasks_per_child = args.max_tasks_per_child, manifest_path = args.manifest,
+              dataset = args.dataset, shard_size = args.shard_size, incremental = args.incremental,
+              cache_dir = args.cache_dir)
+    if args.metrics:
+        instrument.export(args.metrics)
@@ -0,0 +1,25 @@
+# The modules live at the top of the repository
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pytest
+
+# Untrained vit_b on the CPU, shared by the tests that run SAM (imgsvg keeps one model per key)
+@pytest.fixture(scope = "session")
+def sam_vit_b():
+    pytest.importorskip("segment_anything")
+    import imgsvg
+    return imgsvg.load_sam_model("vit_b", None, "cpu")
+
+# Generation settings that keep the masks of an untrained model: a 2x2 point grid and no quality filters
+SAM_TEST_PROFILE = {"points_per_side": 2, "points_per_batch": 4, "pred_iou_thresh": 0.0,
+                    "stability_score_thresh": 0.0}
+
+# Helper for a small RGB test image with some structure
+def sam_test_image(height, width, seed = 0):
+    rng = np.random.default_rng(seed)
+    image = np.repeat(np.repeat(rng.integers(0, 255, (height // 8 + 1, width // 8 + 1, 3)), 8, 0), 8, 1)
+    return np.ascontiguousarray(image[:height, :width].astype(np.uint8))
@@ -0,0 +1,76 @@
+# Importing Required Packages
+import os
+import numpy as np
+from batchsegment import iter_image_paths
+
+def _touch(path):
+    os.makedirs(os.path.dirname(path), exist_ok = True)
+    open(path, "wb").close()
+
+def _names(images):
+    return [name for _, name in images]
+
+def test_directory_names_keep_subdirectories(tmp_path):
+    for relative in ("b.png", "a.jpg", "sub/a.jpg", "notes.txt"):
+        _touch(str(tmp_path / relative))
+    images = iter_image_paths([str(tmp_path)])
+    assert _names(images) == ["a", "b", "sub_a"]
+    assert images[2][0] == os.path.join(str(tmp_path), "sub", "a.jpg")
+
+def test_clashing_names_are_disambiguated(tmp_path):
+    for relative in ("x/1.jpg", "y/1.jpg", "z/1.jpg", "z/1.png", "a/1.jpg", "a_1.jpg", "solo.jpg"):
+        _touch(str(tmp_path / relative))
+    cases = [
+        [str(tmp_path / "*" / "1.jpg")],                          # glob matches in several directories
+        [str(tmp_path / "x"), str(tmp_path / "y")],               # two input directories
+        [str(tmp_path / "z" / "1.jpg"), str(tmp_path / "z" / "1.png")],
+        [str(tmp_path)],                                          # a/1.jpg next to a_1.jpg
+    ]
+    for inputs in cases:
+        images = iter_image_paths(inputs)
+        names = _names(images)
+        assert len(names) == len(set(names)), (inputs, names)
+        # Deterministic: the same inputs give the same names
+        assert iter_image_paths(inputs) == images
+    names = _names(iter_image_paths([str(tmp_path)]))
+    assert "solo" in names and not any(name == "a_1" for name in names)
+
+def test_repeated_file_is_kept_once(tmp_path):
+    _touch(str(tmp_path / "1.jpg"))
+    images = iter_image_paths([str(tmp_path), str(tmp_path / "1.jpg"), str(tmp_path / "*.jpg")])
+    assert _names(images) == ["1"]
+
+def test_batched_encoding_matches_stock_generator(sam_vit_b, tmp_path, monkeypatch):
+    import cv2
+    import batchsegment
+    import samprofile
+    from conftest import SAM_TEST_PROFILE, sam_test_image
+    images = {"a": sam_test_image(48, 80, seed = 1), "b": sam_test_image(64, 64, seed = 2)}
+    for name, image in images.items():
+        cv2.imwrite(str(tmp_path / f"{name}.png"), cv2.cvtColor(image, cv2.COLOR_RGB2BGR))
+
+    # Capture the RLEs handed to the SVG writer
+    written = {}
+    monkeypatch.setattr(batchsegment, "write_svg", lambda rles, output_filepath, *args, **kwargs:
+                        written.setdefault(os.path.basename(output_filepath), rles))
+    results = batchsegment.segment_images([str(tmp_path)], str(tmp_path / "svg"), model_type = "vit_b",
+                                          checkpoint_path = None, device = "cpu", profile = SAM_TEST_PROFILE,
+                                          batch_size = 2, svg_workers = 0)
+    assert [result["status"] for result in results] == ["ok", "ok"]
+
+    stock = samprofile.build_mask_generator(sam_vit_b, SAM_TEST_PROFILE, output_mode = "coco_rle")
+    for name, image in images.items():
+        records = sorted(stock.generate(image), key = lambda record: record["area"], reverse = True)
+        assert records
+        assert written[f"mask_{name}.svg"] == [record["segmentation"] for record in records]
+
+def test_precomputed_tensor_features_skip_numpy(sam_vit_b):
+    # encode_batch hands over tensors that may live on the GPU, where a NumPy round trip fails
+    import torch
+    from segment_anything import SamPredictor
+    from embeddingcache import set_image_features
+    predictor = SamPredictor(sam_vit_b)
+    features = torch.zeros(1, 256, 64, 64)
+    set_image_features(predictor, np.zeros((48, 80, 3), dtype = np.uint8), features)
+    assert predictor.features is features
+    assert predictor.original_size == (48, 80) and predictor.input_size == (614, 1024)
@@ -0,0 +1,106 @@
+# Importing Required Packages
+import os
+import re
+import datetime
+import types
+import pytest
+import svgtoroboflow
+import svgtorbfsam_inference
+from buildcache import BuildCache, PathCache
+from bench_pipeline import make_facade_svg
+
+NAMES = ("a", "b")
+EDITED_PATH = "M10,10 L30,10 L30,25 L10,25 Z"
+
+# Fixed clock for date_captured, so two builds of a file write the same bytes
+class _FixedDatetime(datetime.datetime):
+    @classmethod
+    def now(cls, tz = None):
+        return cls(2024, 1, 1)
+
+@pytest.fixture(autouse = True)
+def fixed_clock(monkeypatch):
+    monkeypatch.setattr(svgtoroboflow, "datetime", types.SimpleNamespace(datetime = _FixedDatetime))
+
+@pytest.fixture
+def input_dir(tmp_path):
+    svg_dir = tmp_path / "svgs"
+    svg_dir.mkdir()
+    for i, name in enumerate(NAMES):
+        make_facade_svg(str(svg_dir / f"{name}.svg"), categories = ("wall", "window"), paths_per_category = 2,
+                        raster_size = (64, 48), seed = i)
+    return str(svg_dir)
+
+def _build(input_dir, output_dir, incremental = True):
+    manifest = svgtorbfsam_inference.run_batch(input_dir, output_dir, incremental = incremental)
+    return {os.path.splitext(os.path.basename(entry["svg"]))[0]: entry for entry in manifest["files"]}
+
+# Bytes of every output of a file (image, record and its region index), but not the manifest or the cache
+def _outputs(output_dir, name):
+    outputs = {}
+    for file_name in sorted(os.listdir(output_dir)):
+        if file_name.startswith(name + "."):
+            with open(os.path.join(output_dir, file_name), "rb") as f:
+                outputs[file_name] = f.read()
+    return outputs
+
+def _edit_first_path(svg_path):
+    with open(svg_path, "r", encoding = "utf-8") as f:
+        text = f.read()
+    with open(svg_path, "w", encoding = "utf-8") as f:
+        f.write(re.sub(r'<path([^>]*) d="[^"]*"', rf'<path\1 d="{EDITED_PATH}"', text, count = 1))
+
+def test_unchanged_files_are_skipped(input_dir, tmp_path):
+    output_dir = str(tmp_path / "out")
+    first = _build(input_dir, output_dir)
+    assert all(entry["status"] == "ok" and entry["paths_rasterized"] == 4 for entry in first.values())
+    outputs = _outputs(output_dir, "a")
+
+    second = _build(input_dir, output_dir)
+    assert all(entry["status"] == "cached" and entry["paths_rasterized"] == 0 for entry in second.values())
+    assert _outputs(output_dir, "a") == outputs
+
+def test_edited_path_is_the_only_one_rasterized(input_dir, tmp_path):
+    output_dir = str(tmp_path / "out")
+    _build(input_dir, output_dir)
+    _edit_first_path(os.path.join(input_dir, "a.svg"))
+
+    files = _build(input_dir, output_dir)
+    assert (files["a"]["status"], files["a"]["paths_reused"], files["a"]["paths_rasterized"]) == ("ok", 3, 1)
+    assert files["b"]["status"] == "cached"
+
+    # The incremental outputs are those of a build from scratch
+    clean_dir = str(tmp_path / "clean")
+    _build(input_dir, clean_dir, incremental = False)
+    assert _outputs(output_dir, "a") == _outputs(clean_dir, "a")
+
+def test_other_build_params_invalidate_everything(input_dir, tmp_path, monkeypatch):
+    output_dir = str(tmp_path / "out")
+    _build(input_dir, output_dir)
+    monkeypatch.setattr(svgtorbfsam_inference, "BUILD_PARAMS", svgtoroboflow.BUILD_PARAMS.replace("size=", "size=2x"))
+
+    files = _build(input_dir, output_dir)
+    assert all((entry["status"], entry["paths_reused"], entry["paths_rasterized"]) == ("ok", 0, 4)
+               for entry in files.values())
+
+def test_deleted_outputs_are_rebuilt(input_dir, tmp_path):
+    output_dir = str(tmp_path / "out")
+    _build(input_dir, output_dir)
+    outputs = _outputs(output_dir, "a")
+
+    # A missing record is written again from the cache
+    os.remove(os.path.join(output_dir, "a.json"))
+    files = _build(input_dir, output_dir)
+    assert files["a"]["status"] == "cached" and _outputs(output_dir, "a") == outputs
+
+    # A missing image rebuilds the file, with the geometry of its paths still cached
+    os.remove(os.path.join(output_dir, "a.jpg"))
+    files = _build(input_dir, output_dir)
+    assert (files["a"]["status"], files["a"]["paths_reused"], files["a"]["paths_rasterized"]) == ("ok", 4, 0)
+    assert _outputs(output_dir, "a") == outputs
+
+def test_cache_entries_are_keyed_by_params(tmp_path):
+    BuildCache(str(tmp_path), "size=1024x1024").put("a", {"file_hash": "0", "paths": {}})
+    assert BuildCache(str(tmp_path), "size=1024x1024").get("a")["file_hash"] == "0"
+    assert BuildCache(str(tmp_path), "size=512x512").get("a") is None
+    assert PathCache(params = "size=1024x1024").key("M0,0 Z") != PathCache(params = "size=512x512").key("M0,0 Z")
@@ -0,0 +1,34 @@
+# Importing Required Packages
+import numpy as np
+import pytest
+from categories import CategoryRegistry, remap_category_ids
+
+def test_merge_keeps_ids_and_remaps_annotations(tmp_path):
+    dataset = CategoryRegistry(["wall", "window", "door"])
+    worker = CategoryRegistry(["Roof", "Front Window", "WALL", "front-window"])
+    assert worker.names == ["roof", "front_window", "wall"]
+    annotations = [{"id": n, "category_id": worker.id_of(name)} for n, name in enumerate(["wall", "roof", "front window"])]
+
+    remap = dataset.merge(worker)
+    assert remap.tolist() == [0, 4, 5, 1]
+    assert dataset.names == ["wall", "window", "door", "roof", "front_window"]
+    remap_category_ids(annotations, remap)
+    assert [dataset.name_of(ann["category_id"]) for ann in annotations] == ["wall", "roof", "front_window"]
+
+    # Ids survive a save and load, and merging the same names again changes nothing
+    path = str(tmp_path / "categories.json")
+    dataset.save(path)
+    loaded = CategoryRegistry.load(path)
+    assert loaded.names == dataset.names and loaded.ids == dataset.ids
+    assert loaded.merge(worker).tolist() == remap.tolist() and len(loaded) == 5
+    assert loaded.merge(CategoryRegistry()).tolist() == [0]
+
+def test_load_and_from_coco(tmp_path):
+    assert len(CategoryRegistry.load(str(tmp_path / "missing.json"), missing_ok = True)) == 0
+    with pytest.raises(FileNotFoundError):
+        CategoryRegistry.load(str(tmp_path / "missing.json"))
+    with pytest.raises(ValueError):
+        CategoryRegistry.from_coco([{"id": 1, "name": "wall"}, {"id": 3, "name": "window"}])
+    registry = CategoryRegistry.from_coco([{"id": 2, "name": "window"}, {"id": 1, "name": "wall"}])
+    assert registry.get("Window") == 2 and registry.get("door") is None and "door" not in registry
+    assert np.array_equal(registry.one_hot([2, 1]), [[0, 1], [1, 0]])
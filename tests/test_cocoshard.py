@@ -0,0 +1,44 @@
+# Importing Required Packages
+import os
+import pytest
+from cocoshard import DatasetWriter, DatasetReader, INDEX_DTYPE, shard_index_paths, stored_shard_size
+
+def _record(n):
+    return {"image": {"file_name": f"image_{n}.jpg", "height": 4, "width": 4}, "annotations": []}
+
+def _write(output_dir, count, **kwargs):
+    with DatasetWriter(output_dir, "data", **kwargs) as writer:
+        for n in range(count):
+            writer.append(_record(n))
+
+def test_reopen_keeps_the_shard_size(tmp_path):
+    _write(str(tmp_path), 5, shard_size = 2)
+    assert stored_shard_size(str(tmp_path), "data") == 2
+
+    # Reopening without a size continues with the stored one
+    _write(str(tmp_path), 2)
+    sizes = [os.path.getsize(p) // INDEX_DTYPE.itemsize for p in shard_index_paths(str(tmp_path), "data")]
+    assert sizes == [2, 2, 2, 1]
+    with DatasetReader(str(tmp_path), "data") as reader:
+        assert [record["image"]["image_id"] for record in reader] == list(range(7))
+
+def test_reopen_with_another_shard_size_is_refused(tmp_path):
+    _write(str(tmp_path), 3, shard_size = 2)
+    with pytest.raises(ValueError):
+        DatasetWriter(str(tmp_path), "data", shard_size = 1000)
+
+    # Overwriting starts over with the new size
+    _write(str(tmp_path), 3, shard_size = 1000, overwrite = True)
+    assert stored_shard_size(str(tmp_path), "data") == 1000
+    assert len(shard_index_paths(str(tmp_path), "data")) == 1
+
+def test_index_follows_flushed_records(tmp_path):
+    writer = DatasetWriter(str(tmp_path), "data", shard_size = 10)
+    for n in range(3):
+        writer.append(_record(n))
+    # Nothing is indexed before the shard is flushed
+    assert len(DatasetReader(str(tmp_path), "data")) == 0
+    writer.flush()
+    with DatasetReader(str(tmp_path), "data") as reader:
+        assert len(reader) == 3 and reader[2]["image"]["file_name"] == "image_2.jpg"
+    writer.close()
@@ -0,0 +1,60 @@
+# Importing Required Packages
+import os
+import time
+import numpy as np
+import pytest
+from conftest import sam_test_image
+from embeddingcache import EmbeddingCache, install_embedding_cache
+
+def _entry_size(cache, key):
+    return os.path.getsize(os.path.join(cache.cache_dir, f"{key}.npy"))
+
+def test_cache_hit_reproduces_set_image(sam_vit_b, tmp_path):
+    segment_anything = pytest.importorskip("segment_anything")
+    image = sam_test_image(48, 80)
+    point = (np.array([[40, 24]]), np.array([1]))
+
+    # The miss runs the stock set_image, whose state is the reference
+    cache = EmbeddingCache(str(tmp_path))
+    predictor = install_embedding_cache(segment_anything.SamPredictor(sam_vit_b), cache, "vit_b", None)
+    predictor.set_image(image)
+    features = predictor.features.clone()
+    sizes = (predictor.original_size, predictor.input_size)
+    masks, scores, logits = predictor.predict(*point)
+
+    # A new predictor on the same cache directory reads the embedding instead of encoding
+    cache = EmbeddingCache(str(tmp_path))
+    predictor = install_embedding_cache(segment_anything.SamPredictor(sam_vit_b), cache, "vit_b", None)
+    predictor.set_image(image)
+    assert (cache.hits, cache.misses) == (1, 0)
+    assert predictor.is_image_set and (predictor.original_size, predictor.input_size) == sizes
+    assert np.array_equal(predictor.features.numpy(), features.numpy())
+    cached_masks, cached_scores, cached_logits = predictor.predict(*point)
+    assert np.array_equal(cached_masks, masks) and np.array_equal(cached_scores, scores)
+    assert np.array_equal(cached_logits, logits)
+
+    # Another channel order, model or checkpoint is another entry
+    key = cache.key(image, "vit_b", "untrained")
+    assert key != cache.key(image, "vit_b", "untrained", "BGR") and key != cache.key(image, "vit_h", "untrained")
+
+def test_least_recently_used_entries_are_evicted_first(tmp_path):
+    cache = EmbeddingCache(str(tmp_path), max_bytes = 1 << 30)
+    features = np.zeros((1, 4, 16, 16), dtype = np.float32)
+    for key in ("a", "b"):
+        cache.put(key, features)
+    entry_size = _entry_size(cache, "a")
+    now = time.time()
+    os.utime(os.path.join(cache.cache_dir, "a.npy"), (now - 100, now - 100))
+    os.utime(os.path.join(cache.cache_dir, "b.npy"), (now - 50, now - 50))
+
+    # Reading "a" makes "b" the least recently used, so it goes when "c" exceeds a budget of two entries
+    cache.max_bytes = 2 * entry_size
+    assert cache.get("a") is not None
+    cache.put("c", features)
+    assert sorted(os.listdir(cache.cache_dir)) == ["a.npy", "c.npy"]
+    assert cache.get("b") is None and cache.misses == 1
+
+    # A smaller budget keeps only the newest entry
+    cache.max_bytes = entry_size
+    cache.evict()
+    assert os.listdir(cache.cache_dir) == ["c.npy"]
@@ -0,0 +1,91 @@
+# Importing Required Packages
+import os
+import json
+import time
+import logging
+import openpyxl
+import excelpathtorbfsam
+from excelpathtorbfsam import convert_excel
+from categories import CategoryRegistry, CATEGORIES_FILE
+
+SQUARE = "M100,100 L300,100 L300,300 L100,300 Z"
+
+_convert_row = excelpathtorbfsam.convert_row
+
+# Worker function that holds back the first row, so later rows finish before it
+def _slow_first_row(index, paths_str):
+    if index == 0:
+        time.sleep(1.0)
+    return _convert_row(index, paths_str)
+
+def _workbook(path, rows):
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.append(["id", "paths"])
+    for row in rows:
+        sheet.append(row)
+    workbook.save(path)
+    return str(path)
+
+def _load(output_dir, n):
+    with open(os.path.join(output_dir, f"Image_{n}.json"), "r") as f:
+        return json.load(f)
+
+# Category names of the annotations of Image_n.json
+def _category_names(output_dir, n):
+    categories = CategoryRegistry.load(os.path.join(output_dir, CATEGORIES_FILE))
+    return [categories.name_of(ann["category_id"]) for ann in _load(output_dir, n)["annotations"]]
+
+def _outputs(output_dir):
+    return sorted(f for f in os.listdir(output_dir) if f.startswith("Image_") and f.endswith(".json"))
+
+def _finished(caplog):
+    return [r.getMessage().rsplit(" ", 1)[1] for r in caplog.records if r.getMessage().startswith("Processing finished")]
+
+def test_rows_without_paths_get_an_empty_record(tmp_path):
+    excel = _workbook(tmp_path / "rows.xlsx", [[1, json.dumps({"wall": SQUARE})], [2, json.dumps({"wall": ""})],
+                                               [3, json.dumps({"window": SQUARE})]])
+    output_dir = str(tmp_path / "out")
+    convert_excel(excel, output_dir)
+    assert _load(output_dir, 2)["annotations"] == []
+    assert len(_load(output_dir, 1)["annotations"]) == 1 and len(_load(output_dir, 3)["annotations"]) == 1
+
+def test_workers_name_files_by_row_whatever_order_they_finish_in(tmp_path, monkeypatch, caplog):
+    monkeypatch.setattr(excelpathtorbfsam, "convert_row", _slow_first_row)
+    excel = _workbook(tmp_path / "rows.xlsx", [[n, json.dumps({f"category_{n}": SQUARE})] for n in range(1, 5)])
+    output_dir = str(tmp_path / "out")
+    with caplog.at_level(logging.INFO, logger = "excelpathtorbfsam"):
+        convert_excel(excel, output_dir, workers = 2, max_in_flight = 2)
+    assert _finished(caplog)[-1] == "Image_1.json"
+    for n in range(1, 5):
+        assert _category_names(output_dir, n) == [f"category_{n}"]
+
+def test_resume_skips_converted_rows(tmp_path):
+    excel = _workbook(tmp_path / "rows.xlsx", [[n, json.dumps({"wall": SQUARE})] for n in range(1, 4)])
+    output_dir = str(tmp_path / "out")
+    convert_excel(excel, output_dir)
+    with open(os.path.join(output_dir, "Image_1.json"), "w") as f:
+        json.dump({"kept": True}, f)
+    os.remove(os.path.join(output_dir, "Image_2.json"))
+
+    convert_excel(excel, output_dir, resume = True)
+    assert _load(output_dir, 1) == {"kept": True}
+    assert len(_load(output_dir, 2)["annotations"]) == 1 and _outputs(output_dir) == ["Image_1.json", "Image_2.json",
+                                                                                         "Image_3.json"]
+
+def test_blank_rows_keep_the_numbering(tmp_path):
+    excel = _workbook(tmp_path / "rows.xlsx", [[1, json.dumps({"wall": SQUARE})], [None, None],
+                                               [3, json.dumps({"window": SQUARE})]])
+    output_dir = str(tmp_path / "out")
+    convert_excel(excel, output_dir)
+    assert _outputs(output_dir) == ["Image_1.json", "Image_3.json"]
+    assert _category_names(output_dir, 3) == ["window"]
+
+def test_bad_rows_are_logged_and_skipped(tmp_path, caplog):
+    excel = _workbook(tmp_path / "rows.xlsx", [[1, "{not json"], [2, None], [3, json.dumps({"wall": SQUARE})]])
+    output_dir = str(tmp_path / "out")
+    with caplog.at_level(logging.WARNING, logger = "excelpathtorbfsam"):
+        convert_excel(excel, output_dir)
+    warnings = [r.getMessage() for r in caplog.records if r.levelno == logging.WARNING]
+    assert len(warnings) == 2 and "row 0" in warnings[0] and "invalid JSON" in warnings[0] and "row 1" in warnings[1]
+    assert _outputs(output_dir) == ["Image_3.json"]
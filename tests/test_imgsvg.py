@@ -0,0 +1,66 @@
+# Importing Required Packages
+from xml.etree import ElementTree
+import numpy as np
+import cv2
+import pytest
+import imgsvg
+import pycocotools.mask as maskUtils
+from maskgeometry import path_to_rle
+from regionindex import RegionIndex
+
+def _svg_root(path):
+    return ElementTree.parse(path).getroot()
+
+def _view_box(root):
+    return [float(v) for v in root.get("viewBox").replace(",", " ").split()]
+
+def test_canvas_is_the_image_size(tmp_path):
+    mask = np.zeros((300, 500), dtype = bool)
+    mask[50:150, 100:400] = True
+    output = str(tmp_path / "mask.svg")
+    assert imgsvg.masks_to_svg([mask], output) == [0]
+    root = _svg_root(output)
+    assert (root.get("width"), root.get("height")) == ("500px", "300px")
+    assert _view_box(root) == [0, 0, 500, 300]
+
+def test_large_image_crops_use_original_coordinates(tmp_path):
+    # A 6000x4000 image processed at scale 0.1: one crop at (500, 300) of the downscaled image
+    crop = np.zeros((40, 60), dtype = bool)
+    crop[5:35, 5:55] = True
+    output = str(tmp_path / "large.svg")
+    imgsvg.masks_to_svg([crop], output, offsets = [np.array([500, 300])], scale = 0.1, image_size = (4000, 6000))
+    root = _svg_root(output)
+    assert _view_box(root) == [0, 0, 6000, 4000]
+    path = next(elem for elem in root.iter() if elem.tag.endswith("path"))
+    coords = np.array([float(v) for v in path.get("d").replace("M", " ").replace("L", " ").replace("Z", " ")
+                       .replace(",", " ").split()]).reshape(-1, 2)
+    assert coords[:, 0].min() >= 5000 and coords[:, 0].max() <= 5600
+    assert coords[:, 1].min() >= 3000 and coords[:, 1].max() <= 3400
+    with pytest.raises(ValueError):
+        imgsvg.masks_to_svg([crop], output, offsets = [np.array([0, 0])])
+
+def test_region_index_reads_the_svg_size(tmp_path):
+    mask = np.zeros((300, 500), dtype = np.uint8)
+    cv2.circle(mask, (420, 200), 40, 1, -1)
+    output = str(tmp_path / "mask.svg")
+    imgsvg.masks_to_svg([mask > 0], output)
+    index = RegionIndex.from_svg(output)
+    assert (index.height, index.width) == (300, 500)
+    assert list(index.at(420, 200)) == [0]
+    assert list(index.at(100, 100)) == []
+
+def test_holes_stay_empty_when_rasterized(tmp_path):
+    mask = np.zeros((200, 300), dtype = bool)
+    mask[40:160, 60:240] = True
+    mask[80:120, 120:180] = False
+    output = str(tmp_path / "ring.svg")
+    imgsvg.masks_to_svg([mask], output, tolerance = 0.5)
+    path = next(elem for elem in _svg_root(output).iter() if elem.tag.endswith("path"))
+    assert path.get("fill-rule") == "evenodd" and path.get("d").count("M") == 2
+
+    # The hole comes back empty, and the ring matches the mask up to its outline
+    decoded = maskUtils.decode(path_to_rle(path.get("d"), 200, 300)).astype(bool)
+    assert not decoded[85:115, 125:175].any() and decoded[45:75, 65:235].all()
+    assert (decoded & mask).sum() / (decoded | mask).sum() > 0.95
+    index = RegionIndex.from_svg(output)
+    assert list(index.at(150, 100)) == [] and list(index.at(100, 50)) == [0]
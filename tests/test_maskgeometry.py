@@ -0,0 +1,107 @@
+# Importing Required Packages
+import json
+from xml.etree import ElementTree
+import numpy as np
+import pytest
+import pycocotools.mask as maskUtils
+import imgsvg
+import maskgeometry
+from regionindex import RegionIndex, sidecar_path
+
+def _random_mask(rng, height, width):
+    mask = np.zeros((height, width), dtype = bool)
+    for _ in range(rng.integers(0, 4)):
+        x0, y0 = rng.integers(0, width), rng.integers(0, height)
+        mask[y0:y0 + rng.integers(1, height + 1), x0:x0 + rng.integers(1, width + 1)] = True
+    mask ^= rng.random((height, width)) < 0.05
+    return mask
+
+def _encode(mask):
+    return maskUtils.encode(np.asfortranarray(mask.astype(np.uint8)))
+
+def _decode(rle):
+    return maskUtils.decode(maskgeometry._compressed(rle)).astype(bool)
+
+@pytest.mark.parametrize("seed", range(20))
+def test_operations_match_dense_masks(seed):
+    rng = np.random.default_rng(seed)
+    height, width = rng.integers(1, 40, size = 2)
+    masks = [_random_mask(rng, height, width) for _ in range(3)]
+    rles = [_encode(mask) for mask in masks]
+    assert np.array_equal(_decode(maskgeometry.rle_union(rles)), masks[0] | masks[1] | masks[2])
+    assert np.array_equal(_decode(maskgeometry.rle_intersection(rles)), masks[0] & masks[1] & masks[2])
+    assert np.array_equal(_decode(maskgeometry.rle_difference(rles[0], rles[1:])), masks[0] & ~(masks[1] | masks[2]))
+
+    crop, (x0, y0) = maskgeometry.rle_to_crop(rles[0], margin = 1)
+    if masks[0].any():
+        ys, xs = np.nonzero(masks[0])
+        assert x0 == max(xs.min() - 1, 0) and y0 == max(ys.min() - 1, 0)
+        expected = np.zeros_like(masks[0])
+        expected[y0:y0 + crop.shape[0], x0:x0 + crop.shape[1]] = crop
+        assert np.array_equal(expected, masks[0])
+    else:
+        assert crop.size == 0
+
+@pytest.mark.parametrize("seed", range(20))
+def test_split_matches_dense_half_plane(seed):
+    rng = np.random.default_rng(seed)
+    height, width = rng.integers(2, 60, size = 2)
+    mask = _random_mask(rng, height, width)
+    p0, p1 = rng.uniform(-10, 70, size = 2), rng.uniform(-10, 70, size = 2)
+    right, left = (_decode(part) for part in maskgeometry.rle_split(_encode(mask), p0, p1))
+    assert not (right & left).any()
+    assert np.array_equal(right | left, mask)
+
+    # Pixels clearly on one side of the line land on that side; fillPoly (pixel centers at integer coordinates)
+    # also fills pixels the edge passes within a diagonal of
+    ys, xs = np.mgrid[0:height, 0:width]
+    direction = (p1 - p0) / np.linalg.norm(p1 - p0)
+    distance = (xs - p0[0]) * -direction[1] + (ys - p0[1]) * direction[0]
+    assert not (left & (distance > 1.5)).any() and not (right & (distance < -1.5)).any()
+
+def test_split_rasterizes_only_the_mask_box(monkeypatch):
+    mask = np.zeros((1024, 1024), dtype = bool)
+    mask[500:540, 300:360] = True
+    shapes = []
+    crop_to_rle = maskgeometry.crop_to_rle
+    monkeypatch.setattr(maskgeometry, "crop_to_rle", lambda crop, *args: shapes.append(crop.shape) or crop_to_rle(crop, *args))
+    right, left = maskgeometry.rle_split(_encode(mask), (330, 0), (330, 1024))
+    assert shapes and all(h <= 43 and w <= 63 for h, w in shapes)
+    assert maskUtils.area(right) + maskUtils.area(left) == mask.sum()
+
+def test_region_is_json_serializable():
+    mask = np.zeros((30, 40), dtype = bool)
+    mask[5:20, 10:30] = True
+    rle = _encode(mask)
+    result = maskgeometry.region(rle)
+    assert json.loads(json.dumps(result))["segmentation"]["counts"] == rle["counts"].decode("utf-8")
+    assert result["bbox"] == [10.0, 5.0, 20.0, 15.0] and result["area"] == 300.0
+
+    # Converter annotations carry str counts
+    again = maskgeometry.merge_masks([result["segmentation"]])
+    assert again["segmentation"] == result["segmentation"]
+
+def test_edit_svg_replaces_the_paths(tmp_path):
+    masks = []
+    for x0 in (10, 40, 70):
+        mask = np.zeros((60, 120), dtype = bool)
+        mask[10:50, x0:x0 + 35] = True
+        masks.append(mask)
+    svg_path = str(tmp_path / "image.svg")
+    imgsvg.masks_to_svg(masks, svg_path)
+    RegionIndex.from_svg(svg_path).save(sidecar_path(svg_path))
+
+    merged = maskgeometry.edit_svg(svg_path, "merge", [0, 1])
+    assert len(merged) == 1 and merged[0]["bbox"] == [10.0, 10.0, 65.0, 40.0]
+    root = ElementTree.parse(svg_path).getroot()
+    assert imgsvg.svg_image_size(root) == (60, 120)
+    assert len([elem for elem in root.iter() if elem.tag.endswith("path")]) == 2
+    index = RegionIndex.load(sidecar_path(svg_path))
+    assert len(index) == 2 and list(index.at(20, 20)) == [0] and list(index.at(100, 20)) == [1]
+
+    parts = maskgeometry.edit_svg(svg_path, "split", [1], line = (89.5, 0, 89.5, 60))
+    areas = sorted(part["area"] for part in parts)
+    assert sum(areas) == 35 * 40 and abs(areas[0] - 15 * 40) <= 40
+    assert len(RegionIndex.from_svg(svg_path)) == 3
+    with pytest.raises(ValueError):
+        maskgeometry.edit_svg(svg_path, "merge", [5])
@@ -0,0 +1,40 @@
+# Importing Required Packages
+import json
+import numpy as np
+import cv2
+import pycocotools.mask as maskUtils
+from maskstore import export_mask_store, MaskStore
+
+def _write_record(tmp_path, height, width, box):
+    x, y, w, h = box
+    cv2.imwrite(str(tmp_path / "image.png"), np.full((height, width, 3), 128, dtype = np.uint8))
+    mask = np.zeros((height, width), dtype = np.uint8)
+    mask[y:y + h, x:x + w] = 1
+    rle = maskUtils.encode(np.asfortranarray(mask))
+    annotation = {"id": 7, "category_id": 0, "bbox": [float(v) for v in box],
+                  "segmentation": {"size": [height, width], "counts": rle["counts"].decode("utf-8")}}
+    record = {"image": {"file_name": "image.png", "height": height, "width": width}, "annotations": [annotation]}
+    with open(tmp_path / "image.json", "w") as f:
+        json.dump(record, f)
+
+def test_export_at_native_size(tmp_path):
+    _write_record(tmp_path, 64, 96, (8, 16, 40, 24))
+    export_mask_store([str(tmp_path)], str(tmp_path / "store"), size = (64, 96))
+    store = MaskStore(str(tmp_path / "store"))
+    assert store[0]["bboxes"].tolist() == [[8, 16, 40, 24]]
+    assert store.annotation_ids.tolist() == [7]
+    assert store.masks(0)[0].sum() == 40 * 24
+
+def test_export_scales_boxes_with_the_masks(tmp_path):
+    # A 200x400 (height x width) image stored at 512x512: x and w scale by 1.28, y and h by 2.56
+    _write_record(tmp_path, 200, 400, (100, 50, 200, 100))
+    export_mask_store([str(tmp_path)], str(tmp_path / "store"), size = (512, 512))
+    store = MaskStore(str(tmp_path / "store"))
+    sample = store[0]
+    assert sample["image"].shape == (512, 512, 3)
+    assert np.allclose(sample["bboxes"], [[128, 128, 256, 256]])
+
+    # The box matches the resized mask
+    ys, xs = np.nonzero(store.masks(0)[0])
+    assert np.allclose([xs.min(), ys.min(), xs.max() + 1 - xs.min(), ys.max() + 1 - ys.min()],
+                       sample["bboxes"][0], atol = 1)
@@ -0,0 +1,26 @@
+# Importing Required Packages
+import os
+from xml.dom import minidom
+import numpy as np
+import pytest
+from bench_pathsampler import loop_sample
+from pathsampler import sample_path
+
+SVG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "image_1720596516947-01.svg")
+
+def _path_strings():
+    doc = minidom.parse(SVG_PATH)
+    paths = [p.getAttribute("d") for p in doc.getElementsByTagName("path") if p.getAttribute("d")]
+    doc.unlink()
+    return paths
+
+@pytest.mark.parametrize("d", _path_strings())
+def test_integer_polygon_matches_point_loop(d):
+    # The converters cast the samples to int32 pixels, so they must match the old loop exactly
+    old = loop_sample(d).astype(np.int32)
+    new = sample_path(d, samples_per_segment = 25).astype(np.int32)
+    assert np.array_equal(old, new)
+
+def test_mixed_segments():
+    d = "M10.5,10.25 L100,10 Q150,50 100,100 C80,120 40,120 20,100 A30,20 15 0 1 10.5,10.25 Z"
+    assert np.allclose(sample_path(d), loop_sample(d))
@@ -0,0 +1,59 @@
+# Importing Required Packages
+import numpy as np
+import pytest
+import pycocotools.mask as maskUtils
+from rleencoder import polygon_to_rle, crop_to_rle, MaskScratch
+from bench_rleencoder import dense_encode, random_polygons
+
+# (height, width) of the frames checked, including degenerate and non-square ones
+SIZES = [(1, 5), (5, 1), (7, 7), (768, 1024), (1024, 768)]
+
+def _polygon(points):
+    return np.array(points, dtype = np.int32).reshape(-1, 1, 2)
+
+def _edge_polygons(height, width):
+    return {
+        "one point": _polygon([[width // 2, height // 2]]),
+        "two points": _polygon([[0, 0], [width - 1, height - 1]]),
+        "full frame": _polygon([[0, 0], [width - 1, 0], [width - 1, height - 1], [0, height - 1]]),
+        "beyond the frame": _polygon([[-10, -10], [width + 10, -10], [width + 10, height + 10], [-10, height + 10]]),
+        "off frame": _polygon([[width + 5, 0], [width + 20, 0], [width + 20, height], [width + 5, height]]),
+        "above the frame": _polygon([[0, -20], [width, -20], [width // 2, -5]]),
+        "crossing the corner": _polygon([[-5, -5], [width // 2, 0], [0, height // 2]]),
+    }
+
+def _assert_identical(pts, height, width):
+    expected = dense_encode(pts, height, width)
+    assert polygon_to_rle(pts, height, width)["counts"] == expected["counts"]
+    scratch = MaskScratch(height, width)
+    scratch.fill(pts)
+    assert scratch.encode()["counts"] == expected["counts"]
+
+@pytest.mark.parametrize("height, width", SIZES)
+def test_edge_cases_match_dense_encode(height, width):
+    for pts in _edge_polygons(height, width).values():
+        _assert_identical(pts, height, width)
+
+@pytest.mark.parametrize("height, width", SIZES)
+def test_random_polygons_match_dense_encode(height, width):
+    for pts in random_polygons(100, height, width, seed = height * width):
+        _assert_identical(pts, height, width)
+
+def test_scratch_reuse_clears_the_previous_polygon():
+    height, width = 768, 1024
+    scratch = MaskScratch(height, width)
+    for pts in random_polygons(50, height, width, seed = 1):
+        scratch.fill(pts)
+        assert scratch.encode()["counts"] == dense_encode(pts, height, width)["counts"]
+
+@pytest.mark.parametrize("height, width", SIZES)
+def test_crop_to_rle_matches_dense_encode(height, width):
+    rng = np.random.default_rng(height + width)
+    for _ in range(20):
+        h, w = rng.integers(1, height + 1), rng.integers(1, width + 1)
+        y0, x0 = rng.integers(0, height - h + 1), rng.integers(0, width - w + 1)
+        crop = (rng.random((h, w)) < 0.5).astype(np.uint8)
+        mask = np.zeros((height, width), dtype = np.uint8)
+        mask[y0:y0 + h, x0:x0 + w] = crop
+        expected = maskUtils.encode(np.asfortranarray(mask))
+        assert crop_to_rle(crop, x0, y0, height, width)["counts"] == expected["counts"]
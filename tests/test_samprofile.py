@@ -0,0 +1,30 @@
+# Importing Required Packages
+import pytest
+from conftest import SAM_TEST_PROFILE, sam_test_image
+
+pytest.importorskip("segment_anything")
+import samprofile
+
+def _masks(masks):
+    return sorted((m["segmentation"]["counts"], m["area"], tuple(m["bbox"]), m["predicted_iou"]) for m in masks)
+
+def test_resolve_profile_overrides_and_rejects_unknown_settings():
+    assert samprofile.resolve_profile("facade", min_area = None, points_per_side = 8)["points_per_side"] == 8
+    with pytest.raises(ValueError):
+        samprofile.resolve_profile("nope")
+    with pytest.raises(ValueError):
+        samprofile.resolve_profile({"points_per_edge": 4})
+
+def test_pruning_matches_stock_generator_filtered_by_area(sam_vit_b):
+    # No NMS: the stock generator would let small masks suppress larger ones before they are dropped
+    profile = dict(SAM_TEST_PROFILE, box_nms_thresh = 1.0)
+    image = sam_test_image(48, 80)
+    stock = samprofile.build_mask_generator(sam_vit_b, profile, output_mode = "coco_rle").generate(image)
+    min_area = sorted(m["area"] for m in stock)[len(stock) // 2]
+
+    generator = samprofile.build_mask_generator(sam_vit_b, dict(profile, min_area = min_area), output_mode = "coco_rle")
+    assert isinstance(generator, samprofile.PruningMaskGenerator)
+    pruned = generator.generate(image)
+    expected = [m for m in stock if m["area"] >= min_area]
+    assert 0 < len(expected) < len(stock) and generator.pruned >= len(stock) - len(expected)
+    assert _masks(pruned) == _masks(expected)
@@ -0,0 +1,69 @@
+# Importing Required Packages
+import os
+import json
+import time
+import hashlib
+import threading
+import urllib.request
+import urllib.error
+import numpy as np
+import cv2
+import pytest
+
+pytest.importorskip("segment_anything")
+from samservice import SamService, make_server
+
+def _request(url, data = None, content_type = None):
+    request = urllib.request.Request(url, data = data, headers = {"Content-Type": content_type} if content_type else {})
+    try:
+        with urllib.request.urlopen(request, timeout = 300) as response:
+            return response.status, response.read().decode("utf-8")
+    except urllib.error.HTTPError as e:
+        return e.code, e.read().decode("utf-8")
+
+@pytest.fixture(scope = "module")
+def service(tmp_path_factory):
+    # Untrained vit_b on the CPU with a 2x2 point grid: one encoder pass per request
+    output_dir = str(tmp_path_factory.mktemp("svg"))
+    sam_service = SamService("vit_b", None, "cpu", output_dir, max_queue = 1,
+                             profile = {"points_per_side": 2, "points_per_batch": 4})
+    server = make_server(sam_service, port = 0)
+    thread = threading.Thread(target = server.serve_forever, daemon = True)
+    thread.start()
+    yield sam_service, f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+def test_health(service):
+    status, body = _request(service[1] + "/health")
+    assert status == 200 and json.loads(body)["status"] == "ok"
+
+def test_segment_and_full_queue(service, tmp_path):
+    sam_service, url = service
+    image = np.random.default_rng(0).integers(0, 255, (48, 80, 3), dtype = np.uint8)
+    image_path = str(tmp_path / "image.png")
+    cv2.imwrite(image_path, image)
+
+    # Segment a path request in the background and fill the queue while the worker runs it
+    result = {}
+    request = threading.Thread(target = lambda: result.update(response = _request(
+        url + "/segment", json.dumps({"image_path": image_path}).encode("utf-8"), "application/json")))
+    request.start()
+    deadline = time.time() + 60
+    while not sam_service.metrics()["busy"] and time.time() < deadline:
+        time.sleep(0.05)
+    filler = sam_service.submit(image, "filler")
+    status, body = _request(url + "/segment", cv2.imencode(".png", image)[1].tobytes(), "image/png")
+    assert status == 503 and "queue is full" in json.loads(body)["error"]
+    filler.cancel()
+    request.join()
+
+    status, svg = result["response"]
+    assert status == 200 and 'viewBox="0,0,80,48"' in svg
+    path_hash = hashlib.sha1(os.path.realpath(image_path).encode("utf-8")).hexdigest()[:8]
+    assert os.path.exists(os.path.join(sam_service.output_dir, f"mask_image_{path_hash}.svg"))
+
+    status, body = _request(url + "/metrics")
+    metrics = json.loads(body)
+    assert status == 200 and metrics["completed"] == 1 and metrics["rejected"] == 1
+    assert metrics["latency_seconds"]["max"] > 0
@@ -0,0 +1,59 @@
+# Importing Required Packages
+import io
+import os
+import base64
+from xml.dom import minidom
+import numpy as np
+import pytest
+from PIL import Image
+from svgstream import SvgStreamReader
+from bench_pipeline import make_facade_svg
+
+SAMPLE_SVG = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "image_1720596516947-01.svg")
+
+# The DOM reading the converters did before svgstream: paths of every group and the image of the raster layer
+def minidom_read(svg_path, raster_layer = "layer_1"):
+    doc = minidom.parse(svg_path)
+    paths = []
+    for path in doc.getElementsByTagName("path"):
+        parent = path.parentNode
+        while parent is not None and getattr(parent, "tagName", None) != "g":
+            parent = parent.parentNode
+        if parent is not None and path.getAttribute("d"):
+            paths.append((parent.getAttribute("id").strip().lower(), path.getAttribute("d")))
+    image = None
+    for group in doc.getElementsByTagName("g"):
+        if group.getAttribute("id").strip().lower() == raster_layer:
+            href = group.getElementsByTagName("image")[0].getAttribute("xlink:href")
+            image = Image.open(io.BytesIO(base64.b64decode(href.split(";base64,", 1)[1])))
+            break
+    return paths, image
+
+@pytest.fixture(scope = "module")
+def svg_files(tmp_path_factory):
+    synthetic = str(tmp_path_factory.mktemp("svg") / "synthetic.svg")
+    make_facade_svg(synthetic, categories = ("Wall", "window"), paths_per_category = 3, raster_size = (40, 30))
+    return {"synthetic": synthetic, "sample": SAMPLE_SVG}
+
+def _assert_matches_minidom(svg_path, chunk_size):
+    expected_paths, expected_image = minidom_read(svg_path)
+    reader = SvgStreamReader(svg_path, raster_layer = "Layer_1", chunk_size = chunk_size)
+    assert list(reader) == expected_paths
+    assert reader.image is not None and reader.image.size == expected_image.size
+    assert np.array_equal(np.asarray(reader.image), np.asarray(expected_image))
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 4, 7, 8, 9, 100, 1 << 16])
+def test_synthetic_matches_minidom(svg_files, chunk_size):
+    _assert_matches_minidom(svg_files["synthetic"], chunk_size)
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 8, 4097, 1 << 16])
+def test_sample_matches_minidom(svg_files, chunk_size):
+    _assert_matches_minidom(svg_files["sample"], chunk_size)
+
+def test_image_outside_the_raster_layer_is_ignored(tmp_path):
+    svg_path = str(tmp_path / "layers.svg")
+    make_facade_svg(svg_path, categories = ("wall",), paths_per_category = 1, raster_size = (8, 8))
+    reader = SvgStreamReader(svg_path, raster_layer = "other")
+    assert [group for group, _ in reader] == ["wall"] and reader.image is None
+    with pytest.raises(ValueError):
+        SvgStreamReader(svg_path, chunk_size = 0)
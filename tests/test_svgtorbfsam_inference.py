@@ -0,0 +1,51 @@
+# Importing Required Packages
+import os
+import json
+import pytest
+import svgtorbfsam_inference
+from bench_pipeline import make_facade_svg
+
+_convert_svg_file = svgtorbfsam_inference.convert_svg_file
+
+# Worker function that kills its process on the files named crash*, like an out-of-memory kill
+def _crashing_convert(file_path, *args):
+    if os.path.basename(file_path).startswith("crash"):
+        os._exit(1)
+    return _convert_svg_file(file_path, *args)
+
+def _interrupting_convert(file_path, *args):
+    if os.path.basename(file_path).startswith("crash"):
+        raise KeyboardInterrupt
+    return _convert_svg_file(file_path, *args)
+
+@pytest.fixture
+def input_dir(tmp_path):
+    svg_dir = tmp_path / "svgs"
+    svg_dir.mkdir()
+    for i, name in enumerate(("a", "b", "crash", "d", "e")):
+        make_facade_svg(str(svg_dir / f"{name}.svg"), categories = ("wall", "window"), paths_per_category = 2,
+                        raster_size = (64, 48), seed = i)
+    return str(svg_dir)
+
+def _manifest(output_dir):
+    with open(os.path.join(output_dir, "manifest.json"), "r") as f:
+        return json.load(f)
+
+def test_dead_worker_fails_only_its_file(input_dir, tmp_path, monkeypatch):
+    monkeypatch.setattr(svgtorbfsam_inference, "convert_svg_file", _crashing_convert)
+    output_dir = str(tmp_path / "out")
+    manifest = svgtorbfsam_inference.run_batch(input_dir, output_dir, workers = 2, max_in_flight = 1)
+    assert manifest == _manifest(output_dir)
+    assert (manifest["succeeded"], manifest["failed"], manifest["pending"]) == (4, 1, 0)
+    failed = [entry for entry in manifest["files"] if entry["status"] == "error"]
+    assert os.path.basename(failed[0]["svg"]) == "crash.svg" and "BrokenProcessPool" in failed[0]["error"]
+    assert sorted(f for f in os.listdir(output_dir) if f.endswith(".json") and f != "categories.json"
+                  and f != "manifest.json") == ["a.json", "b.json", "d.json", "e.json"]
+
+def test_manifest_is_written_when_interrupted(input_dir, tmp_path, monkeypatch):
+    monkeypatch.setattr(svgtorbfsam_inference, "convert_svg_file", _interrupting_convert)
+    output_dir = str(tmp_path / "out")
+    with pytest.raises(KeyboardInterrupt):
+        svgtorbfsam_inference.run_batch(input_dir, output_dir)
+    manifest = _manifest(output_dir)
+    assert (manifest["succeeded"], manifest["failed"], manifest["pending"]) == (2, 0, 3)
@@ -0,0 +1,100 @@
+# Importing Required Packages
+import io
+import time
+import threading
+import email.utils
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import numpy as np
+import pandas as pd
+import pytest
+from PIL import Image
+from urltojpgimage import download_images_from_excel, retry_after_seconds
+
+# Helper to encode a small PNG
+def _png_bytes(color):
+    buffer = io.BytesIO()
+    Image.new("RGB", (32, 24), color).save(buffer, "PNG")
+    return buffer.getvalue()
+
+# Local stand-in for the image host: /ok.png, /busy.png (429 once, then the image) and 404 for anything else
+class _ImageHandler(BaseHTTPRequestHandler):
+    hits = {}
+    retry_after = "0"
+
+    def do_GET(self):
+        hits = self.hits[self.path] = self.hits.get(self.path, 0) + 1
+        if self.path == "/busy.png" and hits == 1:
+            self.send_response(429)
+            self.send_header("Retry-After", self.retry_after)
+            self.end_headers()
+            return
+        if self.path not in ("/ok.png", "/busy.png"):
+            self.send_error(404)
+            return
+        body = _png_bytes((200, 30, 30))
+        self.send_response(200)
+        self.send_header("Content-Type", "image/png")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def image_server():
+    _ImageHandler.hits = {}
+    _ImageHandler.retry_after = "0"
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _ImageHandler)
+    thread = threading.Thread(target = server.serve_forever, daemon = True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}", _ImageHandler
+    server.shutdown()
+    server.server_close()
+
+def _write_excel(path, urls):
+    pd.DataFrame({"id": [f"house_{i}" for i in range(len(urls))], "imageUploaded": urls}).to_excel(path, index = False)
+
+def test_download_handles_retry_404_and_blank_cells(tmp_path, image_server):
+    base_url, handler = image_server
+    excel = tmp_path / "images.xlsx"
+    _write_excel(excel, [f"{base_url}/ok.png", f"{base_url}/busy.png", f"{base_url}/missing.png", np.nan])
+    output_dir = tmp_path / "out"
+
+    summary = download_images_from_excel(str(excel), str(output_dir), concurrency = 2, retries = 2,
+                                         backoff = 0.01, decode_workers = 1)
+
+    assert summary == {"downloaded": 2, "skipped": 0, "failed": 2}
+    assert handler.hits["/busy.png"] == 2
+    assert handler.hits["/missing.png"] == 1  # a 404 is not retried
+    for name in ("Image_1.jpg", "Image_2.jpg"):
+        with Image.open(output_dir / name) as image:
+            assert image.size == (1024, 1024)
+    assert not (output_dir / "Image_3.jpg").exists()
+    assert not (output_dir / "Image_4.jpg").exists()
+
+    # A rerun resumes: the saved images are skipped, the failed rows are tried again
+    summary = download_images_from_excel(str(excel), str(output_dir), concurrency = 2, retries = 0,
+                                         decode_workers = 1)
+    assert summary == {"downloaded": 0, "skipped": 2, "failed": 2}
+
+def test_retry_after_http_date(tmp_path, image_server):
+    base_url, handler = image_server
+    handler.retry_after = email.utils.formatdate(usegmt = True)  # "now": retry right away
+    excel = tmp_path / "images.xlsx"
+    _write_excel(excel, [f"{base_url}/busy.png"])
+    # A 30 s backoff would be used if the date were not understood
+    start = time.perf_counter()
+    summary = download_images_from_excel(str(excel), str(tmp_path / "out"), retries = 1, backoff = 30,
+                                         decode_workers = 1)
+    assert time.perf_counter() - start < 10
+    assert summary["downloaded"] == 1
+    assert handler.hits["/busy.png"] == 2
+
+def test_retry_after_seconds():
+    assert retry_after_seconds("3") == 3.0
+    assert retry_after_seconds(None) is None
+    assert retry_after_seconds("soon") is None
+    assert retry_after_seconds("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+    future = email.utils.formatdate(timeval = time.time() + 60, usegmt = True)
+    assert 55 <= retry_after_seconds(future) <= 60
@@ -1,13 +1,108 @@
 # Importing Required Packages
 import os
-import pandas as pd
+import time
+import argparse
+import threading
+import datetime
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
 import requests
+from requests.adapters import HTTPAdapter
 from PIL import Image
 from io import BytesIO
 
+# HTTP status codes worth retrying
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+# Function to read a Retry-After header, given in seconds or as an HTTP date; None if absent or invalid
+def retry_after_seconds(value):
+    value = (value or "").strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError, IndexError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo = datetime.timezone.utc)
+    return max(0.0, (when - datetime.datetime.now(datetime.timezone.utc)).total_seconds())
+
+# Function to decode, resize and save one downloaded image (runs in the worker processes)
+def save_resized_image(content: bytes, filepath: str, size = (1024, 1024)):
+    # Use BytesIO to handle image in memory without saving first
+    img = Image.open(BytesIO(content))
+
+    # Convert RGBA to RGB if necessary before saving as JPEG
+    if img.mode == 'RGBA':
+        img = img.convert('RGB')
+
+    # Resize the image to 1024x1024 pixels
+    resized_img = img.resize(size, Image.Resampling.LANCZOS)
+
+    # Save the Resized Image through a temp file so an interrupted run never leaves a partial JPG
+    tmp_path = filepath + ".part"
+    resized_img.save(tmp_path, "JPEG")
+    os.replace(tmp_path, filepath)
+    return filepath
+
+# Pooled HTTP client with a per-host concurrency limit and retries with backoff
+class ImageFetcher:
+    def __init__(self, concurrency = 16, per_host = 4, retries = 3, backoff = 0.5, timeout = 10):
+        self.per_host = per_host
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections = concurrency, pool_maxsize = concurrency)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._host_limits = {}
+        self._lock = threading.Lock()
+
+    def _host_limit(self, url):
+        host = urlparse(url).netloc
+        with self._lock:
+            if host not in self._host_limits:
+                self._host_limits[host] = threading.BoundedSemaphore(self.per_host)
+            return self._host_limits[host]
+
+    def fetch(self, url):
+        """Return the body of ``url``; raises requests.exceptions.RequestException after the last retry."""
+        for attempt in range(self.retries + 1):
+            try:
+                with self._host_limit(url):
+                    response = self.session.get(url, timeout = self.timeout)
+                if response.status_code == 200:
+                    return response.content
+                if response.status_code not in RETRY_STATUS or attempt == self.retries:
+                    raise requests.exceptions.HTTPError(f"Status code: {response.status_code}", response = response)
+                delay = retry_after_seconds(response.headers.get("Retry-After"))
+                if delay is None:
+                    delay = self.backoff * 2 ** attempt
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                if attempt == self.retries:
+                    raise
+                delay = self.backoff * 2 ** attempt
+            time.sleep(delay)
+
 # Define function That takes the Excel file and a directory to store the Images in jpg format
-def download_images_from_excel(excel_file: str, output_dir: str):
-    
+def download_images_from_excel(excel_file: str, output_dir: str, concurrency: int = 16, per_host: int = 4,
+                               retries: int = 3, backoff: float = 0.5, resume: bool = True,
+                               decode_workers: int = None):
+    """
+    Download, resize to 1024x1024 and save the image of every row as Image_N.jpg.
+
+    Downloads run on a thread pool sharing one pooled session, with at most
+    ``per_host`` requests per host at a time and retries with exponential
+    backoff. Decoding and resizing run on a process pool so CPU work overlaps
+    the network. With ``resume`` rows whose Image_N.jpg already exists are skipped.
+
+    Returns:
+        summary (dict): Counts of downloaded, skipped and failed rows, or None on input errors.
+    """
+    # pandas is only needed here, so importing this module stays fast
+    import pandas as pd
     try:
         # Read the Excel file into a pandas DataFrame
         df = pd.read_excel(excel_file)
@@ -29,47 +124,76 @@ def download_images_from_excel(excel_file: str, output_dir: str):
         os.makedirs(output_dir)
         print(f"Created output directory: {output_dir}")
 
-    # Iterate through the DataFrame rows
-    for index, row in df.iterrows():
-        image_url = row['imageUploaded']
-        name = row['id']
-        
-        # Create the filename as Image_1.jpg, Image_2.jpg, etc.
-        filename = f"Image_{index + 1}.jpg"
-        filepath = os.path.join(output_dir, filename)
+    # Create the filename as Image_1.jpg, Image_2.jpg, etc. and skip the ones already written
+    jobs = []
+    skipped = 0
+    failed = 0
+    for position, (image_url, name) in enumerate(zip(df['imageUploaded'], df['id'])):
+        filepath = os.path.join(output_dir, f"Image_{position + 1}.jpg")
+        if resume and os.path.exists(filepath):
+            skipped += 1
+            continue
+        # Blank cells come back as NaN
+        if not isinstance(image_url, str) or not image_url.strip():
+            print(f"Warning: no image URL for '{name}' (row {position + 1}), skipping it.")
+            failed += 1
+            continue
+        jobs.append((image_url.strip(), name, filepath))
+    if skipped:
+        print(f"Skipping {skipped} images that were already downloaded.")
+
+    fetcher = ImageFetcher(concurrency = concurrency, per_host = per_host, retries = retries, backoff = backoff)
+    decode_workers = decode_workers or os.cpu_count() or 1
+    # Bound the downloaded-but-not-yet-decoded images held in memory
+    decode_slots = threading.BoundedSemaphore(2 * decode_workers)
+    downloaded = 0
 
-        try:
+    with ProcessPoolExecutor(max_workers = decode_workers) as decoders, \
+            ThreadPoolExecutor(max_workers = concurrency) as downloaders:
+
+        def download(image_url, name, filepath):
             print(f"Downloading image for '{name}' from {image_url}...")
-            # Send a GET request to the image URL
-            response = requests.get(image_url, timeout=10)
-            
-            # Check if the request was successful
-            if response.status_code == 200:
-                # Use BytesIO to handle image in memory without saving first
-                image_data = BytesIO(response.content)
-                img = Image.open(image_data)
-
-                # Convert RGBA to RGB if necessary before saving as JPEG
-                if img.mode == 'RGBA':
-                    img = img.convert('RGB')
-
-                # Resize the image to 1024x1024 pixels
-                resized_img = img.resize((1024, 1024), Image.Resampling.LANCZOS)
-
-                # Save the Resized Image
-                resized_img.save(filepath, "JPEG")
-                print(f"Successfully downloaded, resized, and saved: {filename}")
-            else:
-                print(f"Failed to download image from {image_url}. Status code: {response.status_code}")
-        except requests.exceptions.RequestException as e:
-            print(f"An error occurred while downloading image for '{name}': {e}")
-        
-    print("\nAll image processing complete.")
+            content = fetcher.fetch(image_url)
+            decode_slots.acquire()
+            future = decoders.submit(save_resized_image, content, filepath)
+            future.add_done_callback(lambda _: decode_slots.release())
+            return future
+
+        downloads = {downloaders.submit(download, *job): job for job in jobs}
+        saves = {}
+        for future in as_completed(downloads):
+            image_url, name, filepath = downloads[future]
+            try:
+                saves[future.result()] = (name, filepath)
+            except Exception as e:
+                print(f"An error occurred while downloading image for '{name}': {e}")
+                failed += 1
+
+        for future in as_completed(saves):
+            name, filepath = saves[future]
+            try:
+                future.result()
+                print(f"Successfully downloaded, resized, and saved: {os.path.basename(filepath)}")
+                downloaded += 1
+            except Exception as e:
+                print(f"Failed to decode the image for '{name}': {e}")
+                failed += 1
+
+    print(f"\nAll image processing complete. Downloaded {downloaded}, skipped {skipped}, failed {failed}.")
+    return {"downloaded": downloaded, "skipped": skipped, "failed": failed}
 
 if __name__ == "__main__":
-    # Define your input file and output directory
-    input_excel_file = 'CompleteData.xlsx'
-    output_images_dir = 'Outputs'
+    parser = argparse.ArgumentParser(description = "Download and resize the images listed in an Excel file.")
+    parser.add_argument("--excel", default = "CompleteData.xlsx", help = "Excel file with 'imageUploaded' and 'id' columns.")
+    parser.add_argument("--output-dir", default = "Outputs", help = "Directory to store the images in.")
+    parser.add_argument("--concurrency", type = int, default = 16, help = "Simultaneous downloads.")
+    parser.add_argument("--per-host", type = int, default = 4, help = "Simultaneous downloads per host.")
+    parser.add_argument("--retries", type = int, default = 3, help = "Retries per image on network errors.")
+    parser.add_argument("--decode-workers", type = int, default = None, help = "Processes that decode and resize.")
+    parser.add_argument("--no-resume", action = "store_true", help = "Download again even if Image_N.jpg exists.")
+    args = parser.parse_args()
 
     # Call the function to start the process
-    download_images_from_excel(input_excel_file, output_images_dir)
\ No newline at end of file
+    download_images_from_excel(args.excel, args.output_dir, concurrency = args.concurrency, per_host = args.per_host,
+                               retries = args.retries, resume = not args.no_resume,
+                               decode_workers = args.decode_workers)